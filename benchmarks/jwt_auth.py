@@ -0,0 +1,63 @@
+# Микробенчмарк проверки токена на запрос: полный jwt.decode (как было) против LRU проверенных
+# токенов с проверкой отзыва, плюс цена перехода синхронной зависимости в пул потоков.
+#
+#   python -m benchmarks.jwt_auth --requests 20000 --tokens 100
+
+import time
+import asyncio
+import argparse
+import statistics
+from typing import Callable, List
+
+from jose import jwt
+from starlette.concurrency import run_in_threadpool
+
+from webapp.utils.auth.jwt import JwtAuth
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--requests', type=int, default=20_000)
+parser.add_argument('--tokens', type=int, default=100, help='число разных пользователей в потоке запросов')
+parser.add_argument('--repeat', type=int, default=5)
+
+SECRET = 'benchmark-secret'
+
+
+def measure(func: Callable[[str], object], tokens: List[str], requests: int, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for index in range(requests):
+            func(tokens[index % len(tokens)])
+        timings.append((time.perf_counter() - started) / requests)
+    return statistics.median(timings)
+
+
+async def measure_threadpool(func: Callable[[str], object], tokens: List[str], requests: int) -> float:
+    # так FastAPI вызывает синхронную зависимость (старый validate_token)
+    started = time.perf_counter()
+    for index in range(requests):
+        await run_in_threadpool(func, tokens[index % len(tokens)])
+    return (time.perf_counter() - started) / requests
+
+
+async def main(requests: int, tokens_count: int, repeat: int) -> None:
+    auth = JwtAuth(SECRET)
+    tokens = [auth.create_token(user_id) for user_id in range(tokens_count)]
+
+    def old_validate(token: str) -> object:
+        return jwt.decode(token, SECRET)
+
+    results = {
+        'jwt.decode': measure(old_validate, tokens, requests, repeat),
+        'lru cache': measure(auth.decode_token, tokens, requests, repeat),
+        'jwt.decode + threadpool': await measure_threadpool(old_validate, tokens, requests // 4),
+    }
+    for name, seconds in results.items():
+        print(f'{name:>24}: {seconds * 1e6:8.1f} us/request')
+
+    print(f'speedup: x{results["jwt.decode + threadpool"] / results["lru cache"]:.0f} per authenticated request')
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.tokens, args.repeat))
@@ -0,0 +1,125 @@
+# Микробенчмарк сериализации страницы /file/file/: старый путь через pydantic и url_for
+# на каждую строку против проекции Core-строк с orjson.
+#
+#   python -m benchmarks.listing_serialization --rows 10000 --repeat 5
+
+import time
+import asyncio
+import argparse
+import statistics
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from starlette.requests import Request
+
+from webapp.schema.file.file import File as FileSchema, FilePage, FileSchemaWithURL
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--rows', type=int, default=10_000)
+parser.add_argument('--repeat', type=int, default=5)
+
+app = FastAPI()
+
+
+@app.get('/file/download/{file_id}', name='download_file_endpoint')
+async def download_file_endpoint(file_id: int) -> None:
+    return None
+
+
+def make_request() -> Request:
+    return Request(
+        {
+            'type': 'http',
+            'app': app,
+            'router': app.router,
+            'scheme': 'http',
+            'server': ('test.com', 80),
+            'path': '/file/file/',
+            'root_path': '',
+            'headers': [(b'host', b'test.com')],
+            'query_string': b'',
+        }
+    )
+
+
+def make_rows(count: int) -> List[Dict[str, Any]]:
+    start = datetime(2024, 6, 28)
+    return [
+        {
+            'id': index,
+            'user_id': 1,
+            'bucket': None,
+            'file_name': f'file_{index}.jpg',
+            'file_path': f'2024-06-28/file_{index}.jpg',
+            'file_type': 'image/jpeg',
+            'file_size': 20_000 + index,
+            'upload_date': start - timedelta(seconds=index),
+        }
+        for index in range(count)
+    ]
+
+
+async def pydantic_path(rows: List[Dict[str, Any]], request: Request) -> bytes:
+    # как было: from_orm -> dict -> FileSchemaWithURL с url_for на каждую строку,
+    # затем FastAPI еще раз валидирует и сериализует все через response_model
+    entities = [SimpleNamespace(**row) for row in rows]
+    files_with_urls = []
+    for file_schema in [FileSchema.model_validate(entity) for entity in entities]:
+        file_data = file_schema.model_dump()
+        file_data['download_url'] = str(request.url_for('download_file_endpoint', file_id=file_schema.id))
+        files_with_urls.append(FileSchemaWithURL(**file_data))
+
+    content = await serialize_response(
+        field=create_response_field(name='Response', type_=FilePage),
+        response_content=FilePage(items=files_with_urls, next_cursor=None),
+    )
+    return ORJSONResponse(content).body
+
+
+async def projection_path(rows: List[Dict[str, Any]], request: Request) -> bytes:
+    download_prefix = str(request.url_for('download_file_endpoint', file_id=0)).rsplit('/', 1)[0]
+    items = [
+        {
+            'id': file['id'],
+            'file_name': file['file_name'],
+            'file_path': file['file_path'],
+            'file_type': file['file_type'],
+            'file_size': file['file_size'],
+            'upload_date': file['upload_date'],
+            'download_url': f'{download_prefix}/{file["id"]}',
+        }
+        for file in rows
+    ]
+    return ORJSONResponse({'items': items, 'next_cursor': None}).body
+
+
+async def measure(func: Callable, rows: List[Dict[str, Any]], repeat: int) -> List[float]:
+    request = make_request()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func(rows, request)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def main(rows_count: int, repeat: int) -> None:
+    rows = make_rows(rows_count)
+
+    results = {}
+    for name, func in (('pydantic', pydantic_path), ('projection', projection_path)):
+        timings = await measure(func, rows, repeat)
+        results[name] = statistics.median(timings)
+        print(f'{name:>10}: median {results[name] * 1000:8.1f} ms, min {min(timings) * 1000:8.1f} ms')
+
+    print(f'speedup: x{results["pydantic"] / results["projection"]:.1f} on {rows_count} rows')
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
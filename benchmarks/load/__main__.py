@@ -0,0 +1,175 @@
+# Нагрузочный тест: открытый цикл с целевым RPS, смесь действий (альбомы, календарь, лента, fill_queue),
+# p50/p95/p99, пропускная способность и ошибки по маршрутам, результат в JSON для сравнения коммитов.
+#
+# Поднять зависимости в docker, приложение через python -m webapp.server и прогнать смесь:
+#   python -m benchmarks.load --start --compose --workers 4 --scenario mixed --rps 200 --duration 60 \
+#       --output results/$(git rev-parse --short HEAD).json --compare results/baseline.json
+# Против уже запущенного экземпляра (пользователи username-base..username-base+users-1 с кодом --code):
+#   python -m benchmarks.load --url http://127.0.0.1:8000 --scenario list --rps 500 --duration 30
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import platform
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict
+
+import orjson
+import aiohttp
+
+from benchmarks.load import standins
+from benchmarks.load.runner import Recorder, run_open_loop
+from benchmarks.load.scenarios import SCENARIOS, Workload, login_users, make_photo
+
+parser = argparse.ArgumentParser()
+target = parser.add_mutually_exclusive_group(required=True)
+target.add_argument('--url', help='адрес уже запущенного экземпляра')
+target.add_argument('--start', action='store_true', help='запустить приложение с окружением standins.env')
+parser.add_argument('--compose', action='store_true', help='вместе с --start поднять зависимости в docker')
+parser.add_argument('--keep', action='store_true', help='не останавливать контейнеры после теста')
+parser.add_argument('--workers', type=int, default=1)
+parser.add_argument(
+    '--storage',
+    choices=('minio', 'memory'),
+    default='minio',
+    help='memory - хранилище внутри процесса, только с --workers 1',
+)
+parser.add_argument('--scenario', choices=sorted(SCENARIOS), default='mixed')
+parser.add_argument('--rps', type=float, default=100, help='действий в секунду')
+parser.add_argument('--duration', type=float, default=60)
+parser.add_argument('--uniform', action='store_true', help='равные интервалы вместо пуассоновского потока')
+parser.add_argument('--max-outstanding', type=int, default=1000)
+parser.add_argument('--users', type=int, default=50)
+parser.add_argument('--username-base', type=int, default=9_000_000_000)
+parser.add_argument('--code', default='bench')
+parser.add_argument('--seed-users', action='store_true', help='создать пользователей (с --start - всегда)')
+parser.add_argument('--db-url', help='для --seed-users без --start')
+parser.add_argument('--album-size', type=int, default=5)
+parser.add_argument('--prefill-albums', type=int, default=2, help='альбомов на пользователя до замера')
+parser.add_argument('--seed', type=int, default=None, help='seed генератора для повторяемой смеси')
+parser.add_argument('--output', type=Path)
+parser.add_argument('--compare', type=Path, help='JSON прошлого прогона')
+
+
+def git_meta() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        return subprocess.run(['git', *args], capture_output=True, text=True, cwd=standins.ROOT).stdout.strip()
+
+    return {'commit': git('rev-parse', 'HEAD'), 'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+
+
+def make_meta(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        **git_meta(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'host': platform.node(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'args': {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+    }
+
+
+def change(old: float | None, new: float | None) -> str:
+    if not old or new is None:
+        return f'{"-":>8} -> {new if new is not None else "-":>8}'
+    return f'{old:>8} -> {new:>8} ({(new - old) / old * 100:+.1f}%)'
+
+
+def print_report(result: Dict[str, Any], baseline: Dict[str, Any] | None) -> None:
+    rows = {'total': result['totals'], **result['routes'], **result['actions']}
+    old_rows = {'total': baseline['totals'], **baseline['routes'], **baseline['actions']} if baseline else {}
+
+    for name, row in rows.items():
+        latency = row['latency_ms']
+        print(
+            f'{name:<34} n={row["count"]:<7} rps={row["throughput_rps"]:<8} err={row["errors"]:<5} '
+            f'p50={latency["p50"]} p95={latency["p95"]} p99={latency["p99"]} ms'
+        )
+        old = old_rows.get(name)
+        if old:
+            print(f'{"":<34} p50 {change(old["latency_ms"]["p50"], latency["p50"])}')
+            print(f'{"":<34} p99 {change(old["latency_ms"]["p99"], latency["p99"])}')
+            print(f'{"":<34} rps {change(old["throughput_rps"], row["throughput_rps"])}')
+
+
+async def prefill(workload: Workload, albums: int) -> None:
+    # у каждого пользователя должны быть файлы, иначе календарь и лента отвечают 404; в отчет не входит
+    recorder, workload.recorder = workload.recorder, Recorder()
+    try:
+        for _ in range(albums):
+            await asyncio.gather(*(workload.album_upload(time.perf_counter(), user) for user in workload.users))
+    finally:
+        workload.recorder = recorder
+
+
+async def run(args: argparse.Namespace, url: str) -> Dict[str, Any]:
+    usernames = [args.username_base + index for index in range(args.users)]
+    connector = aiohttp.TCPConnector(limit=args.max_outstanding)
+    timeout = aiohttp.ClientTimeout(total=120)
+
+    async with aiohttp.ClientSession(base_url=url, connector=connector, timeout=timeout) as session:
+        users = await login_users(session, usernames, args.code)
+        workload = Workload(session, Recorder(), users, make_photo(), args.album_size, args.seed)
+        await prefill(workload, args.prefill_albums)
+
+        duration = await run_open_loop(
+            workload.actions(),
+            SCENARIOS[args.scenario],
+            rps=args.rps,
+            duration=args.duration,
+            recorder=workload.recorder,
+            max_outstanding=args.max_outstanding,
+            poisson=not args.uniform,
+            seed=args.seed,
+        )
+
+    return {'meta': {**make_meta(args), 'measured_seconds': round(duration, 3)}, **workload.recorder.report(duration)}
+
+
+async def main(args: argparse.Namespace) -> Dict[str, Any]:
+    if not args.start:
+        if args.seed_users:
+            await standins.seed_users(
+                args.db_url, range(args.username_base, args.username_base + args.users), args.code
+            )
+        return await run(args, args.url.rstrip('/'))
+
+    env = {**os.environ, **standins.load_env()}
+    env.update(SERVER_WORKERS=str(args.workers), STORAGE_BACKEND=args.storage)
+    if args.compose:
+        standins.start_dependencies()
+
+    server = None
+    try:
+        standins.migrate(env)
+        usernames = range(args.username_base, args.username_base + args.users)
+        await standins.seed_users(env['DB_URL'], usernames, args.code)
+
+        server = standins.start_server(env)
+        url = f'http://{env["BIND_IP"]}:{env["BIND_PORT"]}'
+        await standins.wait_ready(url, server)
+        return await run(args, url)
+    finally:
+        if server is not None:
+            standins.stop_server(server)
+        if args.compose and not args.keep:
+            standins.stop_dependencies()
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    if args.storage == 'memory' and args.workers > 1:
+        sys.exit('--storage memory хранит файлы в памяти воркера: используйте --workers 1')
+
+    result = asyncio.run(main(args))
+    baseline = orjson.loads(args.compare.read_bytes()) if args.compare else None
+    print_report(result, baseline)
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_bytes(orjson.dumps(result, option=orjson.OPT_INDENT_2))
@@ -0,0 +1,134 @@
+import math
+import time
+import random
+import asyncio
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Sequence
+
+# Открытый цикл: запросы отправляются по расписанию целевого RPS независимо от того, ответил ли сервер
+# на предыдущие. Задержка считается от запланированного момента, а не от фактической отправки:
+# если генератор или сервер отстают, ожидание в очереди попадает в перцентили (без coordinated omission).
+
+
+@dataclass
+class RouteStats:
+    latencies: List[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    errors: int = 0
+
+    def report(self, duration: float) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            'count': len(latencies),
+            'errors': self.errors,
+            'error_rate': round(self.errors / len(latencies), 4) if latencies else 0,
+            'throughput_rps': round(len(latencies) / duration, 2),
+            'statuses': dict(sorted((str(code), count) for code, count in self.statuses.items())),
+            'latency_ms': {
+                'p50': percentile(latencies, 50),
+                'p95': percentile(latencies, 95),
+                'p99': percentile(latencies, 99),
+                'max': round(latencies[-1] * 1000, 2) if latencies else None,
+                'mean': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+            },
+        }
+
+
+def percentile(sorted_values: Sequence[float], rank: float) -> float | None:
+    # nearest-rank по отсортированной выборке, в миллисекундах
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(rank / 100 * len(sorted_values)) - 1)
+    return round(sorted_values[index] * 1000, 2)
+
+
+class Recorder:
+    # маршруты - шаблоны вида GET /file/download/{file_id}, действия - action:calendar
+    def __init__(self) -> None:
+        self.routes: Dict[str, RouteStats] = defaultdict(RouteStats)
+        self.actions: Dict[str, RouteStats] = defaultdict(RouteStats)
+        self.skipped = 0
+        self.started = 0
+
+    def record(self, route: str, started: float, status: int | None) -> None:
+        # первый запрос действия передает запланированный момент, последующие - фактическую отправку
+        stats = self.routes[route]
+        stats.latencies.append(time.perf_counter() - started)
+        stats.statuses[status or 'exception'] += 1
+        if status is None or status >= 400:
+            stats.errors += 1
+
+    def record_action(self, action: str, scheduled: float, ok: bool) -> None:
+        stats = self.actions[action]
+        stats.latencies.append(time.perf_counter() - scheduled)
+        stats.statuses['ok' if ok else 'failed'] += 1
+        stats.errors += not ok
+
+    def report(self, duration: float) -> Dict[str, Any]:
+        total = RouteStats()
+        for stats in self.routes.values():
+            total.latencies.extend(stats.latencies)
+            total.statuses.update(stats.statuses)
+            total.errors += stats.errors
+
+        return {
+            'totals': {**total.report(duration), 'actions_started': self.started, 'actions_skipped': self.skipped},
+            'routes': {route: stats.report(duration) for route, stats in sorted(self.routes.items())},
+            'actions': {action: stats.report(duration) for action, stats in sorted(self.actions.items())},
+        }
+
+
+Action = Callable[[float], Awaitable[bool]]
+
+
+async def run_open_loop(
+    actions: Dict[str, Action],
+    weights: Dict[str, float],
+    rps: float,
+    duration: float,
+    recorder: Recorder,
+    max_outstanding: int,
+    poisson: bool = True,
+    seed: int | None = None,
+) -> float:
+    # rps - частота действий; действие может состоять из нескольких запросов (календарь, лента).
+    # Интервалы экспоненциальные (пуассоновский поток) или равные. Если незавершенных действий
+    # больше max_outstanding, новое не запускается и считается пропущенным: генератор не копит
+    # бесконечно задачи, а перегрузка видна в отчете
+    rng = random.Random(seed)
+    names = list(weights)
+    weight_values = list(weights.values())
+    tasks: set = set()
+
+    async def run(name: str, scheduled: float) -> None:
+        try:
+            ok = await actions[name](scheduled)
+        except Exception:  # noqa: PIE786 - упавшее действие засчитывается как ошибка, нагрузка продолжается
+            ok = False
+        recorder.record_action(f'action:{name}', scheduled, ok)
+
+    start = time.perf_counter()
+    scheduled = start
+    while True:
+        scheduled += rng.expovariate(rps) if poisson else 1 / rps
+        if scheduled - start >= duration:
+            break
+
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if len(tasks) >= max_outstanding:
+            recorder.skipped += 1
+            continue
+
+        recorder.started += 1
+        name = rng.choices(names, weight_values)[0]
+        task = asyncio.create_task(run(name, scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.wait(tasks)
+    return time.perf_counter() - start
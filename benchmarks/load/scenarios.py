@@ -0,0 +1,174 @@
+import io
+import os
+import time
+import base64
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+import orjson
+import aiohttp
+from PIL import Image
+
+from benchmarks.load.runner import Action, Recorder
+
+# смесь действий: вес - доля в потоке. Отдельные сценарии нагружают один маршрут
+SCENARIOS: Dict[str, Dict[str, float]] = {
+    'mixed': {'album_upload': 1, 'calendar': 4, 'feed_download': 4, 'fill_queue': 1},
+    'upload': {'album_upload': 1},
+    'list': {'calendar': 1},
+    'download': {'feed_download': 1},
+    'fill_queue': {'fill_queue': 1},
+}
+
+
+@dataclass
+class BenchUser:
+    username: int
+    user_id: int
+    token: str
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {'Authorization': f'Bearer {self.token}'}
+
+
+def make_photo(width: int = 1600, height: int = 1200, quality: int = 85) -> bytes:
+    # шум сжимается плохо, размер близок к настоящей фотографии такого разрешения
+    noise = Image.frombytes('L', (width // 4, height // 4), os.urandom(width * height // 16))
+    image = Image.merge('RGB', (noise, noise.rotate(90, expand=False), noise.transpose(Image.FLIP_LEFT_RIGHT)))
+    buffer = io.BytesIO()
+    image.resize((width, height)).save(buffer, 'JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def unique_photo(photo: bytes) -> bytes:
+    # байты после маркера конца JPEG декодеры игнорируют; без них загрузка схлопнулась бы в один blob
+    return photo + os.urandom(16)
+
+
+def token_user_id(token: str) -> int:
+    # payload без проверки подписи - генератору нужен только id пользователя для /file/fill_queue
+    payload = token.split('.')[1]
+    return orjson.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))['user_id']
+
+
+class Workload:
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        recorder: Recorder,
+        users: List[BenchUser],
+        photo: bytes,
+        album_size: int,
+        seed: int | None = None,
+    ) -> None:
+        self.session = session
+        self.recorder = recorder
+        self.users = users
+        self.photo = photo
+        self.album_size = album_size
+        self.rng = random.Random(seed)
+
+    async def request(
+        self,
+        route: str,
+        method: str,
+        url: str,
+        started: float | None = None,
+        **kwargs: Any,
+    ) -> Any:
+        # тело читается целиком: для скачивания в задержку входит передача файла
+        started = started if started is not None else time.perf_counter()
+        try:
+            async with self.session.request(method, url, **kwargs) as response:
+                body = await response.read()
+        except (aiohttp.ClientError, OSError):
+            self.recorder.record(route, started, None)
+            return None
+
+        self.recorder.record(route, started, response.status)
+        if response.status >= 400:
+            return None
+        if response.content_type == 'application/json':
+            return orjson.loads(body)
+        return body
+
+    def actions(self) -> Dict[str, Action]:
+        return {
+            'album_upload': self.album_upload,
+            'calendar': self.calendar,
+            'feed_download': self.feed_download,
+            'fill_queue': self.fill_queue,
+        }
+
+    async def album_upload(self, scheduled: float, user: BenchUser | None = None) -> bool:
+        user = user or self.rng.choice(self.users)
+        form = aiohttp.FormData()
+        for index in range(self.album_size):
+            form.add_field('files', unique_photo(self.photo), filename=f'bench_{index}.jpg', content_type='image/jpeg')
+
+        result = await self.request(
+            'POST /file/upload_batch', 'POST', '/file/upload_batch', scheduled, data=form, headers=user.headers
+        )
+        return result is not None
+
+    async def calendar(self, scheduled: float) -> bool:
+        # годы -> месяцы года -> страница файлов за месяц
+        user = self.rng.choice(self.users)
+        years = await self.request('GET /filter/', 'GET', '/filter/', scheduled, headers=user.headers)
+        if not years:
+            return False
+
+        year = self.rng.choice(years)
+        months = await self.request('GET /filter/', 'GET', '/filter/', params={'year': year}, headers=user.headers)
+        if not months:
+            return False
+
+        page = await self.request(
+            'GET /file/file/',
+            'GET',
+            '/file/file/',
+            params={'year': year, 'month': self.rng.choice(months), 'limit': 50},
+            headers=user.headers,
+        )
+        return page is not None
+
+    async def feed_download(self, scheduled: float) -> bool:
+        # первая страница ленты и несколько превью с нее
+        user = self.rng.choice(self.users)
+        page = await self.request(
+            'GET /file/file/', 'GET', '/file/file/', scheduled, params={'limit': 20}, headers=user.headers
+        )
+        if not page or not page['items']:
+            return False
+
+        ok = True
+        for item in self.rng.sample(page['items'], min(3, len(page['items']))):
+            body = await self.request(
+                'GET /file/download/{file_id}',
+                'GET',
+                f'/file/download/{item["id"]}',
+                params={'w': 512},
+                headers=user.headers,
+            )
+            ok = ok and body is not None
+        return ok
+
+    async def fill_queue(self, scheduled: float) -> bool:
+        user_ids = [user.user_id for user in self.rng.sample(self.users, min(10, len(self.users)))]
+        result = await self.request(
+            'POST /file/fill_queue', 'POST', '/file/fill_queue', scheduled, json={'user_ids': user_ids, 'per_user': 20}
+        )
+        return result is not None
+
+
+async def login_users(session: aiohttp.ClientSession, usernames: List[int], code: str) -> List[BenchUser]:
+    users = []
+    for username in usernames:
+        async with session.post('/auth/login', json={'username': username, 'code': code}) as response:
+            if response.status != 200:
+                raise RuntimeError(f'Не удалось войти пользователем {username}: {response.status}')
+            token = (await response.json())['access_token']
+        users.append(BenchUser(username=username, user_id=token_user_id(token), token=token))
+    return users
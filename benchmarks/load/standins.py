@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+import signal
+import asyncio
+import contextlib
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterable
+
+import aiohttp
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+ROOT = Path(__file__).resolve().parents[2]
+COMPOSE_FILE = Path(__file__).with_name('docker-compose.yml')
+ENV_FILE = Path(__file__).with_name('standins.env')
+
+
+def load_env(path: Path = ENV_FILE) -> Dict[str, str]:
+    env = {}
+    for line in path.read_text().splitlines():
+        line = line.strip()
+        if line and not line.startswith('#'):
+            key, _, value = line.partition('=')
+            env[key.strip()] = value.strip()
+    return env
+
+
+def start_dependencies(compose_file: Path = COMPOSE_FILE) -> None:
+    # Postgres, Redis, RabbitMQ, MinIO и Kafka в контейнерах; --wait дожидается healthcheck всех сервисов
+    subprocess.run(['docker', 'compose', '-f', str(compose_file), 'up', '-d', '--wait'], check=True)
+
+
+def stop_dependencies(compose_file: Path = COMPOSE_FILE) -> None:
+    subprocess.run(['docker', 'compose', '-f', str(compose_file), 'down', '-v'], check=True)
+
+
+def migrate(env: Dict[str, str]) -> None:
+    # настройки приложения читаются при импорте, поэтому миграция - отдельным процессом с окружением стенда
+    subprocess.run([sys.executable, 'scripts/migrate.py'], cwd=ROOT, env=env, check=True)
+
+
+async def seed_users(db_url: str, usernames: Iterable[int], code: str) -> None:
+    engine = create_async_engine(db_url)
+    try:
+        async with engine.begin() as connection:
+            await connection.execute(
+                text('INSERT INTO sirius.user (username, code) VALUES (:username, :code) ON CONFLICT DO NOTHING'),
+                [{'username': username, 'code': code} for username in usernames],
+            )
+    finally:
+        await engine.dispose()
+
+
+def start_server(env: Dict[str, str]) -> subprocess.Popen:
+    # тот же вход, что и в проде: супервизор gunicorn, create_app в каждом воркере
+    return subprocess.Popen([sys.executable, '-m', 'webapp.server'], cwd=ROOT, env=env, start_new_session=True)
+
+
+def stop_server(process: subprocess.Popen, timeout: float = 30) -> None:
+    if process.poll() is not None:
+        return
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+
+
+async def wait_ready(url: str, process: subprocess.Popen | None = None, timeout: float = 60) -> None:
+    # /metrics отвечает, когда хотя бы один воркер прошел lifespan и прогрев
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            if process is not None and process.poll() is not None:
+                raise RuntimeError(f'Сервер завершился с кодом {process.returncode}')
+            with contextlib.suppress(aiohttp.ClientError):
+                async with session.get(f'{url}/metrics') as response:
+                    if response.status == 200:
+                        return
+            await asyncio.sleep(0.5)
+    raise TimeoutError(f'{url} не ответил за {timeout} с')
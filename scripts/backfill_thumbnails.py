@@ -0,0 +1,61 @@
+import asyncio
+import logging
+import argparse
+
+from sqlalchemy import exists, select
+
+from conf.config import settings
+from webapp.db.postgres import async_session
+from webapp.models.sirius.file import File
+from webapp.models.sirius.file_derivative import FileDerivative
+from webapp.on_startup.redis import start_redis
+from webapp.on_startup.storage import start_storage
+from webapp.worker import thumbnails
+
+parser = argparse.ArgumentParser(description='Построение превью для изображений, загруженных без них')
+parser.add_argument('--batch-size', type=int, default=200)
+parser.add_argument('--concurrency', type=int, default=settings.THUMBNAIL_WORKERS)
+
+logger = logging.getLogger(__name__)
+
+
+async def main(batch_size: int, concurrency: int) -> None:
+    await start_redis()
+    await start_storage()
+    thumbnails.start_pool()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def generate(file_id: int) -> int:
+        async with semaphore:
+            return await thumbnails.generate_derivatives(file_id)
+
+    last_id, total = 0, 0
+    try:
+        while True:
+            async with async_session() as session:
+                file_ids = list(
+                    await session.scalars(
+                        select(File.id)
+                        .where(
+                            File.id > last_id,
+                            File.file_type.startswith('image/'),
+                            ~exists().where(FileDerivative.file_id == File.id),
+                        )
+                        .order_by(File.id)
+                        .limit(batch_size)
+                    )
+                )
+            if not file_ids:
+                break
+
+            total += sum(await asyncio.gather(*(generate(file_id) for file_id in file_ids)))
+            last_id = file_ids[-1]
+            logger.info('Обработано до file_id=%s, превью создано: %s', last_id, total)
+    finally:
+        thumbnails.stop_pool()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.concurrency))
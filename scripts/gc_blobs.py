@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import argparse
+import contextlib
+from datetime import timedelta
+
+from sqlalchemy import delete, func, select
+
+from conf.config import settings
+from webapp.db.postgres import async_session
+from webapp.models.sirius.blob import Blob
+from webapp.on_startup.storage import create_storage
+from webapp.storage.base import ObjectNotFoundError, Storage
+from webapp.storage.layout import ObjectLocation, derivative_location
+
+parser = argparse.ArgumentParser(description='Удаление blob, на которые больше нет ссылок')
+parser.add_argument('--batch-size', type=int, default=500)
+parser.add_argument('--dry-run', action='store_true')
+
+logger = logging.getLogger(__name__)
+
+
+async def remove_blob(storage: Storage, bucket: str, key: str) -> None:
+    original = ObjectLocation(bucket=bucket, key=key)
+    locations = [original] + [
+        derivative_location(original, width, settings.THUMBNAIL_FORMAT.lower()) for width in settings.THUMBNAIL_WIDTHS
+    ]
+    for location in locations:
+        with contextlib.suppress(ObjectNotFoundError):
+            await storage.remove_object(location.bucket, location.key)
+
+
+async def main(batch_size: int, dry_run: bool) -> None:
+    storage = create_storage()
+    # берем только строки без ссылок, которые удалось заблокировать: загрузка решает о дедупликации под
+    # блокировкой той же строки (ensure_blobs), поэтому такие строки пропускаются до ее коммита.
+    # BLOB_GC_GRACE - запас после потери последней ссылки
+    released_before = func.now() - timedelta(seconds=settings.BLOB_GC_GRACE)
+    total = 0
+
+    try:
+        while True:
+            async with async_session() as session:
+                rows = (
+                    await session.execute(
+                        select(Blob.sha256, Blob.bucket, Blob.key)
+                        .where(Blob.ref_count <= 0, Blob.released_at < released_before)
+                        .order_by(Blob.sha256)
+                        .limit(batch_size)
+                        .with_for_update(skip_locked=True)
+                    )
+                ).all()
+                if not rows:
+                    break
+
+                if dry_run:
+                    logger.info('Будет удалено blob: %s', len(rows))
+                    break
+
+                locked = [row.sha256 for row in rows]
+                await session.execute(delete(Blob).where(Blob.sha256.in_(locked), Blob.ref_count <= 0))
+                for _, bucket, key in rows:
+                    await remove_blob(storage, bucket, key)
+                await session.commit()
+
+            total += len(rows)
+            logger.info('Удалено blob: %s', total)
+    finally:
+        await storage.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.dry_run))
@@ -1,10 +1,23 @@
 import asyncio
 import logging
 
+from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError
 
+from webapp.crud.filter import rebuild_calendar
 from webapp.db.postgres import engine
 from webapp.models import meta
+from webapp.models.sirius.blob import BLOB_TRIGGER_DDL
+from webapp.models.sirius.file_calendar import CALENDAR_INSTALLED_SQL, CALENDAR_TRIGGER_DDL
+
+# create_all не меняет уже существующие таблицы, поэтому новые колонки и индексы
+# докатываются идемпотентными DDL
+UPGRADES = [
+    'ALTER TABLE sirius.file ADD COLUMN IF NOT EXISTS bucket VARCHAR',
+    'CREATE INDEX IF NOT EXISTS ix_file_user_id_upload_date_id ON sirius.file (user_id, upload_date, id)',
+    'ALTER TABLE sirius.file ADD COLUMN IF NOT EXISTS blob_sha256 VARCHAR(64) REFERENCES sirius.blob (sha256)',
+    *BLOB_TRIGGER_DDL,
+]
 
 
 async def main() -> None:
@@ -14,6 +27,19 @@ async def main() -> None:
     except IntegrityError:
         logging.exception('Already exists')
 
+    async with engine.begin() as conn:
+        for statement in UPGRADES:
+            await conn.execute(text(statement))
+
+        # на существующей базе триггеры ставятся впервые: без пересчета /filter/ видел бы только новые загрузки
+        if (await conn.execute(text(CALENDAR_INSTALLED_SQL))).scalar():
+            for statement in CALENDAR_TRIGGER_DDL:
+                await conn.execute(text(statement))
+        else:
+            rows = await rebuild_calendar(conn)
+            logging.info('Календарь заполнен по существующим файлам, строк: %s', rows)
+
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
     asyncio.run(main())
@@ -0,0 +1,100 @@
+import uuid
+import asyncio
+import logging
+import argparse
+from typing import Tuple
+
+from sqlalchemy import select, update
+
+from conf.config import settings
+from webapp.db.postgres import async_session
+from webapp.models.sirius.file import File
+from webapp.on_startup.storage import create_storage
+from webapp.storage.base import ObjectNotFoundError, Storage, StorageError
+from webapp.storage.layout import LAYOUT_SHARDED, ObjectLocation, ensure_bucket, locate, new_location
+
+parser = argparse.ArgumentParser(description='Перенос файлов из бакетов user-* в общую раскладку')
+parser.add_argument('--batch-size', type=int, default=500)
+parser.add_argument('--concurrency', type=int, default=16, help='число одновременных копирований')
+parser.add_argument('--delete-source', action='store_true', help='удалять исходный объект после переноса')
+
+logger = logging.getLogger(__name__)
+
+
+async def migrate_file(storage: Storage, file: File) -> Tuple[dict, ObjectLocation] | None:
+    source = locate(file.user_id, file.file_path)
+    # ключ детерминирован, поэтому повторный запуск после сбоя перезапишет тот же объект, а не создаст копию
+    target = new_location(
+        file.user_id,
+        file.file_name,
+        upload_date=file.upload_date.date(),
+        object_id=uuid.uuid5(uuid.NAMESPACE_URL, f'{source.bucket}/{source.key}').hex,
+    )
+
+    try:
+        await ensure_bucket(storage, target.bucket)
+        await storage.copy_object(target.bucket, target.key, source.bucket, source.key)
+    except ObjectNotFoundError:
+        logger.warning('Объект %s/%s не найден, файл %s пропущен', source.bucket, source.key, file.id)
+        return None
+
+    return {'id': file.id, 'bucket': target.bucket, 'file_path': target.key}, source
+
+
+async def remove_source(storage: Storage, source: ObjectLocation) -> None:
+    # вызывается только после коммита: пока строка ссылается на исходный объект, удалять его нельзя
+    try:
+        await storage.remove_object(source.bucket, source.key)
+    except StorageError as e:
+        logger.warning('Не удалось удалить исходный объект %s/%s: %s', source.bucket, source.key, e)
+
+
+async def main(batch_size: int, concurrency: int, delete_source: bool) -> None:
+    if settings.STORAGE_LAYOUT != LAYOUT_SHARDED:
+        raise SystemExit(f'STORAGE_LAYOUT должен быть {LAYOUT_SHARDED!r}')
+
+    storage = create_storage()
+    semaphore = asyncio.Semaphore(concurrency)
+    last_id = 0
+    migrated = 0
+
+    async def migrate(file: File) -> Tuple[dict, ObjectLocation] | None:
+        async with semaphore:
+            return await migrate_file(storage, file)
+
+    async def remove(source: ObjectLocation) -> None:
+        async with semaphore:
+            await remove_source(storage, source)
+
+    try:
+        while True:
+            # обрабатываются только строки без bucket, поэтому прерванный перенос можно просто перезапустить
+            async with async_session() as session:
+                files = (
+                    await session.scalars(
+                        select(File).where(File.bucket.is_(None), File.id > last_id).order_by(File.id).limit(batch_size)
+                    )
+                ).all()
+                if not files:
+                    break
+
+                results = [result for result in await asyncio.gather(*(migrate(file) for file in files)) if result]
+                values = [row for row, _ in results]
+                if values:
+                    await session.execute(update(File), values)
+                    await session.commit()
+
+            if delete_source:
+                await asyncio.gather(*(remove(source) for _, source in results))
+
+            last_id = files[-1].id
+            migrated += len(values)
+            logger.info('Перенесено файлов: %s (последний id %s)', migrated, last_id)
+    finally:
+        await storage.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.concurrency, args.delete_source))
@@ -0,0 +1,19 @@
+import asyncio
+import logging
+
+from webapp.crud.filter import rebuild_calendar
+from webapp.db.postgres import engine
+
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    async with engine.begin() as conn:
+        rows = await rebuild_calendar(conn)
+
+    logger.info('Календарь пересобран, строк: %s', rows)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
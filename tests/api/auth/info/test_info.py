@@ -11,10 +11,10 @@ FIXTURES_PATH = BASE_DIR / 'fixtures'
 
 
 @pytest.mark.parametrize(
-    ('username', 'password', 'expected_status', 'fixtures'),
+    ('username', 'code', 'expected_status', 'fixtures'),
     [
         (
-                'test',
+                1001,
                 'qwerty',
                 status.HTTP_200_OK,
                 [
@@ -27,8 +27,8 @@ FIXTURES_PATH = BASE_DIR / 'fixtures'
 @pytest.mark.usefixtures('_common_api_fixture')
 async def test_login(
         client: AsyncClient,
-        username: str,
-        password: str,
+        username: int,
+        code: str,
         access_token: str,
         expected_status: int,
 ) -> None:
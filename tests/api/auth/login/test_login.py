@@ -14,11 +14,11 @@ FIXTURES_PATH = BASE_DIR / 'fixtures'
 
 
 @pytest.mark.parametrize(
-    ('username', 'password', 'expected_status', 'expected_access_token', 'fixtures'),
+    ('username', 'code', 'expected_status', 'expected_access_token', 'fixtures'),
     [
         (
-                'invalid_user',
-                'password',
+                42,
+                'qwerty',
                 status.HTTP_401_UNAUTHORIZED,
                 False,
                 [
@@ -26,7 +26,7 @@ FIXTURES_PATH = BASE_DIR / 'fixtures'
                 ],
         ),
         (
-                'test',
+                1001,
                 'qwerty',
                 status.HTTP_200_OK,
                 True,
@@ -41,13 +41,13 @@ FIXTURES_PATH = BASE_DIR / 'fixtures'
 @pytest.mark.usefixtures('_common_api_fixture')
 async def test_login(
         client: AsyncClient,
-        username: str,
-        password: str,
+        username: int,
+        code: str,
         expected_status: int,
         expected_access_token: Any,
         db_session: None,
 ) -> None:
-    response = await client.post(URLS['auth']['login'], json={'username': username, 'password': password})
+    response = await client.post(URLS['auth']['login'], json={'username': username, 'code': code})
 
     assert response.status_code == expected_status
 
@@ -59,11 +59,11 @@ async def test_login(
 
 
 @pytest.mark.parametrize(
-    ('username', 'password', 'expected_status', 'expected_access_token', 'fixtures'),
+    ('username', 'code', 'expected_status', 'expected_access_token', 'fixtures'),
     [
         (
-                'invalid_user',
-                'password',
+                42,
+                'qwerty',
                 status.HTTP_401_UNAUTHORIZED,
                 False,
                 [
@@ -71,7 +71,7 @@ async def test_login(
                 ],
         ),
         (
-                'test',
+                1001,
                 'qwerty',
                 status.HTTP_200_OK,
                 True,
@@ -86,13 +86,13 @@ async def test_login(
 @pytest.mark.usefixtures('_common_api_fixture')
 async def test_login(
         client: AsyncClient,
-        username: str,
-        password: str,
+        username: int,
+        code: str,
         expected_status: int,
         expected_access_token: Any,
         db_session: None,
 ) -> None:
-    response = await client.post(URLS['auth']['login'], json={'username': username, 'password': password})
+    response = await client.post(URLS['auth']['login'], json={'username': username, 'code': code})
 
     assert response.status_code == expected_status
 
@@ -104,11 +104,11 @@ async def test_login(
 
 
 @pytest.mark.parametrize(
-    ('username', 'password', 'expected_status', 'expected_access_token', 'fixtures'),
+    ('username', 'code', 'expected_status', 'expected_access_token', 'fixtures'),
     [
         (
-                'invalid_user',
-                'password',
+                42,
+                'qwerty',
                 status.HTTP_401_UNAUTHORIZED,
                 False,
                 [
@@ -116,7 +116,7 @@ async def test_login(
                 ],
         ),
         (
-                'test',
+                1001,
                 'qwerty',
                 status.HTTP_200_OK,
                 True,
@@ -131,13 +131,13 @@ async def test_login(
 @pytest.mark.usefixtures('_common_api_fixture')
 async def test_login(
         client: AsyncClient,
-        username: str,
-        password: str,
+        username: int,
+        code: str,
         expected_status: int,
         expected_access_token: Any,
         db_session: None,
 ) -> None:
-    response = await client.post(URLS['auth']['login'], json={'username': username, 'password': password})
+    response = await client.post(URLS['auth']['login'], json={'username': username, 'code': code})
 
     assert response.status_code == expected_status
 
@@ -149,11 +149,11 @@ async def test_login(
 
 
 @pytest.mark.parametrize(
-    ('username', 'password', 'expected_status', 'expected_access_token', 'fixtures'),
+    ('username', 'code', 'expected_status', 'expected_access_token', 'fixtures'),
     [
         (
-                'invalid_user',
-                'password',
+                42,
+                'qwerty',
                 status.HTTP_401_UNAUTHORIZED,
                 False,
                 [
@@ -161,7 +161,7 @@ async def test_login(
                 ],
         ),
         (
-                'test',
+                1001,
                 'qwerty',
                 status.HTTP_200_OK,
                 True,
@@ -176,13 +176,13 @@ async def test_login(
 @pytest.mark.usefixtures('_common_api_fixture')
 async def test_login(
         client: AsyncClient,
-        username: str,
-        password: str,
+        username: int,
+        code: str,
         expected_status: int,
         expected_access_token: Any,
         db_session: None,
 ) -> None:
-    response = await client.post(URLS['auth']['login'], json={'username': username, 'password': password})
+    response = await client.post(URLS['auth']['login'], json={'username': username, 'code': code})
 
     assert response.status_code == expected_status
 
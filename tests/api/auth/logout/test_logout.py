@@ -0,0 +1,85 @@
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+from starlette import status
+
+from tests.const import URLS
+
+BASE_DIR = Path(__file__).parent
+FIXTURES_PATH = BASE_DIR / 'fixtures'
+
+
+@pytest.mark.parametrize(
+    ('username', 'code', 'url', 'fixtures'),
+    [
+        (
+                1001,
+                'qwerty',
+                URLS['auth']['logout'],
+                [
+                    FIXTURES_PATH / 'sirius.user.json',
+                ],
+        ),
+        (
+                1001,
+                'qwerty',
+                URLS['auth']['logout_all'],
+                [
+                    FIXTURES_PATH / 'sirius.user.json',
+                ],
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_logout(
+        client: AsyncClient,
+        username: int,
+        code: str,
+        access_token: str,
+        url: str,
+) -> None:
+    headers = {'Authorization': f'Bearer {access_token}'}
+
+    response = await client.post(url, headers=headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {'status': 'success'}
+
+    response = await client.post(URLS['auth']['info'], headers=headers)
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    response = await client.post(url, headers=headers)
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.parametrize(
+    ('headers', 'fixtures'),
+    [
+        (
+                {},
+                [
+                    FIXTURES_PATH / 'sirius.user.json',
+                ],
+        ),
+        (
+                {'Authorization': 'Bearer invalid'},
+                [
+                    FIXTURES_PATH / 'sirius.user.json',
+                ],
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_logout_unauthorized(
+        client: AsyncClient,
+        headers: dict,
+) -> None:
+    for url in (URLS['auth']['logout'], URLS['auth']['logout_all']):
+        response = await client.post(url, headers=headers)
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -1,20 +1,29 @@
 import json
 import uuid
+from datetime import datetime
 from pathlib import Path
-from typing import AsyncGenerator, List
+from typing import Any, AsyncGenerator, Dict, List
 
 import pytest
 from fastapi import FastAPI
 from httpx import AsyncClient
-from sqlalchemy import insert
+from sqlalchemy import DateTime, Table, insert
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from tests.const import URLS
 from tests.mocking.kafka import TestKafkaProducer
+from tests.mocking.rabbit import TestChannel, TestExchange
+from tests.mocking.redis import TestRedis
 from tests.my_types import FixtureFunctionT
-from webapp.db import kafka
+
+from conf.config import settings
+from webapp.api.dependencies import get_read_session
+from webapp.db import kafka, rabbitmq, redis, storage
 from webapp.db.postgres import engine, get_session
 from webapp.models.meta import metadata
+from webapp.storage import layout
+from webapp.storage.memory import InMemoryStorage
+from webapp.utils.auth.revocation import revocations
 
 
 @pytest.fixture()
@@ -33,6 +42,7 @@ async def db_session(app: FastAPI) -> AsyncGenerator[AsyncSession, None]:
             yield session
 
         app.dependency_overrides[get_session] = mocked_session  # noqa
+        app.dependency_overrides[get_read_session] = mocked_session  # noqa
 
         yield session
 
@@ -45,7 +55,7 @@ async def _load_fixtures(db_session: AsyncSession, fixtures: List[Path]) -> Fixt
         model = metadata.tables[fixture.stem]
 
         with open(fixture, 'r') as file:
-            values = json.load(file)
+            values = [_parse_row(model, row) for row in json.load(file)]
 
         await db_session.execute(insert(model).values(values))
         await db_session.commit()
@@ -53,10 +63,18 @@ async def _load_fixtures(db_session: AsyncSession, fixtures: List[Path]) -> Fixt
     return
 
 
+def _parse_row(model: Table, row: Dict[str, Any]) -> Dict[str, Any]:
+    # asyncpg не приводит строки к timestamp, даты в фикстурах записаны в ISO 8601
+    return {
+        key: datetime.fromisoformat(value) if isinstance(model.c[key].type, DateTime) and value else value
+        for key, value in row.items()
+    }
+
+
 @pytest.fixture()
 def _mock_kafka(monkeypatch: pytest.MonkeyPatch, kafka_received_messages: List, mocked_hex: str) -> FixtureFunctionT:
     monkeypatch.setattr(kafka, 'get_producer', lambda: TestKafkaProducer(kafka_received_messages))
-    monkeypatch.setattr(kafka, 'get_partition', lambda: 1)
+    monkeypatch.setattr(kafka, 'get_partition', lambda *args, **kwargs: 1)
     monkeypatch.setattr(uuid.UUID, 'hex', mocked_hex)
 
 
@@ -65,19 +83,59 @@ def kafka_received_messages() -> List:
     return []
 
 
+@pytest.fixture()
+def _mock_redis(monkeypatch: pytest.MonkeyPatch, mocked_redis: TestRedis) -> FixtureFunctionT:
+    monkeypatch.setattr(redis, 'redis', mocked_redis, raising=False)
+    # Lua-скрипт token bucket проверяют тесты middleware, здесь ограничение частоты не участвует
+    monkeypatch.setattr(settings, 'RATE_LIMIT_ENABLED', False)
+    yield
+    # копия отзывов в памяти процесса переживает подмененный Redis, иначе отзыв утек бы в следующие тесты
+    revocations.clear()
+
+
+@pytest.fixture()
+def mocked_redis() -> TestRedis:
+    return TestRedis()
+
+
+@pytest.fixture()
+def _mock_rabbit(monkeypatch: pytest.MonkeyPatch, rabbit_exchange: TestExchange) -> FixtureFunctionT:
+    monkeypatch.setattr(rabbitmq, 'channel', TestChannel(), raising=False)
+    monkeypatch.setattr(rabbitmq, 'exchange_users', rabbit_exchange, raising=False)
+
+
+@pytest.fixture()
+def rabbit_exchange() -> TestExchange:
+    return TestExchange()
+
+
+@pytest.fixture()
+def _mock_storage(monkeypatch: pytest.MonkeyPatch, memory_storage: InMemoryStorage) -> FixtureFunctionT:
+    monkeypatch.setattr(storage, 'storage', memory_storage, raising=False)
+    monkeypatch.setattr(layout, '_known_buckets', set())
+
+
+@pytest.fixture()
+def memory_storage() -> InMemoryStorage:
+    return InMemoryStorage()
+
+
 @pytest.fixture()
 async def access_token(
         client: AsyncClient,
-        username: str,
-        password: str,
+        username: int,
+        code: str,
 ) -> str:
-    response = await client.post(URLS['auth']['login'], json={'username': username, 'password': password})
+    response = await client.post(URLS['auth']['login'], json={'username': username, 'code': code})
     return response.json()['access_token']
 
 
 @pytest.fixture()
 async def _common_api_fixture(
         _load_fixtures: FixtureFunctionT,
+        _mock_redis: FixtureFunctionT,
+        _mock_rabbit: FixtureFunctionT,
+        _mock_storage: FixtureFunctionT,
 ) -> None:
     return
 
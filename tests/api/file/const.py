@@ -15,6 +15,7 @@ value = msgpack.packb(
     {
         'image': image,
         'task_id': MOCKED_HEX,
+        'user_id': 1,
         'width': WIDTH,
         'height': HEIGHT,
     }
@@ -0,0 +1,99 @@
+import hashlib
+from typing import Any, Dict
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from tests.api.file.const import BASE_DIR
+from tests.const import URLS
+
+from webapp.models.sirius.blob import Blob
+
+FIXTURES_PATH = BASE_DIR / 'fixtures' / 'blob'
+FIXTURES = [
+    FIXTURES_PATH / 'sirius.user.json',
+    FIXTURES_PATH / 'sirius.blob.json',
+    FIXTURES_PATH / 'sirius.file.json',
+]
+
+OWN = hashlib.sha256(b'own photo').hexdigest()
+FOREIGN = hashlib.sha256(b'foreign photo').hexdigest()
+
+
+@pytest.mark.parametrize(
+    ('username', 'code', 'fixtures', 'sha256', 'expected_status', 'expected_headers'),
+    [
+        (1001, 'qwerty', FIXTURES, OWN, status.HTTP_200_OK, {'content-length': '9', 'etag': f'"{OWN}"'}),
+        # содержимое есть, но только у другого пользователя
+        (1001, 'qwerty', FIXTURES, FOREIGN, status.HTTP_404_NOT_FOUND, {}),
+        (1001, 'qwerty', FIXTURES, 'not-a-sha256', status.HTTP_422_UNPROCESSABLE_ENTITY, {}),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_blob_exists(
+    client: AsyncClient,
+    access_token: str,
+    sha256: str,
+    expected_status: int,
+    expected_headers: Dict[str, str],
+) -> None:
+    response = await client.head(
+        URLS['file']['blob'].format(sha256=sha256), headers={'Authorization': f'Bearer {access_token}'}
+    )
+
+    assert response.status_code == expected_status
+    assert {name: response.headers.get(name) for name in expected_headers} == expected_headers
+
+
+@pytest.mark.parametrize(
+    ('username', 'code', 'fixtures'),
+    [
+        (1001, 'qwerty', FIXTURES),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_upload_by_hash(
+    client: AsyncClient,
+    access_token: str,
+    db_session: AsyncSession,
+) -> None:
+    response = await client.post(
+        URLS['file']['upload_by_hash'],
+        json={'sha256': OWN, 'file_name': 'copy.jpg'},
+        headers={'Authorization': f'Bearer {access_token}'},
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    body = response.json()
+    assert body['deduplicated'] is True
+    assert (body['file_name'], body['file_size'], body['blob_sha256']) == ('copy.jpg', 9, OWN)
+    # новая ссылка на то же содержимое
+    assert await db_session.scalar(select(Blob.ref_count).where(Blob.sha256 == OWN)) == 2
+
+
+@pytest.mark.parametrize(
+    ('username', 'code', 'fixtures', 'body', 'expected_status'),
+    [
+        # чужое содержимое по хешу не присваивается
+        (1001, 'qwerty', FIXTURES, {'sha256': FOREIGN, 'file_name': 'copy.jpg'}, status.HTTP_404_NOT_FOUND),
+        (1001, 'qwerty', FIXTURES, {'sha256': OWN, 'file_name': ''}, status.HTTP_422_UNPROCESSABLE_ENTITY),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_upload_by_hash_errors(
+    client: AsyncClient,
+    access_token: str,
+    body: Dict[str, Any],
+    expected_status: int,
+) -> None:
+    response = await client.post(
+        URLS['file']['upload_by_hash'], json=body, headers={'Authorization': f'Bearer {access_token}'}
+    )
+
+    assert response.status_code == expected_status
@@ -0,0 +1,102 @@
+import io
+import hashlib
+from typing import Dict
+
+import pytest
+from httpx import AsyncClient
+from starlette import status
+
+from tests.api.file.const import BASE_DIR
+from tests.const import URLS
+from tests.my_types import FixtureFunctionT
+
+from webapp.storage.memory import InMemoryStorage
+
+FIXTURES_PATH = BASE_DIR / 'fixtures'
+FIXTURES = [
+    FIXTURES_PATH / 'sirius.user.json',
+    FIXTURES_PATH / 'sirius.file.json',
+]
+
+CONTENT = b'0123456789'
+ETAG = f'"{hashlib.md5(CONTENT).hexdigest()}"'
+
+
+@pytest.fixture()
+async def _stored_file(memory_storage: InMemoryStorage) -> FixtureFunctionT:
+    await memory_storage.make_bucket('files')
+    await memory_storage.put_object('files', 'photos/sea.jpg', io.BytesIO(CONTENT), content_type='image/jpeg')
+
+
+@pytest.mark.parametrize(
+    ('username', 'code', 'fixtures', 'headers', 'expected_status', 'expected_body', 'expected_content_range'),
+    [
+        (1001, 'qwerty', FIXTURES, {}, status.HTTP_200_OK, CONTENT, None),
+        (1001, 'qwerty', FIXTURES, {'Range': 'bytes=2-5'}, status.HTTP_206_PARTIAL_CONTENT, b'2345', 'bytes 2-5/10'),
+        (1001, 'qwerty', FIXTURES, {'Range': 'bytes=-3'}, status.HTTP_206_PARTIAL_CONTENT, b'789', 'bytes 7-9/10'),
+        (
+            1001,
+            'qwerty',
+            FIXTURES,
+            {'Range': 'bytes=20-30'},
+            status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            b'',
+            'bytes */10',
+        ),
+        (
+            1001,
+            'qwerty',
+            FIXTURES,
+            {'Range': 'bytes=2-5', 'If-Range': ETAG},
+            status.HTTP_206_PARTIAL_CONTENT,
+            b'2345',
+            'bytes 2-5/10',
+        ),
+        # объект изменился: вместо диапазона отдается весь файл
+        (1001, 'qwerty', FIXTURES, {'Range': 'bytes=2-5', 'If-Range': '"stale"'}, status.HTTP_200_OK, CONTENT, None),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture', '_stored_file')
+async def test_download(
+    client: AsyncClient,
+    access_token: str,
+    headers: Dict[str, str],
+    expected_status: int,
+    expected_body: bytes,
+    expected_content_range: str | None,
+) -> None:
+    response = await client.get(
+        URLS['file']['download'].format(file_id=1),
+        headers={'Authorization': f'Bearer {access_token}', **headers},
+    )
+
+    assert response.status_code == expected_status
+    assert response.content == expected_body
+    assert response.headers.get('Content-Range') == expected_content_range
+    assert response.headers['Accept-Ranges'] == 'bytes'
+
+
+@pytest.mark.parametrize(
+    ('username', 'code', 'fixtures', 'file_id', 'expected_status'),
+    [
+        # строки нет в базе
+        (1001, 'qwerty', FIXTURES, 100, status.HTTP_404_NOT_FOUND),
+        # строка есть, а объекта в хранилище нет
+        (1001, 'qwerty', FIXTURES, 2, status.HTTP_404_NOT_FOUND),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture', '_stored_file')
+async def test_download_not_found(
+    client: AsyncClient,
+    access_token: str,
+    file_id: int,
+    expected_status: int,
+) -> None:
+    response = await client.get(
+        URLS['file']['download'].format(file_id=file_id),
+        headers={'Authorization': f'Bearer {access_token}'},
+    )
+
+    assert response.status_code == expected_status
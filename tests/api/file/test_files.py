@@ -0,0 +1,70 @@
+from typing import Any, Dict
+
+import pytest
+from httpx import AsyncClient
+from starlette import status
+
+from tests.api.file.const import BASE_DIR
+from tests.const import URLS
+
+FIXTURES_PATH = BASE_DIR / 'fixtures'
+FIXTURES = [
+    FIXTURES_PATH / 'sirius.user.json',
+    FIXTURES_PATH / 'sirius.file.json',
+]
+
+
+@pytest.mark.parametrize(
+    ('username', 'code', 'fixtures'),
+    [
+        (1001, 'qwerty', FIXTURES),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_files_cursor(
+    client: AsyncClient,
+    access_token: str,
+) -> None:
+    headers = {'Authorization': f'Bearer {access_token}'}
+
+    response = await client.get(URLS['file']['files'], params={'limit': 2}, headers=headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    page = response.json()
+    # от новых к старым
+    assert [item['id'] for item in page['items']] == [2, 1]
+    assert page['items'][0]['download_url'] == 'http://test.com/file/download/2'
+    assert page['next_cursor']
+
+    response = await client.get(
+        URLS['file']['files'], params={'limit': 2, 'cursor': page['next_cursor']}, headers=headers
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    page = response.json()
+    assert [item['id'] for item in page['items']] == [3]
+    assert page['next_cursor'] is None
+
+
+@pytest.mark.parametrize(
+    ('username', 'code', 'fixtures', 'params', 'expected_status'),
+    [
+        (1001, 'qwerty', FIXTURES, {'cursor': 'not-a-cursor'}, status.HTTP_400_BAD_REQUEST),
+        (1001, 'qwerty', FIXTURES, {'year': 2000}, status.HTTP_404_NOT_FOUND),
+        (1001, 'qwerty', FIXTURES, {'limit': 0}, status.HTTP_422_UNPROCESSABLE_ENTITY),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_files_errors(
+    client: AsyncClient,
+    access_token: str,
+    params: Dict[str, Any],
+    expected_status: int,
+) -> None:
+    response = await client.get(
+        URLS['file']['files'], params=params, headers={'Authorization': f'Bearer {access_token}'}
+    )
+
+    assert response.status_code == expected_status
@@ -0,0 +1,85 @@
+from typing import Any, Dict, List
+
+import pytest
+import msgpack
+from httpx import AsyncClient
+from starlette import status
+
+from tests.api.file.const import BASE_DIR
+from tests.const import URLS
+from tests.mocking.rabbit import TestExchange
+
+from webapp.cache.rabbit.key_builder import get_user_files_queue_key
+
+FIXTURES_PATH = BASE_DIR / 'fixtures'
+FIXTURES = [
+    FIXTURES_PATH / 'sirius.user.json',
+    FIXTURES_PATH / 'sirius.file.json',
+]
+
+
+@pytest.mark.parametrize(
+    ('fixtures', 'body', 'expected_published', 'expected_files'),
+    [
+        # id одного пользователя умещаются в одно сообщение (FEED_MESSAGE_BATCH)
+        (FIXTURES, {'user_ids': [1], 'per_user': 2}, 1, 2),
+        # прежний формат: массив id, per_user по умолчанию
+        (FIXTURES, [1], 1, 3),
+        # у пользователя без файлов публиковать нечего
+        (FIXTURES, {'user_ids': [2]}, 0, 0),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_fill_queue(
+    client: AsyncClient,
+    rabbit_exchange: TestExchange,
+    body: Any,
+    expected_published: int,
+    expected_files: int,
+) -> None:
+    response = await client.post(URLS['file']['fill_queue'], json=body)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {'status': 'success', 'published': expected_published, 'failed': 0}
+
+    file_ids: List[int] = []
+    for routing_key, message in rabbit_exchange.published:
+        assert routing_key == get_user_files_queue_key(1)
+        file_ids.extend(msgpack.unpackb(message)['file_ids'])
+    assert len(file_ids) == expected_files
+    assert set(file_ids) <= {1, 2, 3}
+
+
+@pytest.mark.parametrize(
+    ('fixtures', 'rabbit_exchange', 'body', 'expected_status', 'expected'),
+    [
+        (
+            FIXTURES,
+            TestExchange(fail_routing_keys=(get_user_files_queue_key(1),)),
+            {'user_ids': [1]},
+            status.HTTP_200_OK,
+            {'status': 'partial', 'published': 0, 'failed': 1},
+        ),
+        (
+            FIXTURES,
+            TestExchange(),
+            {'user_ids': [1], 'per_user': 0},
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            None,
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_fill_queue_errors(
+    client: AsyncClient,
+    body: Dict[str, Any],
+    expected_status: int,
+    expected: Dict[str, Any] | None,
+) -> None:
+    response = await client.post(URLS['file']['fill_queue'], json=body)
+
+    assert response.status_code == expected_status
+    if expected is not None:
+        assert response.json() == expected
@@ -0,0 +1,74 @@
+from typing import Any, Dict, List
+
+import pytest
+from httpx import AsyncClient
+from starlette import status
+
+from tests.api.file.const import BASE_DIR
+from tests.const import URLS
+
+FIXTURES_PATH = BASE_DIR / 'fixtures'
+FIXTURES = [
+    FIXTURES_PATH / 'sirius.user.json',
+    FIXTURES_PATH / 'sirius.file.json',
+]
+
+
+@pytest.mark.parametrize(
+    ('username', 'code', 'fixtures', 'params', 'expected'),
+    [
+        (1001, 'qwerty', FIXTURES, {}, [2023, 2024]),
+        (
+            1001,
+            'qwerty',
+            FIXTURES,
+            {'with_counts': True},
+            [{'value': 2023, 'count': 1}, {'value': 2024, 'count': 2}],
+        ),
+        (1001, 'qwerty', FIXTURES, {'year': 2024, 'with_counts': True}, [{'value': 3, 'count': 2}]),
+        (
+            1001,
+            'qwerty',
+            FIXTURES,
+            {'year': 2024, 'month': 3, 'with_counts': True},
+            [{'value': 1, 'count': 1}, {'value': 15, 'count': 1}],
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_filter(
+    client: AsyncClient,
+    access_token: str,
+    params: Dict[str, Any],
+    expected: List[Any],
+) -> None:
+    response = await client.get(
+        URLS['filter']['filter'], params=params, headers={'Authorization': f'Bearer {access_token}'}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == expected
+
+
+@pytest.mark.parametrize(
+    ('username', 'code', 'fixtures', 'params', 'expected_status'),
+    [
+        # месяц без года
+        (1001, 'qwerty', FIXTURES, {'month': 3, 'with_counts': True}, status.HTTP_400_BAD_REQUEST),
+        (1001, 'qwerty', FIXTURES, {'year': 2000, 'with_counts': True}, status.HTTP_404_NOT_FOUND),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_filter_errors(
+    client: AsyncClient,
+    access_token: str,
+    params: Dict[str, Any],
+    expected_status: int,
+) -> None:
+    response = await client.get(
+        URLS['filter']['filter'], params=params, headers={'Authorization': f'Bearer {access_token}'}
+    )
+
+    assert response.status_code == expected_status
@@ -1,19 +1,22 @@
-from typing import List
+from typing import Any, Dict, List
 
 import pytest
 from httpx import AsyncClient
+from starlette import status
 
 from tests.api.file.const import BASE_DIR, HEIGHT, MOCKED_HEX, WIDTH, value
 from tests.const import URLS
 
+from webapp.cache.redis.resize import RESIZE_DONE, RESIZE_FAILED, set_resize_status
+
 FIXTURES_PATH = BASE_DIR / 'fixtures'
 
 
 @pytest.mark.parametrize(
-    ('username', 'password', 'fixtures', 'mocked_hex', 'width', 'height', 'kafka_expected_messages'),
+    ('username', 'code', 'fixtures', 'mocked_hex', 'width', 'height', 'kafka_expected_messages'),
     [
         (
-                'test',
+                1001,
                 'qwerty',
                 [
                     FIXTURES_PATH / 'sirius.user.json',
@@ -29,8 +32,8 @@ FIXTURES_PATH = BASE_DIR / 'fixtures'
 @pytest.mark.usefixtures('_common_api_with_kafka_fixture')
 async def test_resize(
         client: AsyncClient,
-        username: str,
-        password: str,
+        username: int,
+        code: str,
         width: int,
         height: int,
         access_token: str,
@@ -49,4 +52,105 @@ async def test_resize(
         )
 
     assert response.status_code == 200
+    assert response.json()['task_id'] == MOCKED_HEX
+    # send_nowait ждет постановки в буфер продюсера: сообщение уже у продюсера, когда пришел ответ
     assert kafka_received_messages == kafka_expected_messages
+
+    # подтверждение доставки не пометило задачу failed
+    response = await client.get(
+        URLS['file']['resize_status'].format(task_id=MOCKED_HEX),
+        headers={'Authorization': f'Bearer {access_token}'},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        'task_id': MOCKED_HEX,
+        'status': 'pending',
+        'width': width,
+        'height': height,
+        'url': None,
+        'detail': None,
+    }
+
+
+@pytest.mark.parametrize(
+    ('username', 'code', 'fixtures', 'task', 'expected'),
+    [
+        (
+            1001,
+            'qwerty',
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+            ],
+            {'status': RESIZE_DONE, 'user_id': 1, 'bucket': 'resized', 'key': 'ab/cd.jpg'},
+            {'status': RESIZE_DONE, 'url': 'http://test.com/file/resize/task/result', 'detail': None},
+        ),
+        (
+            1001,
+            'qwerty',
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+            ],
+            {'status': RESIZE_FAILED, 'user_id': 1, 'detail': 'Очередь ресайза недоступна'},
+            {'status': RESIZE_FAILED, 'url': None, 'detail': 'Очередь ресайза недоступна'},
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_resize_status(
+    client: AsyncClient,
+    access_token: str,
+    task: Dict[str, Any],
+    expected: Dict[str, Any],
+) -> None:
+    await set_resize_status('task', ttl=60, width=WIDTH, height=HEIGHT, **task)
+
+    response = await client.get(
+        URLS['file']['resize_status'].format(task_id='task'),
+        headers={'Authorization': f'Bearer {access_token}'},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {'task_id': 'task', 'width': WIDTH, 'height': HEIGHT, **expected}
+
+
+@pytest.mark.parametrize(
+    ('username', 'code', 'fixtures', 'task_user_id'),
+    [
+        # задачи нет
+        (
+            1001,
+            'qwerty',
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+            ],
+            None,
+        ),
+        # чужая задача неотличима от несуществующей
+        (
+            1001,
+            'qwerty',
+            [
+                FIXTURES_PATH / 'sirius.user.json',
+            ],
+            2,
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_resize_status_not_found(
+    client: AsyncClient,
+    access_token: str,
+    task_user_id: int | None,
+) -> None:
+    if task_user_id is not None:
+        await set_resize_status('task', RESIZE_DONE, 60, user_id=task_user_id, bucket='resized', key='ab/cd.jpg')
+
+    response = await client.get(
+        URLS['file']['resize_status'].format(task_id='task'),
+        headers={'Authorization': f'Bearer {access_token}'},
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
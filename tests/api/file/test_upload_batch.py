@@ -0,0 +1,76 @@
+from typing import List
+
+import pytest
+from httpx import AsyncClient
+from starlette import status
+
+from tests.api.file.const import BASE_DIR
+from tests.const import URLS
+
+from conf.config import settings
+from webapp.storage.memory import InMemoryStorage
+
+FIXTURES_PATH = BASE_DIR / 'fixtures'
+FIXTURES = [
+    FIXTURES_PATH / 'sirius.user.json',
+]
+
+
+@pytest.mark.parametrize(
+    ('username', 'code', 'fixtures', 'contents', 'expected_status', 'expected_results', 'expected_objects'),
+    [
+        (
+            1001,
+            'qwerty',
+            FIXTURES,
+            [b'first photo', b'second photo', b'first photo'],
+            status.HTTP_201_CREATED,
+            # одинаковое содержимое в пакете передается в хранилище один раз
+            [('created', False), ('created', False), ('created', True)],
+            2,
+        ),
+        (
+            1001,
+            'qwerty',
+            FIXTURES,
+            [b'first photo', b''],
+            status.HTTP_201_CREATED,
+            [('created', False), ('failed', None)],
+            1,
+        ),
+        (
+            1001,
+            'qwerty',
+            FIXTURES,
+            [b'', b''],
+            status.HTTP_400_BAD_REQUEST,
+            [('failed', None), ('failed', None)],
+            0,
+        ),
+    ],
+)
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_common_api_fixture')
+async def test_upload_batch(
+    client: AsyncClient,
+    access_token: str,
+    memory_storage: InMemoryStorage,
+    contents: List[bytes],
+    expected_status: int,
+    expected_results: List[tuple],
+    expected_objects: int,
+) -> None:
+    response = await client.post(
+        URLS['file']['upload_batch'],
+        files=[('files', (f'note-{index}.txt', content, 'text/plain')) for index, content in enumerate(contents)],
+        headers={'Authorization': f'Bearer {access_token}'},
+    )
+
+    assert response.status_code == expected_status
+    results = response.json()['files']
+    assert [(result['status'], result.get('deduplicated')) for result in results] == expected_results
+    assert [result['file_name'] for result in results] == [f'note-{index}.txt' for index in range(len(contents))]
+    assert all(
+        result['file']['file_name'] == result['file_name'] for result in results if result['status'] == 'created'
+    )
+    assert len(memory_storage.buckets.get(settings.BLOB_BUCKET, {})) == expected_objects
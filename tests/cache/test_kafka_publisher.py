@@ -0,0 +1,92 @@
+import asyncio
+from collections import Counter
+from typing import List
+
+import pytest
+from prometheus_client import REGISTRY
+
+from tests.mocking.kafka import TestKafkaProducer
+
+from conf.config import settings
+from webapp.cache.kafka.publisher import send_nowait
+from webapp.db import kafka
+
+
+@pytest.fixture()
+def producer(monkeypatch: pytest.MonkeyPatch) -> TestKafkaProducer:
+    test_producer = TestKafkaProducer([])
+    monkeypatch.setattr(kafka, 'producer', test_producer, raising=False)
+    monkeypatch.setattr(kafka, 'partitions', [0, 1, 2], raising=False)
+    monkeypatch.setattr(settings, 'KAFKA_TOPIC', 'resize')
+    return test_producer
+
+
+def sample(name: str, topic: str) -> float:
+    return REGISTRY.get_sample_value(name, {'topic': topic}) or 0
+
+
+@pytest.mark.usefixtures('producer')
+def test_get_partition_by_key() -> None:
+    partitions = [kafka.get_partition(user_id) for user_id in range(1000)]
+
+    assert partitions == [kafka.get_partition(user_id) for user_id in range(1000)]
+    assert set(Counter(partitions)) == {0, 1, 2}
+    assert min(Counter(partitions).values()) > 250
+    assert kafka.get_partition() in {0, 1, 2}
+
+
+@pytest.mark.asyncio()
+async def test_send_nowait_partitions(producer: TestKafkaProducer) -> None:
+    await send_nowait('resize', b'a', partition_key=7)
+    await send_nowait('events', b'b', partition_key=7)
+
+    assert producer.kafka_received_messages == [
+        {'topic': 'resize', 'value': b'a', 'partition': kafka.get_partition(7)},
+        {'topic': 'events', 'value': b'b', 'partition': None},
+    ]
+
+
+@pytest.mark.asyncio()
+async def test_send_nowait_batch_metrics(producer: TestKafkaProducer) -> None:
+    count = sample('sirius_kafka_batch_messages_count', 'resize')
+    total = sample('sirius_kafka_batch_messages_sum', 'resize')
+
+    futures = [await send_nowait('resize', b'x', partition_key=1) for _ in range(3)]
+    await asyncio.gather(*futures)
+    await asyncio.sleep(0)
+
+    assert sample('sirius_kafka_batch_messages_count', 'resize') - count == 1
+    assert sample('sirius_kafka_batch_messages_sum', 'resize') - total == 3
+
+
+@pytest.mark.asyncio()
+async def test_send_nowait_delivery_error(producer: TestKafkaProducer) -> None:
+    producer.fail_delivery = True
+    errors: List[BaseException] = []
+    before = (
+        REGISTRY.get_sample_value('sirius_kafka_send_errors_total', {'topic': 'resize', 'error': 'RuntimeError'}) or 0
+    )
+
+    async def on_error(error: BaseException) -> None:
+        errors.append(error)
+
+    future = await send_nowait('resize', b'x', partition_key=1, on_error=on_error)
+    with pytest.raises(RuntimeError):
+        await future
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+    assert [str(error) for error in errors] == ['not acknowledged']
+    assert (
+        REGISTRY.get_sample_value('sirius_kafka_send_errors_total', {'topic': 'resize', 'error': 'RuntimeError'})
+        - before
+        == 1
+    )
+
+
+@pytest.mark.asyncio()
+async def test_send_nowait_enqueue_error(producer: TestKafkaProducer) -> None:
+    producer.fail_enqueue = True
+
+    with pytest.raises(RuntimeError):
+        await send_nowait('resize', b'x')
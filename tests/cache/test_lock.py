@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from tests.mocking.redis import TestRedis
+
+from webapp.cache.redis.lock import RedisLock
+from webapp.db import redis
+
+
+@pytest.fixture()
+def mocked_redis(monkeypatch: pytest.MonkeyPatch) -> TestRedis:
+    test_redis = TestRedis()
+    monkeypatch.setattr(redis, 'redis', test_redis, raising=False)
+    return test_redis
+
+
+@pytest.mark.asyncio()
+async def test_release_only_own_lock(mocked_redis: TestRedis) -> None:
+    first, second = RedisLock('lock', 5), RedisLock('lock', 5)
+
+    assert await first.acquire()
+    assert not await second.acquire()
+
+    await second.release()
+    assert 'lock' in mocked_redis.data
+
+    await first.release()
+    assert 'lock' not in mocked_redis.data
+    assert await second.acquire()
+
+
+@pytest.mark.asyncio()
+async def test_keep_alive(mocked_redis: TestRedis) -> None:
+    lock = RedisLock('lock', 0.03)
+    await lock.acquire()
+    keeper = asyncio.create_task(lock.keep_alive())
+
+    await asyncio.sleep(0.025)
+    assert mocked_redis.extended
+    assert not lock.lost
+
+    # блокировка истекла и досталась другому воркеру
+    mocked_redis.data['lock'] = b'other'
+    await asyncio.wait_for(keeper, 1)
+
+    assert lock.lost
+    await lock.release()
+    assert mocked_redis.data['lock'] == b'other'
@@ -0,0 +1,64 @@
+from typing import Any, Dict, List
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from tests.mocking.redis import TestRedis
+
+from webapp.cache.redis.presigned import get_presigned_urls
+from webapp.db import redis, storage
+from webapp.storage.memory import InMemoryStorage
+
+
+class SigningStorage(InMemoryStorage):
+    def __init__(self) -> None:
+        super().__init__()
+        self.signed: List[str] = []
+
+    async def presigned_get_url(self, bucket: str, name: str, *args: Any, **kwargs: Any) -> str:
+        self.signed.append(name)
+        return await super().presigned_get_url(bucket, name, *args, **kwargs)
+
+
+class BrokenRedis(TestRedis):
+    async def mget(self, *keys: str) -> List[bytes | None]:
+        raise ConnectionError('redis недоступен')
+
+    async def set(self, *args: Any, **kwargs: Any) -> bool:
+        raise ConnectionError('redis недоступен')
+
+
+FILES: List[Dict[str, Any]] = [
+    {'id': 1, 'user_id': 10, 'bucket': 'files', 'file_path': 'a/1.jpg', 'file_name': '1.jpg'},
+    {'id': 2, 'user_id': 10, 'bucket': 'files', 'file_path': 'a/2.jpg', 'file_name': '2.jpg'},
+]
+
+
+@pytest.fixture()
+def signing_storage(monkeypatch: pytest.MonkeyPatch) -> SigningStorage:
+    test_storage = SigningStorage()
+    monkeypatch.setattr(storage, 'storage', test_storage, raising=False)
+    return test_storage
+
+
+@pytest.mark.asyncio()
+async def test_miss_then_hit(monkeypatch: pytest.MonkeyPatch, signing_storage: SigningStorage) -> None:
+    monkeypatch.setattr(redis, 'redis', TestRedis(), raising=False)
+
+    first = await get_presigned_urls(FILES)
+    second = await get_presigned_urls(FILES)
+
+    assert set(first) == {1, 2}
+    assert second == first
+    assert signing_storage.signed == ['a/1.jpg', 'a/2.jpg']
+
+
+@pytest.mark.asyncio()
+async def test_redis_down(monkeypatch: pytest.MonkeyPatch, signing_storage: SigningStorage) -> None:
+    monkeypatch.setattr(redis, 'redis', BrokenRedis(), raising=False)
+
+    urls = await get_presigned_urls(FILES)
+
+    assert urls[1].startswith('memory://files/a/1.jpg?')
+    assert set(urls) == {1, 2}
+    assert signing_storage.signed == ['a/1.jpg', 'a/2.jpg']
@@ -0,0 +1,29 @@
+import pytest
+import msgpack
+
+from tests.mocking.rabbit import TestExchange
+
+from conf.config import settings
+from webapp.cache.rabbit.publisher import pack_file_ids, publish_batched
+
+
+def test_pack_file_ids(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'FEED_MESSAGE_BATCH', 2)
+
+    messages = [msgpack.unpackb(message) for message in pack_file_ids([1, 2, 3, 4, 5])]
+
+    assert messages == [{'file_ids': [1, 2]}, {'file_ids': [3, 4]}, {'file_ids': [5]}]
+
+
+@pytest.mark.asyncio()
+async def test_publish_batched(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'RABBIT_PUBLISH_WINDOW', 2)
+    exchange = TestExchange(fail_routing_keys=('user:2',))
+
+    published, failed = await publish_batched(
+        exchange,
+        [('user:1', b'a'), ('user:2', b'b'), ('user:1', b'c'), ('user:3', b'd'), ('user:1', b'e')],
+    )
+
+    assert (published, failed) == (4, 1)
+    assert exchange.published == [('user:1', b'a'), ('user:1', b'c'), ('user:3', b'd'), ('user:1', b'e')]
@@ -0,0 +1,120 @@
+import time
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List
+
+import pytest
+
+from tests.mocking.redis import TestRedis
+
+from conf.config import settings
+from webapp.cache.redis import cache
+from webapp.cache.redis.cache import cached, invalidate_user
+from webapp.crud.file import get_filtered_files
+from webapp.db import redis
+
+FILES = [
+    {
+        'id': 2,
+        'file_name': 'forest.jpg',
+        'upload_date': datetime(2024, 3, 15, 10, 0, 0, 123456),
+        'thumbnail_widths': None,
+    },
+    {'id': 1, 'file_name': 'sea.jpg', 'upload_date': datetime(2024, 3, 1, 10), 'thumbnail_widths': [320]},
+]
+
+
+class FilesResult:
+    def __init__(self, rows: List[Dict[str, Any]]) -> None:
+        self.rows = rows
+
+    def mappings(self) -> 'FilesResult':
+        return self
+
+    def all(self) -> List[Dict[str, Any]]:
+        return self.rows
+
+
+class FilesSession:
+    def __init__(self) -> None:
+        self.queries = 0
+
+    async def execute(self, query: Any) -> FilesResult:
+        self.queries += 1
+        return FilesResult(FILES)
+
+
+@pytest.fixture()
+def calls() -> List[int]:
+    return []
+
+
+@pytest.fixture()
+def mocked_redis(monkeypatch: pytest.MonkeyPatch) -> TestRedis:
+    test_redis = TestRedis()
+    monkeypatch.setattr(redis, 'redis', test_redis, raising=False)
+    monkeypatch.setattr(cache, 'LOCK_POLL_INTERVAL', 0.001)
+    return test_redis
+
+
+@pytest.mark.asyncio()
+async def test_hit_after_miss_and_invalidation(mocked_redis: TestRedis, calls: List[int]) -> None:
+    @cached('test')
+    async def load(session: object, user_id: int, year: int) -> List[int]:
+        calls.append(year)
+        return [year, len(calls)]
+
+    assert await load(object(), user_id=1, year=2024) == [2024, 1]
+    assert await load(object(), user_id=1, year=2024) == [2024, 1]
+    assert calls == [2024]
+
+    await invalidate_user(1)
+
+    assert await load(object(), user_id=1, year=2024) == [2024, 2]
+    assert calls == [2024, 2024]
+
+
+@pytest.mark.asyncio()
+async def test_single_flight(mocked_redis: TestRedis, calls: List[int]) -> None:
+    @cached('test')
+    async def load(session: object, user_id: int) -> int:
+        calls.append(user_id)
+        await asyncio.sleep(0.01)
+        return user_id
+
+    results = await asyncio.gather(*(load(object(), user_id=7) for _ in range(10)))
+
+    assert results == [7] * 10
+    assert calls == [7]
+
+
+@pytest.mark.asyncio()
+async def test_waiters_stop_when_loader_fails(
+    mocked_redis: TestRedis, calls: List[int], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, 'REDIS_CACHE_LOCK_TIMEOUT', 5.0)
+
+    @cached('test')
+    async def load(session: object, user_id: int) -> int:
+        calls.append(user_id)
+        await asyncio.sleep(0.01)
+        raise LookupError('nothing found')
+
+    started = time.monotonic()
+    results = await asyncio.gather(*(load(object(), user_id=7) for _ in range(5)), return_exceptions=True)
+
+    # соседи не ждут REDIS_CACHE_LOCK_TIMEOUT: блокировка снята без значения - загружают сами
+    assert time.monotonic() - started < 1
+    assert all(isinstance(result, LookupError) for result in results)
+    assert len(calls) == 5
+
+
+@pytest.mark.asyncio()
+async def test_files_hit_matches_miss(mocked_redis: TestRedis) -> None:
+    session = FilesSession()
+
+    miss = await get_filtered_files(session, user_id=1, limit=50)
+    hit = await get_filtered_files(session, user_id=1, limit=50)
+
+    assert session.queries == 1
+    assert miss == hit == (FILES, None)
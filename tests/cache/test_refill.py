@@ -0,0 +1,70 @@
+from typing import Dict, List, Sequence
+
+import pytest
+import msgpack
+
+from tests.mocking.rabbit import TestConnection, TestExchange
+
+from conf.config import settings
+from webapp.cache.rabbit import refill
+from webapp.cache.rabbit.refill import plan_refill, refill_users
+
+
+@pytest.mark.parametrize(
+    ('depths', 'expected'),
+    [
+        ({}, {}),
+        ({1: 0}, {1: 10}),
+        ({1: 2, 2: 3, 3: 8}, {1: 8}),
+        ({1: 3}, {}),
+    ],
+)
+def test_plan_refill(monkeypatch: pytest.MonkeyPatch, depths: Dict[int, int], expected: Dict[int, int]) -> None:
+    monkeypatch.setattr(settings, 'FEED_LOW_WATERMARK', 3)
+    monkeypatch.setattr(settings, 'FEED_HIGH_WATERMARK', 10)
+
+    assert plan_refill(depths) == expected
+
+
+@pytest.mark.asyncio()
+async def test_refill_users(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'FEED_LOW_WATERMARK', 2)
+    monkeypatch.setattr(settings, 'FEED_HIGH_WATERMARK', 3)
+    monkeypatch.setattr(settings, 'FEED_MESSAGE_BATCH', 2)
+    requested: List[int] = []
+
+    async def sample_user_files(session: None, user_ids: Sequence[int], per_user: int) -> Dict[int, List[int]]:
+        requested.append(per_user)
+        return {user_id: list(range(user_id * 100, user_id * 100 + per_user)) for user_id in user_ids}
+
+    monkeypatch.setattr(refill, 'sample_user_files', sample_user_files)
+    monkeypatch.setattr(refill, 'open_channel', lambda connection: connection.channel())
+    exchange = TestExchange()
+    connection = TestConnection({'user:1': 0, 'user:2': 1, 'user:3': 5})
+
+    # у пользователя 4 очереди нет: ее не создаем и ничего ему не публикуем
+    published = await refill_users(None, connection, exchange, [1, 4, 2, 3])
+
+    assert requested == [6]
+    assert published == 5
+    assert [(key, msgpack.unpackb(body)['file_ids']) for key, body in exchange.published] == [
+        ('user:1', [100, 101]),
+        ('user:1', [102, 103]),
+        ('user:1', [104, 105]),
+        ('user:2', [200, 201]),
+        ('user:2', [202, 203]),
+    ]
+
+
+@pytest.mark.asyncio()
+async def test_get_queue_depths(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'FEED_DEPTH_CHANNELS', 2)
+    monkeypatch.setattr(refill, 'open_channel', lambda connection: connection.channel())
+    connection = TestConnection({'user:1': 3, 'user:3': 0, 'user:5': 7})
+
+    depths = await refill.get_queue_depths(connection, [1, 2, 3, 4, 5])
+
+    assert depths == {1: 3, 3: 0, 5: 7}
+    # два канала на проход и по новому после каждой отсутствующей очереди; все закрыты
+    assert len(connection.channels) == 4
+    assert all(channel.is_closed for channel in connection.channels)
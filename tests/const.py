@@ -2,8 +2,20 @@ URLS = {
     'auth': {
         'login': '/auth/login',
         'info': '/auth/info',
+        'logout': '/auth/logout',
+        'logout_all': '/auth/logout_all',
     },
     'file': {
         'resize': '/file/resize',
+        'resize_status': '/file/resize/{task_id}',
+        'download': '/file/download/{file_id}',
+        'upload_batch': '/file/upload_batch',
+        'files': '/file/file/',
+        'fill_queue': '/file/fill_queue',
+        'blob': '/file/blob/{sha256}',
+        'upload_by_hash': '/file/upload_by_hash',
+    },
+    'filter': {
+        'filter': '/filter/',
     },
 }
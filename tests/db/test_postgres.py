@@ -0,0 +1,58 @@
+from unittest.mock import MagicMock
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import exc
+from sqlalchemy.util import greenlet_spawn
+
+from webapp.db.postgres import (
+    CONNECTION_DIRECT,
+    CONNECTION_PGBOUNCER,
+    InstrumentedQueuePool,
+    get_connect_args,
+    instrument_pool,
+)
+
+
+def sample(name: str, pool: str) -> float:
+    return REGISTRY.get_sample_value(name, {'pool': pool}) or 0
+
+
+def test_connect_args_direct() -> None:
+    args = get_connect_args(CONNECTION_DIRECT)
+
+    assert args['statement_cache_size'] > 0
+    assert args['prepared_statement_cache_size'] > 0
+
+
+def test_connect_args_pgbouncer() -> None:
+    args = get_connect_args(CONNECTION_PGBOUNCER)
+
+    assert args['statement_cache_size'] == 0
+    assert args['prepared_statement_cache_size'] == 0
+    assert args['prepared_statement_name_func']() != args['prepared_statement_name_func']()
+
+
+def test_connect_args_unknown_mode() -> None:
+    with pytest.raises(ValueError, match='Неизвестный режим подключения'):
+        get_connect_args('pooler')
+
+
+@pytest.mark.asyncio()
+async def test_pool_metrics() -> None:
+    pool = InstrumentedQueuePool(creator=MagicMock, pool_size=1, max_overflow=0, timeout=0.01)
+    instrument_pool(pool, 'test')
+    waits = sample('sirius_db_pool_checkout_wait_seconds_count', 'test')
+
+    connection = await greenlet_spawn(pool.connect)
+    assert sample('sirius_db_pool_checked_out', 'test') == 1
+    assert sample('sirius_db_connection_age_seconds_count', 'test') == 1
+
+    with pytest.raises(exc.TimeoutError):
+        await greenlet_spawn(pool.connect)
+    assert sample('sirius_db_pool_timeouts_total', 'test') == 1
+
+    await greenlet_spawn(connection.close)
+    assert sample('sirius_db_pool_checked_out', 'test') == 0
+    assert sample('sirius_db_pool_overflow', 'test') == 0
+    assert sample('sirius_db_pool_checkout_wait_seconds_count', 'test') == waits + 2
@@ -0,0 +1,86 @@
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from tests.mocking.redis import TestRedis
+
+from conf.config import settings
+from webapp.api.dependencies import get_read_session
+from webapp.cache.redis.cache import invalidate_user
+from webapp.db import postgres, redis
+
+
+class TestSessionMaker:
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    @asynccontextmanager
+    async def __call__(self) -> AsyncIterator[str]:
+        yield self.name
+
+
+class TestConnection:
+    def __init__(self, lag: float | None = None, error: Exception | None = None) -> None:
+        self.lag = lag
+        self.error = error
+
+    async def scalar(self, query: Any) -> float:
+        if self.error:
+            raise self.error
+        return self.lag
+
+
+class TestEngine:
+    def __init__(self, connection: TestConnection) -> None:
+        self.connection = connection
+
+    @asynccontextmanager
+    async def connect(self) -> AsyncIterator[TestConnection]:
+        yield self.connection
+
+
+@pytest.fixture()
+def _replica(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(redis, 'redis', TestRedis(), raising=False)
+    monkeypatch.setattr(settings, 'DB_REPLICA_URL', 'postgresql+asyncpg://replica/main_db')
+    monkeypatch.setattr(settings, 'DB_READ_YOUR_WRITES_TTL', 5)
+    monkeypatch.setattr(postgres, 'async_session', TestSessionMaker('primary'))
+    monkeypatch.setattr(postgres, 'replica_session', TestSessionMaker('replica'))
+    monkeypatch.setattr(postgres, 'replica_healthy', True)
+
+
+async def read_session(user_id: int) -> str:
+    async for session in get_read_session({'user_id': user_id}):
+        return session
+
+
+@pytest.mark.usefixtures('_replica')
+@pytest.mark.asyncio()
+async def test_read_your_writes() -> None:
+    assert await read_session(1) == 'replica'
+
+    await invalidate_user(1)
+
+    assert await read_session(1) == 'primary'
+    assert await read_session(2) == 'replica'
+
+
+@pytest.mark.parametrize(
+    ('connection', 'healthy', 'expected'),
+    [
+        (TestConnection(lag=0), True, 'replica'),
+        (TestConnection(lag=60), False, 'primary'),
+        (TestConnection(error=OperationalError('SELECT 1', {}, Exception('down'))), False, 'primary'),
+    ],
+)
+@pytest.mark.usefixtures('_replica')
+@pytest.mark.asyncio()
+async def test_replica_health(
+    monkeypatch: pytest.MonkeyPatch, connection: TestConnection, healthy: bool, expected: str
+) -> None:
+    monkeypatch.setattr(postgres, 'replica_engine', TestEngine(connection))
+
+    assert await postgres.check_replica() is healthy
+    assert await read_session(1) == expected
@@ -0,0 +1,43 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+
+from webapp.middleware.metrics import UNMATCHED_ROUTE, RequestMetricsMiddleware
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get('/file/{file_id}')
+    async def get_file(file_id: int) -> dict:
+        return {'file_id': file_id}
+
+    app.add_middleware(RequestMetricsMiddleware, router=app.router)
+    return app
+
+
+def count(method: str, route: str, status: str) -> float:
+    labels = {'method': method, 'route': route, 'status': status}
+    return REGISTRY.get_sample_value('sirius_request_duration_seconds_count', labels) or 0
+
+
+@pytest.mark.parametrize(
+    ('method', 'path', 'route', 'status'),
+    [
+        ('GET', '/file/1', '/file/{file_id}', '200'),
+        ('GET', '/file/abc', '/file/{file_id}', '422'),
+        ('POST', '/file/2', '/file/{file_id}', '405'),
+        ('GET', '/missing/3', UNMATCHED_ROUTE, '404'),
+    ],
+)
+@pytest.mark.asyncio()
+async def test_request_metrics_use_route_template(method: str, path: str, route: str, status: str) -> None:
+    before = count(method, route, status)
+
+    async with AsyncClient(app=make_app(), base_url='http://test') as client:
+        response = await client.request(method, path)
+
+    assert response.status_code == int(status)
+    assert count(method, route, status) == before + 1
+    assert REGISTRY.get_sample_value('sirius_requests_in_progress', {'method': method, 'route': route}) == 0
@@ -0,0 +1,159 @@
+import asyncio
+from typing import List, Sequence, Tuple
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+from redis.exceptions import ConnectionError
+
+from webapp.middleware.rate_limit import ConcurrencyLimitMiddleware, RateLimit, RateLimitMiddleware, parse_rate_limit
+from webapp.utils.auth.jwt import jwt_auth
+
+
+class TestLimiter:
+    def __init__(self, retry_after: float = 0, error: Exception | None = None, failed: int = 0) -> None:
+        self.calls: List[List[str]] = []
+        self.retry_after = retry_after
+        self.error = error
+        self.failed = failed
+
+    async def acquire(self, buckets: Sequence[Tuple[str, RateLimit]]) -> Tuple[float, int]:
+        self.calls.append([key for key, _ in buckets])
+        if self.error:
+            raise self.error
+        return self.retry_after, self.failed
+
+
+def make_app(limiter: TestLimiter, trusted_proxies: List[str] | None = None) -> FastAPI:
+    app = FastAPI()
+
+    @app.post('/file/upload')
+    async def upload() -> dict:
+        return {'status': 'ok'}
+
+    @app.get('/free')
+    async def free() -> dict:
+        return {'status': 'ok'}
+
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=limiter,
+        rules={'/file/upload': ['user:2/60', 'ip:5/60']},
+        trusted_proxies=trusted_proxies,
+    )
+    return app
+
+
+@pytest.mark.parametrize(
+    ('rule', 'expected'),
+    [
+        ('user:60/60', RateLimit('user', 60, 60.0)),
+        ('ip:5/0.5', RateLimit('ip', 5, 0.5)),
+    ],
+)
+def test_parse_rate_limit(rule: str, expected: RateLimit) -> None:
+    assert parse_rate_limit(rule) == expected
+
+
+@pytest.mark.parametrize('rule', ['host:1/1', 'user:1', 'user'])
+def test_parse_rate_limit_invalid(rule: str) -> None:
+    with pytest.raises(ValueError, match='Некорректное правило ограничения'):
+        parse_rate_limit(rule)
+
+
+@pytest.mark.asyncio()
+async def test_rate_limit_keys() -> None:
+    limiter = TestLimiter()
+    token = jwt_auth.create_token(42)
+
+    async with AsyncClient(app=make_app(limiter), base_url='http://test') as client:
+        assert (await client.post('/file/upload', headers={'Authorization': f'Bearer {token}'})).status_code == 200
+        assert (await client.post('/file/upload')).status_code == 200
+        assert (await client.get('/free')).status_code == 200
+
+    assert limiter.calls == [
+        ['sirius:rate_limit:/file/upload:user:42', 'sirius:rate_limit:/file/upload:ip:127.0.0.1'],
+        ['sirius:rate_limit:/file/upload:ip:127.0.0.1'],
+    ]
+
+
+@pytest.mark.parametrize(
+    ('trusted_proxies', 'headers', 'expected'),
+    [
+        ([], {'X-Forwarded-For': '1.2.3.4'}, '127.0.0.1'),
+        (['127.0.0.1'], {}, '127.0.0.1'),
+        (['127.0.0.1'], {'X-Forwarded-For': '1.2.3.4'}, '1.2.3.4'),
+        (['127.0.0.0/8', '10.0.0.0/8'], {'X-Forwarded-For': '5.6.7.8, 1.2.3.4, 10.0.0.2'}, '1.2.3.4'),
+        (['127.0.0.1', '10.0.0.0/8'], {'X-Forwarded-For': '10.0.0.1, 10.0.0.2'}, '10.0.0.1'),
+        (['127.0.0.1'], {'X-Forwarded-For': 'garbage'}, 'garbage'),
+    ],
+)
+@pytest.mark.asyncio()
+async def test_rate_limit_client_ip(trusted_proxies: List[str], headers: dict, expected: str) -> None:
+    # X-Forwarded-For учитывается только от доверенного прокси, подделанные адреса левее клиента отбрасываются
+    limiter = TestLimiter()
+
+    async with AsyncClient(app=make_app(limiter, trusted_proxies), base_url='http://test') as client:
+        assert (await client.post('/file/upload', headers=headers)).status_code == 200
+
+    assert limiter.calls == [[f'sirius:rate_limit:/file/upload:ip:{expected}']]
+
+
+@pytest.mark.asyncio()
+async def test_rate_limit_rejects() -> None:
+    async with AsyncClient(app=make_app(TestLimiter(retry_after=2.3)), base_url='http://test') as client:
+        response = await client.post('/file/upload')
+
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '3'
+
+
+@pytest.mark.parametrize(('failed', 'reason'), [(0, 'rate_limit_user'), (1, 'rate_limit_ip')])
+@pytest.mark.asyncio()
+async def test_rate_limit_reason(failed: int, reason: str) -> None:
+    # у авторизованного запроса есть обе корзины, причину определяет та, что отклонила запрос
+    labels = {'route': '/file/upload', 'reason': reason}
+    before = REGISTRY.get_sample_value('sirius_admission_rejected_total', labels) or 0
+    token = jwt_auth.create_token(42)
+
+    async with AsyncClient(app=make_app(TestLimiter(retry_after=1, failed=failed)), base_url='http://test') as client:
+        response = await client.post('/file/upload', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == 429
+    assert REGISTRY.get_sample_value('sirius_admission_rejected_total', labels) == before + 1
+
+
+@pytest.mark.asyncio()
+async def test_rate_limit_fails_open() -> None:
+    async with AsyncClient(app=make_app(TestLimiter(error=ConnectionError())), base_url='http://test') as client:
+        response = await client.post('/file/upload')
+
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio()
+async def test_concurrency_limit() -> None:
+    release = asyncio.Event()
+    app = FastAPI()
+
+    @app.get('/slow')
+    async def slow() -> dict:
+        await release.wait()
+        return {'status': 'ok'}
+
+    app.add_middleware(ConcurrencyLimitMiddleware, max_in_flight=2)
+
+    async with AsyncClient(app=app, base_url='http://test') as client:
+        in_flight = [asyncio.create_task(client.get('/slow')) for _ in range(2)]
+        await asyncio.sleep(0.05)
+
+        rejected = await client.get('/slow')
+        release.set()
+        responses = await asyncio.gather(*in_flight)
+        after = await client.get('/slow')
+
+    assert rejected.status_code == 503
+    assert rejected.headers['Retry-After'] == '1'
+    assert [response.status_code for response in responses] == [200, 200]
+    assert after.status_code == 200
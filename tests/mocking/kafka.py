@@ -1,11 +1,28 @@
+import asyncio
+from types import SimpleNamespace
 from typing import Any, Dict, List
 
 
 class TestKafkaProducer:
-    def __init__(self, kafka_received_messages: List[Dict[str, Any]]):
+    def __init__(
+        self,
+        kafka_received_messages: List[Dict[str, Any]],
+        fail_delivery: bool = False,
+        fail_enqueue: bool = False,
+    ):
         self.kafka_received_messages: List[Dict[str, Any]] = kafka_received_messages
+        self.fail_delivery = fail_delivery
+        self.fail_enqueue = fail_enqueue
+        self.offsets: Dict[int | None, int] = {}
 
     async def send_and_wait(self, topic, value=None, key=None, partition=None, timestamp_ms=None, headers=None):
+        return await (await self.send(topic, value, key, partition, timestamp_ms, headers))
+
+    async def send(self, topic, value=None, key=None, partition=None, timestamp_ms=None, headers=None):
+        # как у AIOKafkaProducer: возвращает фьючерс подтверждения, который разрешается позже
+        if self.fail_enqueue:
+            raise RuntimeError('producer buffer is full')
+
         self.kafka_received_messages.append(
             {
                 'topic': topic,
@@ -13,3 +30,21 @@ class TestKafkaProducer:
                 'partition': partition,
             }
         )
+
+        future = asyncio.get_running_loop().create_future()
+        if self.fail_delivery:
+            future.set_exception(RuntimeError('not acknowledged'))
+        else:
+            offset = self.offsets.get(partition, 0)
+            self.offsets[partition] = offset + 1
+            future.set_result(SimpleNamespace(topic=topic, partition=partition, offset=offset))
+        return future
+
+    async def partitions_for(self, topic):
+        return {0, 1, 2}
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+
+from aio_pika import Message
+from aio_pika.exceptions import ChannelNotFoundEntity
+
+
+class TestExchange:
+    def __init__(self, fail_routing_keys: Tuple[str, ...] = ()) -> None:
+        self.published: List[Tuple[str, bytes]] = []
+        self.fail_routing_keys = fail_routing_keys
+
+    async def publish(self, message: Message, routing_key: str, **kwargs: Any) -> None:
+        if routing_key in self.fail_routing_keys:
+            raise RuntimeError(f'nack for {routing_key}')
+        self.published.append((routing_key, message.body))
+
+
+class TestQueue:
+    def __init__(self, message_count: int) -> None:
+        self.declaration_result = SimpleNamespace(message_count=message_count)
+        self.bindings: List[Tuple[Any, str]] = []
+
+    async def bind(self, exchange: Any, routing_key: str, **kwargs: Any) -> None:
+        self.bindings.append((exchange, routing_key))
+
+
+class TestChannel:
+    def __init__(self, depths: Dict[str, int] | None = None) -> None:
+        self.depths = depths or {}
+        self.is_closed = False
+
+    async def declare_queue(self, name: str, passive: bool = False, **kwargs: Any) -> TestQueue:
+        if self.is_closed:
+            raise RuntimeError('channel is closed')
+        if passive and name not in self.depths:
+            # как брокер: passive-объявление несуществующей очереди закрывает канал
+            self.is_closed = True
+            raise ChannelNotFoundEntity(f'NOT_FOUND - no queue {name!r}')
+        return TestQueue(self.depths.get(name, 0))
+
+    async def close(self) -> None:
+        self.is_closed = True
+
+
+class TestConnection:
+    def __init__(self, depths: Dict[str, int] | None = None) -> None:
+        self.depths = depths or {}
+        self.channels: List[TestChannel] = []
+
+    async def channel(self, **kwargs: Any) -> TestChannel:
+        channel = TestChannel(self.depths)
+        self.channels.append(channel)
+        return channel
@@ -0,0 +1,141 @@
+import asyncio
+from typing import Any, AsyncGenerator, Callable, Dict, List
+
+from webapp.cache.redis.lock import EXTEND_LUA, RELEASE_LUA
+
+
+class TestRedis:
+    def __init__(self) -> None:
+        self.data: Dict[str, bytes] = {}
+        self.zsets: Dict[str, Dict[str, float]] = {}
+        self.published: List[Any] = []
+        self.extended: List[str] = []
+
+    async def ping(self) -> bool:
+        return True
+
+    async def get(self, key: str) -> bytes | None:
+        return self.data.get(key)
+
+    async def mget(self, *keys: str) -> List[bytes | None]:
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key: str, value: Any, ex: Any = None, px: Any = None, nx: bool = False) -> bool:
+        if nx and key in self.data:
+            return False
+        self.data[key] = _encode(value)
+        return True
+
+    async def exists(self, *keys: str) -> int:
+        return sum(key in self.data for key in keys)
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    async def incr(self, key: str) -> int:
+        value = int(self.data.get(key, b'0')) + 1
+        self.data[key] = str(value).encode()
+        return value
+
+    async def zadd(self, key: str, mapping: Dict[str, float]) -> int:
+        zset = self.zsets.setdefault(key, {})
+        added = sum(member not in zset for member in mapping)
+        zset.update(mapping)
+        return added
+
+    async def zremrangebyscore(self, key: str, minimum: Any, maximum: Any) -> int:
+        zset = self.zsets.get(key, {})
+        removed = [member for member, score in zset.items() if float(minimum) <= score <= float(maximum)]
+        for member in removed:
+            del zset[member]
+        return len(removed)
+
+    async def zrangebyscore(self, key: str, minimum: Any, maximum: Any, withscores: bool = False) -> List[Any]:
+        zset = self.zsets.get(key, {})
+        members = sorted(
+            (score, member) for member, score in zset.items() if float(minimum) <= score <= float(maximum)
+        )
+        return [(member.encode(), score) if withscores else member.encode() for score, member in members]
+
+    async def publish(self, channel: str, message: Any) -> int:
+        self.published.append((channel, message))
+        return 0
+
+    async def expire(self, key: str, seconds: Any) -> bool:
+        return key in self.data
+
+    def register_script(self, script: str) -> Callable[..., Any]:
+        # скрипты блокировок, повторенные на python: сравнить значение и удалить/продлить
+        def release(key: str, token: Any) -> int:
+            return int(self.data.get(key) == _encode(token) and self.data.pop(key) is not None)
+
+        def extend(key: str, token: Any, *args: Any) -> int:
+            if self.data.get(key) != _encode(token):
+                return 0
+            self.extended.append(key)
+            return 1
+
+        scripts = {RELEASE_LUA: release, EXTEND_LUA: extend}
+
+        async def run(keys: List[str], args: List[Any]) -> Any:
+            return scripts[script](*keys, *args)
+
+        return run
+
+    def pipeline(self, transaction: bool = True) -> 'TestPipeline':
+        return TestPipeline(self)
+
+    def pubsub(self) -> 'TestPubSub':
+        return TestPubSub(self)
+
+
+class TestPipeline:
+    def __init__(self, redis: TestRedis) -> None:
+        self.redis = redis
+        self.commands: List[Any] = []
+
+    async def __aenter__(self) -> 'TestPipeline':
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        self.commands.clear()
+
+    def __getattr__(self, name: str) -> Any:
+        def command(*args: Any, **kwargs: Any) -> 'TestPipeline':
+            self.commands.append(getattr(self.redis, name)(*args, **kwargs))
+            return self
+
+        return command
+
+    async def execute(self) -> List[Any]:
+        results = [await command for command in self.commands]
+        self.commands.clear()
+        return results
+
+
+class TestPubSub:
+    def __init__(self, redis: TestRedis) -> None:
+        self.redis = redis
+        self.channels: List[str] = []
+
+    async def __aenter__(self) -> 'TestPubSub':
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        self.channels.clear()
+
+    async def subscribe(self, *channels: str) -> None:
+        self.channels.extend(channels)
+
+    async def listen(self) -> AsyncGenerator[Dict[str, Any], None]:
+        # отдает опубликованное ранее в подписанные каналы, затем ждет, как подписка без новых сообщений
+        for channel in self.channels:
+            yield {'type': 'subscribe', 'channel': channel.encode(), 'data': 1}
+        for channel, message in self.redis.published:
+            if channel in self.channels:
+                yield {'type': 'message', 'channel': channel.encode(), 'data': _encode(message)}
+        await asyncio.Event().wait()
+
+
+def _encode(value: Any) -> bytes:
+    return value if isinstance(value, bytes) else str(value).encode()
@@ -0,0 +1,169 @@
+import io
+import hashlib
+from datetime import date
+from typing import Any, List, Sequence, Set
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from starlette.datastructures import Headers
+
+from conf.config import settings
+from webapp.crud import file
+from webapp.crud.file import UploadedObject, discard_upload, hash_blob, store_blobs
+from webapp.db import storage
+from webapp.schema.file.file import FileCreate
+from webapp.storage import layout
+from webapp.storage.base import StorageError
+from webapp.storage.memory import InMemoryStorage
+
+JPEG = b'\xff\xd8\xff\xe0' + b'photo' * 1000
+
+
+def make_upload(data: bytes, filename: str = 'photo.jpg') -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=filename, headers=Headers({'content-type': 'image/jpeg'}))
+
+
+@pytest.fixture()
+def memory_storage(monkeypatch: pytest.MonkeyPatch) -> InMemoryStorage:
+    memory = InMemoryStorage()
+    monkeypatch.setattr(storage, 'storage', memory, raising=False)
+    monkeypatch.setattr(layout, '_known_buckets', set())
+    monkeypatch.setattr(settings, 'MINIO_PART_SIZE', 1024)
+    return memory
+
+
+def make_file_data(uploaded: UploadedObject) -> FileCreate:
+    return FileCreate(
+        user_id=1,
+        file_name='photo.jpg',
+        file_path=uploaded.file_path,
+        bucket=uploaded.bucket,
+        file_type='image/jpeg',
+        file_size=uploaded.file_size,
+        upload_date=date.today(),
+        blob_sha256=uploaded.blob_sha256,
+    )
+
+
+class BlobRows:
+    # строки blob в базе: live - есть ссылки, released - ссылки пропали между проверкой и блокировкой
+    def __init__(self, memory_storage: InMemoryStorage) -> None:
+        self.memory_storage = memory_storage
+        self.live: Set[str] = set()
+        self.released: Set[str] = set()
+        self.locked: List[Set[str]] = []
+        self.stored_at_lock: List[int] = []
+
+    async def get_live_blobs(self, session: Any, hashes: Sequence[str]) -> Set[str]:
+        return set(hashes) & (self.live | self.released)
+
+    async def ensure_blobs(self, session: Any, files_data: Sequence[FileCreate]) -> Set[str]:
+        hashes = {file_data.blob_sha256 for file_data in files_data}
+        self.locked.append(hashes)
+        self.stored_at_lock.append(sum(map(len, self.memory_storage.buckets.values())))
+        return hashes - self.live
+
+
+@pytest.fixture()
+def blob_rows(monkeypatch: pytest.MonkeyPatch, memory_storage: InMemoryStorage) -> BlobRows:
+    rows = BlobRows(memory_storage)
+    monkeypatch.setattr(file, 'get_live_blobs', rows.get_live_blobs)
+    monkeypatch.setattr(file, 'ensure_blobs', rows.ensure_blobs)
+    return rows
+
+
+@pytest.mark.asyncio()
+async def test_hash_blob_does_not_store(memory_storage: InMemoryStorage) -> None:
+    sha256 = hashlib.sha256(JPEG).hexdigest()
+
+    uploaded = await hash_blob(make_upload(JPEG, 'a.jpg'))
+
+    assert uploaded.blob_sha256 == uploaded.checksum == sha256
+    assert uploaded.file_path == f'{sha256[:2]}/{sha256[2:4]}/{sha256}.jpg'
+    assert uploaded.file_size == len(JPEG)
+    assert not any(memory_storage.buckets.values())
+
+
+@pytest.mark.asyncio()
+async def test_store_blobs_deduplicates(memory_storage: InMemoryStorage, blob_rows: BlobRows) -> None:
+    uploads = [(make_upload(JPEG, name), await hash_blob(make_upload(JPEG, name))) for name in ('a.jpg', 'b.jpg')]
+
+    errors = await store_blobs(None, [make_file_data(uploaded) for _, uploaded in uploads], uploads)
+
+    assert errors == [None, None]
+    first, second = uploads[0][1], uploads[1][1]
+    assert (first.deduplicated, second.deduplicated) == (False, True)
+    assert await memory_storage.get_object(first.bucket, first.file_path) == JPEG
+    # байты переданы до блокировки строк blob
+    assert blob_rows.stored_at_lock == [1]
+
+
+@pytest.mark.asyncio()
+async def test_store_blobs_skips_existing(memory_storage: InMemoryStorage, blob_rows: BlobRows) -> None:
+    upload = make_upload(JPEG)
+    uploaded = await hash_blob(upload)
+    blob_rows.live.add(uploaded.blob_sha256)
+
+    errors = await store_blobs(None, [make_file_data(uploaded)], [(upload, uploaded)])
+
+    assert errors == [None]
+    assert uploaded.deduplicated
+    assert not any(memory_storage.buckets.values())
+
+
+@pytest.mark.asyncio()
+async def test_store_blobs_restores_released(memory_storage: InMemoryStorage, blob_rows: BlobRows) -> None:
+    # при проверке ссылки были, а к блокировке пропали и GC успел удалить объект: передаем под блокировкой
+    upload = make_upload(JPEG)
+    uploaded = await hash_blob(upload)
+    blob_rows.released.add(uploaded.blob_sha256)
+
+    errors = await store_blobs(None, [make_file_data(uploaded)], [(upload, uploaded)])
+
+    assert errors == [None]
+    assert not uploaded.deduplicated
+    assert blob_rows.stored_at_lock == [0]
+    assert await memory_storage.get_object(uploaded.bucket, uploaded.file_path) == JPEG
+
+
+@pytest.mark.asyncio()
+async def test_store_blobs_failure(
+    monkeypatch: pytest.MonkeyPatch, memory_storage: InMemoryStorage, blob_rows: BlobRows
+) -> None:
+    async def put_object(*args: Any, **kwargs: Any) -> None:
+        raise StorageError('minio is down')
+
+    monkeypatch.setattr(memory_storage, 'put_object', put_object)
+    uploads = [(make_upload(JPEG, name), await hash_blob(make_upload(JPEG, name))) for name in ('a.jpg', 'b.jpg')]
+
+    errors = await store_blobs(None, [make_file_data(uploaded) for _, uploaded in uploads], uploads)
+
+    # ошибка достается обоим файлам с этим содержимым, а строки blob для них не блокируются
+    assert [error.status_code for error in errors] == [400, 400]
+    assert blob_rows.locked == [set()]
+
+
+@pytest.mark.asyncio()
+async def test_hash_blob_same_name_differs(memory_storage: InMemoryStorage) -> None:
+    first = await hash_blob(make_upload(JPEG + b'1'))
+    second = await hash_blob(make_upload(JPEG + b'2'))
+
+    assert first.file_path != second.file_path
+
+
+@pytest.mark.asyncio()
+async def test_hash_blob_empty(memory_storage: InMemoryStorage) -> None:
+    with pytest.raises(HTTPException) as error:
+        await hash_blob(make_upload(b''))
+
+    assert error.value.status_code == 400
+
+
+@pytest.mark.asyncio()
+async def test_discard_upload(memory_storage: InMemoryStorage) -> None:
+    await memory_storage.make_bucket('user-1')
+    await memory_storage.put_object('user-1', 'photo.jpg', io.BytesIO(JPEG))
+
+    await discard_upload(UploadedObject(bucket='user-1', file_path='photo.jpg', file_size=len(JPEG), checksum=''))
+
+    assert not any(memory_storage.buckets.values())
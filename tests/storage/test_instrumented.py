@@ -0,0 +1,43 @@
+import io
+
+import pytest
+from prometheus_client import REGISTRY
+
+from webapp.db.postgres import _query_operation
+from webapp.storage.base import ObjectNotFoundError
+from webapp.storage.instrumented import InstrumentedStorage
+from webapp.storage.memory import InMemoryStorage
+
+
+def count(operation: str) -> float:
+    labels = {'operation': operation}
+    return REGISTRY.get_sample_value('integration_latency_backend_telegram_seconds_count', labels) or 0
+
+
+@pytest.mark.asyncio()
+async def test_instrumented_storage_observes_calls() -> None:
+    storage = InstrumentedStorage(InMemoryStorage())
+    put_before, stat_before = count('minio_put_object'), count('minio_stat_object')
+
+    await storage.make_bucket('files')
+    await storage.put_object('files', 'a.txt', io.BytesIO(b'data'))
+    assert await storage.get_object('files', 'a.txt') == b'data'
+    with pytest.raises(ObjectNotFoundError):
+        await storage.stat_object('files', 'missing.txt')
+
+    assert count('minio_put_object') == put_before + 1
+    assert count('minio_stat_object') == stat_before + 1
+
+
+@pytest.mark.parametrize(
+    ('statement', 'expected'),
+    [
+        ('SELECT 1', 'select'),
+        ('\n  insert into sirius.file values ($1)', 'insert'),
+        ('WITH t AS (SELECT 1) SELECT * FROM t', 'with'),
+        ('SAVEPOINT sa_savepoint_1', 'other'),
+        ('', 'other'),
+    ],
+)
+def test_query_operation(statement: str, expected: str) -> None:
+    assert _query_operation(statement) == expected
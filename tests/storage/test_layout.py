@@ -0,0 +1,57 @@
+import re
+from datetime import date
+
+import pytest
+
+from conf.config import settings
+from webapp.storage import layout
+from webapp.storage.layout import ObjectLocation, locate, new_location
+
+
+@pytest.mark.parametrize(
+    ('bucket', 'expected'),
+    [
+        (None, ObjectLocation('user-7', '2024-06-28/photo.jpg')),
+        ('sirius-files', ObjectLocation('sirius-files', '2024-06-28/photo.jpg')),
+    ],
+)
+def test_locate(bucket: str | None, expected: ObjectLocation) -> None:
+    assert locate(7, '2024-06-28/photo.jpg', bucket) == expected
+
+
+def test_new_location_per_user(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'STORAGE_LAYOUT', layout.LAYOUT_PER_USER)
+
+    assert new_location(7, 'photo.jpg', date(2024, 6, 28)) == ObjectLocation('user-7', '2024-06-28/photo.jpg')
+
+
+def test_new_location_sharded(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'STORAGE_LAYOUT', layout.LAYOUT_SHARDED)
+    monkeypatch.setattr(settings, 'STORAGE_SHARED_BUCKETS', ['files-0', 'files-1'])
+
+    location = new_location(7, 'Photo.JPG', date(2024, 6, 28), object_id='abc')
+
+    assert location.bucket in ('files-0', 'files-1')
+    assert re.fullmatch(r'[0-9a-f]{2}/[0-9a-f]{2}/7/2024-06-28/abc\.jpg', location.key)
+    assert new_location(7, 'Photo.JPG', date(2024, 6, 28), object_id='abc') == location
+
+
+@pytest.mark.parametrize(
+    ('head', 'expected'),
+    [
+        (b'\xff\xd8\xff\xe0\x00\x10JFIF', '.jpg'),
+        (b'\x89PNG\r\n\x1a\n\x00\x00', '.png'),
+        (b'RIFF\x24\x00\x00\x00WEBPVP8 ', '.webp'),
+        (b'GIF89a\x01\x00', '.gif'),
+        (b'plain text', ''),
+    ],
+)
+def test_content_extension(head: bytes, expected: str) -> None:
+    assert layout.content_extension(head) == expected
+
+
+def test_blob_location(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'BLOB_BUCKET', 'blobs')
+    sha256 = 'ab' * 32
+
+    assert layout.blob_location(sha256, '.jpg') == ObjectLocation('blobs', f'ab/ab/{sha256}.jpg')
@@ -0,0 +1,47 @@
+from io import BytesIO
+
+import pytest
+
+from webapp.storage.base import ObjectNotFoundError
+from webapp.storage.memory import InMemoryStorage
+
+BUCKET = 'user-1'
+CONTENT = b'0123456789' * 10
+
+
+@pytest.fixture()
+async def storage() -> InMemoryStorage:
+    storage = InMemoryStorage()
+    await storage.make_bucket(BUCKET)
+    await storage.put_object(BUCKET, 'photo.jpg', BytesIO(CONTENT), content_type='image/jpeg', part_size=7)
+    return storage
+
+
+@pytest.mark.parametrize(
+    ('offset', 'length', 'expected'),
+    [
+        (0, None, CONTENT),
+        (10, 5, CONTENT[10:15]),
+        (95, 100, CONTENT[95:]),
+    ],
+)
+@pytest.mark.asyncio()
+async def test_get_object_stream(storage: InMemoryStorage, offset: int, length: int | None, expected: bytes) -> None:
+    stream = await storage.get_object_stream(BUCKET, 'photo.jpg', offset=offset, length=length, chunk_size=3)
+
+    assert b''.join([chunk async for chunk in stream]) == expected
+
+
+@pytest.mark.asyncio()
+async def test_stat_object(storage: InMemoryStorage) -> None:
+    info = await storage.stat_object(BUCKET, 'photo.jpg')
+
+    assert info.size == len(CONTENT)
+    assert info.content_type == 'image/jpeg'
+
+
+@pytest.mark.parametrize(('bucket', 'name'), [(BUCKET, 'missing.jpg'), ('user-2', 'photo.jpg')])
+@pytest.mark.asyncio()
+async def test_missing_object(storage: InMemoryStorage, bucket: str, name: str) -> None:
+    with pytest.raises(ObjectNotFoundError):
+        await storage.stat_object(bucket, name)
@@ -0,0 +1,135 @@
+import time
+import asyncio
+from contextlib import suppress
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from tests.mocking.redis import TestRedis
+
+from webapp.cache.redis.key_builder import get_revocations_channel
+from webapp.db import redis
+from webapp.utils.auth.cache import TokenCache
+from webapp.utils.auth.jwt import JwtAuth
+from webapp.utils.auth.revocation import RevocationList, listen_revocations, revocations, revoke_token, revoke_user
+
+SECRET = 'secret'
+
+
+@pytest.fixture(autouse=True)
+def _clean_revocations(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(redis, 'redis', TestRedis(), raising=False)
+    revocations.clear()
+    yield
+    revocations.clear()
+
+
+def test_token_cache_lru() -> None:
+    cache = TokenCache(maxsize=2)
+    exp = time.time() + 60
+
+    cache.put('a', {'exp': exp})
+    cache.put('b', {'exp': exp})
+    assert cache.get('a') == {'exp': exp}
+    cache.put('c', {'exp': exp})
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.get('c') is not None
+
+
+def test_token_cache_expired() -> None:
+    cache = TokenCache(maxsize=2)
+    cache.put('a', {'exp': time.time() - 1})
+
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_decode_token_uses_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    auth = JwtAuth(SECRET)
+    token = auth.create_token(1)
+    calls = []
+    decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args)
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(jwt, 'decode', counting_decode)
+
+    assert auth.decode_token(token)['user_id'] == 1
+    assert auth.decode_token(token)['user_id'] == 1
+    assert len(calls) == 1
+
+
+def test_decode_token_invalid() -> None:
+    with pytest.raises(HTTPException) as error:
+        JwtAuth(SECRET).decode_token(JwtAuth('other').create_token(1))
+
+    assert error.value.status_code == 403
+
+
+@pytest.mark.asyncio()
+async def test_revoke_token() -> None:
+    auth = JwtAuth(SECRET)
+    token, other = auth.create_token(1), auth.create_token(1)
+    claims = auth.decode_token(token)
+
+    await revoke_token(claims)
+
+    with pytest.raises(HTTPException):
+        auth.decode_token(token)
+    assert auth.decode_token(other)['user_id'] == 1
+
+
+@pytest.mark.asyncio()
+async def test_revoke_user() -> None:
+    auth = JwtAuth(SECRET)
+    token = auth.create_token(1)
+    auth.decode_token(token)
+
+    await revoke_user(1)
+
+    with pytest.raises(HTTPException):
+        auth.decode_token(token)
+    assert auth.decode_token(auth.create_token(2))['user_id'] == 2
+
+
+@pytest.mark.parametrize(
+    ('message', 'claims', 'expected'),
+    [
+        ('token:abc:4102444800', {'uid': 'abc', 'user_id': 1, 'exp': 4102444800}, True),
+        ('token:abc:4102444800', {'uid': 'def', 'user_id': 1, 'exp': 4102444800}, False),
+        ('user:1:1000', {'uid': 'abc', 'user_id': 1, 'iat': 999, 'exp': 4102444800}, True),
+        ('user:1:1000', {'uid': 'abc', 'user_id': 1, 'iat': 1001, 'exp': 4102444800}, False),
+        ('user:2:1000', {'uid': 'abc', 'user_id': 1, 'iat': 999, 'exp': 4102444800}, False),
+    ],
+)
+def test_revocation_list_apply(message: str, claims: dict, expected: bool) -> None:
+    revocation_list = RevocationList()
+    revocation_list.apply(message)
+
+    assert revocation_list.is_revoked(claims) is expected
+
+
+@pytest.mark.asyncio()
+async def test_listen_revocations_skips_malformed() -> None:
+    await redis.redis.publish(get_revocations_channel(), 'garbage')
+    await redis.redis.publish(get_revocations_channel(), 'token:abc:4102444800')
+
+    task = asyncio.create_task(listen_revocations())
+    try:
+        for _ in range(100):
+            if revocations.tokens:
+                break
+            await asyncio.sleep(0.01)
+
+        assert not task.done()
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError, ValueError):
+            await task
+
+    assert revocations.tokens == {'abc': 4102444800}
@@ -0,0 +1,17 @@
+from datetime import datetime
+
+import pytest
+
+from webapp.utils.cursor import decode_cursor, encode_cursor
+
+
+def test_cursor_roundtrip() -> None:
+    upload_date = datetime(2024, 6, 27, 23, 44, 33, 99000)
+
+    assert decode_cursor(encode_cursor(upload_date, 42)) == (upload_date, 42)
+
+
+@pytest.mark.parametrize('cursor', ['', 'not-a-cursor', 'WzFd', 'WyJ4IiwxXQ'])
+def test_decode_invalid_cursor(cursor: str) -> None:
+    with pytest.raises(ValueError, match='invalid cursor'):
+        decode_cursor(cursor)
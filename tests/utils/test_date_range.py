@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from webapp.utils.date_range import calendar_range, upload_date_range
+
+
+@pytest.mark.parametrize(
+    ('year', 'month', 'day', 'expected'),
+    [
+        (None, None, None, (None, None)),
+        (2024, None, None, (datetime(2024, 1, 1), datetime(2025, 1, 1))),
+        (2024, 2, None, (datetime(2024, 2, 1), datetime(2024, 3, 1))),
+        (2024, 12, None, (datetime(2024, 12, 1), datetime(2025, 1, 1))),
+        (2024, 2, 29, (datetime(2024, 2, 29), datetime(2024, 3, 1))),
+        (2024, 12, 31, (datetime(2024, 12, 31), datetime(2025, 1, 1))),
+    ],
+)
+def test_calendar_range(year: int | None, month: int | None, day: int | None, expected: tuple) -> None:
+    assert calendar_range(year, month, day) == expected
+
+
+@pytest.mark.parametrize(
+    ('year', 'month', 'day', 'error'),
+    [
+        (None, 6, None, 'require year'),
+        (None, None, 1, 'require year'),
+        (2024, None, 1, 'requires month'),
+        (2024, 13, None, 'month must be'),
+        (2023, 2, 29, 'day is out of range'),
+    ],
+)
+def test_calendar_range_invalid(year: int | None, month: int | None, day: int | None, error: str) -> None:
+    with pytest.raises(ValueError, match=error):
+        calendar_range(year, month, day)
+
+
+@pytest.mark.parametrize(
+    ('kwargs', 'expected'),
+    [
+        ({'date_from': datetime(2024, 6, 10)}, (datetime(2024, 6, 10), None)),
+        (
+            {'year': 2024, 'month': 6, 'date_from': datetime(2024, 6, 10), 'date_to': datetime(2024, 8, 1)},
+            (datetime(2024, 6, 10), datetime(2024, 7, 1)),
+        ),
+        (
+            {'date_from': datetime(2024, 6, 10, 3, tzinfo=timezone.utc)},
+            (datetime(2024, 6, 10, 3), None),
+        ),
+    ],
+)
+def test_upload_date_range(kwargs: dict, expected: tuple) -> None:
+    assert upload_date_range(**kwargs) == expected
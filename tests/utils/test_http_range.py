@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from webapp.utils.http_range import ByteRange, RangeNotSatisfiableError, if_range_matches, parse_range
+
+SIZE = 1000
+ETAG = '"0123456789abcdef"'
+LAST_MODIFIED = datetime(2024, 6, 28, 9, 36, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    ('header', 'expected'),
+    [
+        (None, None),
+        ('bytes=0-99', ByteRange(0, 99)),
+        ('bytes=500-', ByteRange(500, 999)),
+        ('bytes=-100', ByteRange(900, 999)),
+        ('bytes=-5000', ByteRange(0, 999)),
+        ('bytes=900-5000', ByteRange(900, 999)),
+        ('bytes=0-1,5-6', None),
+        ('items=0-1', None),
+        ('bytes=abc', None),
+        ('bytes=10-5', None),
+    ],
+)
+def test_parse_range(header: str | None, expected: ByteRange | None) -> None:
+    assert parse_range(header, SIZE) == expected
+
+
+@pytest.mark.parametrize('header', ['bytes=1000-', 'bytes=-0'])
+def test_parse_range_not_satisfiable(header: str) -> None:
+    with pytest.raises(RangeNotSatisfiableError):
+        parse_range(header, SIZE)
+
+
+@pytest.mark.parametrize(
+    ('header', 'expected'),
+    [
+        (None, True),
+        (ETAG, True),
+        ('"other"', False),
+        (f'W/{ETAG}', False),
+        ('Fri, 28 Jun 2024 09:36:00 GMT', True),
+        ('Fri, 28 Jun 2024 09:37:00 GMT', False),
+    ],
+)
+def test_if_range_matches(header: str | None, expected: bool) -> None:
+    assert if_range_matches(header, ETAG, LAST_MODIFIED) is expected
@@ -0,0 +1,85 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from benchmarks.load.runner import Recorder, percentile, run_open_loop
+from benchmarks.load.scenarios import token_user_id
+
+
+@pytest.mark.parametrize(
+    ('rank', 'expected'),
+    [
+        (50, 50.0),
+        (95, 95.0),
+        (99, 99.0),
+        (100, 100.0),
+    ],
+)
+def test_percentile(rank: float, expected: float) -> None:
+    values = [index / 1000 for index in range(1, 101)]
+
+    assert percentile(values, rank) == expected
+
+
+def test_percentile_empty() -> None:
+    assert percentile([], 99) is None
+
+
+def test_recorder_report() -> None:
+    recorder = Recorder()
+    recorder.record('GET /filter/', 0, 200)
+    recorder.record('GET /filter/', 0, 500)
+    recorder.record('GET /file/file/', 0, None)
+    recorder.record_action('action:calendar', 0, False)
+
+    report = recorder.report(duration=2)
+
+    assert report['totals']['count'] == 3
+    assert report['totals']['errors'] == 2
+    assert report['routes']['GET /filter/']['statuses'] == {'200': 1, '500': 1}
+    assert report['routes']['GET /filter/']['throughput_rps'] == 1
+    assert report['routes']['GET /file/file/']['statuses'] == {'exception': 1}
+    assert report['actions']['action:calendar']['error_rate'] == 1
+
+
+@pytest.mark.asyncio()
+async def test_run_open_loop_latency_from_schedule() -> None:
+    # ответ дольше интервала между запросами: открытый цикл не ждет, задержка не меньше времени ответа
+    calls: List[float] = []
+
+    async def slow(scheduled: float) -> bool:
+        calls.append(scheduled)
+        await asyncio.sleep(0.05)
+        return True
+
+    recorder = Recorder()
+    await run_open_loop(
+        {'slow': slow}, {'slow': 1}, rps=100, duration=0.2, recorder=recorder, max_outstanding=100, poisson=False
+    )
+
+    stats = recorder.actions['action:slow']
+    assert len(calls) == recorder.started == 19
+    assert recorder.skipped == 0
+    assert min(stats.latencies) >= 0.05
+
+
+@pytest.mark.asyncio()
+async def test_run_open_loop_skips_over_max_outstanding() -> None:
+    async def hang(scheduled: float) -> bool:
+        await asyncio.sleep(0.3)
+        return True
+
+    recorder = Recorder()
+    await run_open_loop(
+        {'hang': hang}, {'hang': 1}, rps=100, duration=0.1, recorder=recorder, max_outstanding=2, poisson=False
+    )
+
+    assert recorder.started == 2
+    assert recorder.skipped == 7
+
+
+def test_token_user_id() -> None:
+    token = 'e30.eyJ1c2VyX2lkIjogNDJ9.sig'
+
+    assert token_user_id(token) == 42
@@ -0,0 +1,104 @@
+import queue
+import logging
+from logging.handlers import QueueListener
+from typing import List
+
+import orjson
+import pytest
+from prometheus_client import REGISTRY
+
+from webapp.logger import (
+    CorrelationIdFilter,
+    JsonFormatter,
+    NonBlockingQueueHandler,
+    SamplingFilter,
+    correlation_id_ctx,
+)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.lines: List[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.lines.append(self.format(record))
+
+
+def make_logger(handler: logging.Handler) -> logging.Logger:
+    test_logger = logging.getLogger('tests.logger')
+    test_logger.handlers = [handler]
+    test_logger.propagate = False
+    test_logger.setLevel(logging.DEBUG)
+    return test_logger
+
+
+def test_queue_pipeline_formats_in_listener() -> None:
+    log_queue: queue.Queue = queue.Queue()
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(CorrelationIdFilter())
+    output = ListHandler()
+    output.setFormatter(JsonFormatter())
+    test_logger = make_logger(handler)
+
+    token = correlation_id_ctx.set('abc123')
+    try:
+        test_logger.info('Файл %s загружен', 42)
+    finally:
+        correlation_id_ctx.reset(token)
+
+    record = log_queue.queue[0]
+    assert record.msg == 'Файл %s загружен'
+    assert record.args == (42,)
+
+    listener = QueueListener(log_queue, output)
+    listener.start()
+    listener.stop()
+
+    line = orjson.loads(output.lines[0])
+    assert line['message'] == 'Файл 42 загружен'
+    assert line['level'] == 'INFO'
+    assert line['correlation_id'] == 'abc123'
+
+
+def test_json_formatter_exception() -> None:
+    output = ListHandler()
+    output.setFormatter(JsonFormatter())
+    test_logger = make_logger(output)
+
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        test_logger.exception('Ошибка %s', 'upload')
+
+    line = orjson.loads(output.lines[0])
+    assert line['message'] == 'Ошибка upload'
+    assert line['correlation_id'] is None
+    assert 'ValueError: boom' in line['exc_info']
+
+
+def test_queue_full_drops_record() -> None:
+    handler = NonBlockingQueueHandler(queue.Queue(1))
+    test_logger = make_logger(handler)
+    before = REGISTRY.get_sample_value('sirius_log_records_dropped_total') or 0
+
+    test_logger.info('first')
+    test_logger.info('second')
+
+    assert handler.queue.qsize() == 1
+    assert REGISTRY.get_sample_value('sirius_log_records_dropped_total') == before + 1
+
+
+@pytest.mark.parametrize(
+    ('rates', 'level', 'passed'),
+    [
+        ({'DEBUG': 0}, logging.DEBUG, 0),
+        ({'DEBUG': 1}, logging.DEBUG, 100),
+        ({'debug': 0}, logging.INFO, 100),
+    ],
+)
+def test_sampling_filter(rates: dict, level: int, passed: int) -> None:
+    sampling = SamplingFilter(rates)
+    records = [logging.LogRecord('test', level, __file__, 1, 'message', None, None) for _ in range(100)]
+
+    assert sum(sampling.filter(record) for record in records) == passed
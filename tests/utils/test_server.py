@@ -0,0 +1,54 @@
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from tests.mocking.redis import TestRedis
+
+from conf.config import settings
+from webapp.db import postgres, redis, storage
+from webapp.on_startup import warmup
+from webapp.server import SiriusWorker, get_options, prepare_metrics_dir
+from webapp.storage.memory import InMemoryStorage
+
+
+def test_prepare_metrics_dir(tmp_path: Path) -> None:
+    metrics_dir = tmp_path / 'metrics'
+    metrics_dir.mkdir()
+    (metrics_dir / 'counter_123.db').write_bytes(b'stale')
+
+    prepare_metrics_dir(str(metrics_dir))
+
+    assert metrics_dir.is_dir()
+    assert list(metrics_dir.iterdir()) == []
+
+
+def test_get_options(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'SERVER_WORKERS', 3)
+
+    options = get_options()
+
+    assert options['workers'] == 3
+    assert options['worker_class'] == 'webapp.server.SiriusWorker'
+    assert options['max_requests'] == settings.SERVER_MAX_REQUESTS
+    assert options['preload_app'] is False
+    assert SiriusWorker.CONFIG_KWARGS['loop'] == 'uvloop'
+    assert SiriusWorker.CONFIG_KWARGS['http'] == 'httptools'
+
+
+@pytest.mark.asyncio()
+async def test_warm_up_survives_failures(monkeypatch: pytest.MonkeyPatch) -> None:
+    filled: List[int] = []
+
+    async def fill_pool(engine: object, size: int) -> None:
+        filled.append(size)
+        raise ConnectionRefusedError('db is down')
+
+    monkeypatch.setattr(warmup, 'fill_pool', fill_pool)
+    monkeypatch.setattr(postgres, 'replica_engine', None)
+    monkeypatch.setattr(redis, 'redis', TestRedis(), raising=False)
+    monkeypatch.setattr(storage, 'storage', InMemoryStorage(), raising=False)
+
+    await warmup.warm_up()
+
+    assert filled == [settings.DB_POOL_SIZE]
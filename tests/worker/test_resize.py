@@ -0,0 +1,109 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from PIL import Image
+
+from tests.mocking.redis import TestRedis
+
+from webapp.cache.redis.resize import (
+    RESIZE_DONE,
+    RESIZE_FAILED,
+    RESIZE_PENDING,
+    claim_resize_task,
+    get_resize_status,
+    get_user_resize_status,
+    set_resize_status,
+)
+from webapp.db import redis, storage
+from webapp.storage.memory import InMemoryStorage
+from webapp.worker.pool import create_process_pool
+from webapp.worker.resize import handle_task, resize_image
+
+
+def make_image(image_format: str, size: tuple = (64, 32), mode: str = 'RGB') -> bytes:
+    output = io.BytesIO()
+    Image.new(mode, size).save(output, format=image_format)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize(
+    ('image_format', 'mode', 'expected_content_type'),
+    [
+        ('PNG', 'RGBA', 'image/png'),
+        ('JPEG', 'RGB', 'image/jpeg'),
+        ('BMP', 'RGB', 'image/png'),
+    ],
+)
+def test_resize_image(image_format: str, mode: str, expected_content_type: str) -> None:
+    data, content_type = resize_image(make_image(image_format, mode=mode), 16, 8)
+
+    assert content_type == expected_content_type
+    with Image.open(io.BytesIO(data)) as result:
+        assert result.size == (16, 8)
+
+
+@pytest.fixture()
+def _stores(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(redis, 'redis', TestRedis(), raising=False)
+    monkeypatch.setattr(storage, 'storage', InMemoryStorage(), raising=False)
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_stores')
+async def test_claim_resize_task_deduplicates() -> None:
+    assert await claim_resize_task(1, 'digest', 16, 8, 'first') is None
+    assert await claim_resize_task(1, 'digest', 16, 8, 'second') == 'first'
+    assert await claim_resize_task(1, 'digest', 8, 16, 'third') is None
+    assert await claim_resize_task(2, 'digest', 16, 8, 'fourth') is None
+    assert await get_resize_status('second') is None
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_stores')
+async def test_claim_resize_task_replaces_failed() -> None:
+    assert await claim_resize_task(1, 'digest', 16, 8, 'first') is None
+    await set_resize_status('first', RESIZE_FAILED, 60, user_id=1)
+
+    assert await claim_resize_task(1, 'digest', 16, 8, 'second') is None
+    assert await claim_resize_task(1, 'digest', 16, 8, 'third') == 'second'
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_stores')
+async def test_user_resize_status_hides_other_users() -> None:
+    await claim_resize_task(1, 'digest', 16, 8, 'first')
+
+    assert (await get_user_resize_status('first', 1))['status'] == RESIZE_PENDING
+    assert await get_user_resize_status('first', 2) is None
+
+
+@pytest.mark.asyncio()
+@pytest.mark.usefixtures('_stores')
+async def test_handle_task_computes_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+
+    def counting_resize(image: bytes, width: int, height: int) -> tuple:
+        calls.append((width, height))
+        return resize_image(image, width, height)
+
+    monkeypatch.setattr('webapp.worker.resize.resize_image', counting_resize)
+    image = make_image('PNG')
+
+    with ThreadPoolExecutor(1) as pool:
+        await handle_task(pool, {'image': image, 'task_id': 'first', 'user_id': 1, 'width': 16, 'height': 8})
+        await handle_task(pool, {'image': image, 'task_id': 'second', 'user_id': 2, 'width': 16, 'height': 8})
+
+    first, second = await get_resize_status('first'), await get_resize_status('second')
+    assert calls == [(16, 8)]
+    assert first['status'] == second['status'] == RESIZE_DONE
+    assert first['key'] == second['key']
+    assert (first['user_id'], second['user_id']) == (1, 2)
+
+
+def test_process_pool_does_not_fork() -> None:
+    with create_process_pool(1) as pool:
+        assert pool._mp_context.get_start_method() == 'forkserver'
+        data, content_type = pool.submit(resize_image, make_image('PNG'), 16, 8).result(timeout=60)
+
+    assert content_type == 'image/png'
@@ -0,0 +1,59 @@
+import io
+from typing import List
+
+import pytest
+from PIL import Image
+
+from conf.config import settings
+from webapp.storage.layout import ObjectLocation, derivative_location
+from webapp.worker.thumbnails import is_thumbnail_source, make_thumbnails
+
+
+def make_image(image_format: str, size: tuple, mode: str = 'RGB') -> bytes:
+    output = io.BytesIO()
+    Image.new(mode, size).save(output, format=image_format)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize(
+    ('image_format', 'size', 'mode', 'expected'),
+    [
+        ('JPEG', (2000, 1000), 'RGB', [(512, 256), (128, 64)]),
+        ('PNG', (600, 600), 'RGBA', [(512, 512), (128, 128)]),
+        ('PNG', (300, 100), 'P', [(128, 43)]),
+        ('PNG', (100, 100), 'RGB', []),
+    ],
+)
+def test_make_thumbnails(image_format: str, size: tuple, mode: str, expected: List[tuple]) -> None:
+    thumbnails = make_thumbnails(make_image(image_format, size, mode), [128, 512, 2000], 'WEBP', 80)
+
+    assert [(width, height) for width, height, _ in thumbnails] == expected
+    for width, height, data in thumbnails:
+        with Image.open(io.BytesIO(data)) as thumbnail:
+            assert thumbnail.format == 'WEBP'
+            assert thumbnail.size == (width, height)
+
+
+@pytest.mark.parametrize(
+    ('file_type', 'file_size', 'expected'),
+    [
+        ('image/jpeg', 1024, True),
+        ('application/pdf', 1024, False),
+        (None, 1024, False),
+        ('image/png', 10**12, False),
+    ],
+)
+def test_is_thumbnail_source(file_type: str | None, file_size: int, expected: bool) -> None:
+    assert is_thumbnail_source(file_type, file_size) is expected
+
+
+def test_is_thumbnail_source_disabled(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'THUMBNAIL_ENABLED', False)
+
+    assert not is_thumbnail_source('image/jpeg', 1024)
+
+
+def test_derivative_location() -> None:
+    original = ObjectLocation(bucket='user-1', key='2024-01-01/cat.jpg')
+
+    assert derivative_location(original, 128, 'webp') == ObjectLocation('user-1', '2024-01-01/cat.jpg@128w.webp')
@@ -0,0 +1,25 @@
+from typing import AsyncGenerator
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from webapp.cache.redis.cache import is_pinned_to_primary
+from webapp.db import postgres
+from webapp.utils.auth.jwt import JwtTokenT, jwt_auth
+
+
+async def get_read_session(
+    access_token: JwtTokenT = Depends(jwt_auth.get_current_user),
+) -> AsyncGenerator[AsyncSession, None]:
+    # только для чтения: реплика, если она жива и пользователь недавно ничего не записывал, иначе основная БД.
+    # Живет на уровне API, потому что выбор зависит от токена и кэша, а webapp.db от них не зависит
+    session_maker = postgres.async_session
+    if (
+        postgres.replica_session is not None
+        and postgres.replica_healthy
+        and (not access_token or not await is_pinned_to_primary(access_token['user_id']))
+    ):
+        session_maker = postgres.replica_session
+
+    async with session_maker() as session:
+        yield session
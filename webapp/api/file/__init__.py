@@ -1 +1 @@
-from . import file, filter
+from . import blob, file, fill_queue, filter, resize
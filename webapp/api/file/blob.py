@@ -0,0 +1,74 @@
+from datetime import date
+
+from fastapi import BackgroundTasks, Depends, HTTPException, Path
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from webapp.api.file.router import file_router
+from webapp.cache.kafka.events import publish_files_uploaded
+from webapp.cache.redis.cache import invalidate_user
+from webapp.crud.blob import get_user_blob
+from webapp.crud.file import create_file
+from webapp.db.postgres import get_session
+from webapp.schema.file.file import FileCreate, FileFromBlob
+from webapp.utils.auth.jwt import JwtTokenT, jwt_auth
+from webapp.worker.thumbnails import generate_derivatives_safe, is_thumbnail_source
+
+SHA256_PATTERN = r'^[0-9a-f]{64}$'
+
+
+@file_router.head('/blob/{sha256}', tags=['file'])
+async def blob_exists(
+    sha256: str = Path(..., pattern=SHA256_PATTERN),
+    session: AsyncSession = Depends(get_session),
+    access_token: JwtTokenT = Depends(jwt_auth.get_current_user),
+) -> Response:
+    # клиент считает sha256 у себя и, если такое содержимое у него уже загружено, вызывает /upload_by_hash
+    # без передачи байтов. Про содержимое других пользователей не отвечаем - для него нужна обычная загрузка
+    blob = await get_user_blob(session, access_token['user_id'], sha256)
+    if blob is None:
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
+
+    return Response(
+        status_code=status.HTTP_200_OK,
+        headers={'Content-Length': str(blob['size']), 'Content-Type': blob['content_type'], 'ETag': f'"{sha256}"'},
+    )
+
+
+@file_router.post('/upload_by_hash', status_code=status.HTTP_201_CREATED, tags=['file'])
+async def upload_by_hash(
+    body: FileFromBlob,
+    background_tasks: BackgroundTasks,
+    session: AsyncSession = Depends(get_session),
+    access_token: JwtTokenT = Depends(jwt_auth.get_current_user),
+) -> ORJSONResponse:
+    blob = await get_user_blob(session, access_token['user_id'], body.sha256, lock=True)
+    if blob is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Содержимое не найдено, загрузите файл')
+
+    try:
+        file_data = FileCreate(
+            user_id=access_token['user_id'],
+            file_name=body.file_name,
+            file_path=blob['key'],
+            bucket=blob['bucket'],
+            file_type=body.file_type or blob['content_type'],
+            file_size=blob['size'],
+            upload_date=date.today(),
+            blob_sha256=blob['sha256'],
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    new_file = await create_file(session, file_data)
+    await invalidate_user(access_token['user_id'])
+    await publish_files_uploaded(access_token['user_id'], [new_file])
+    if is_thumbnail_source(file_data.file_type, file_data.file_size):
+        background_tasks.add_task(generate_derivatives_safe, [new_file.id])
+
+    return ORJSONResponse(
+        content=jsonable_encoder({**file_data.model_dump(), 'id': new_file.id, 'deduplicated': True}),
+        status_code=status.HTTP_201_CREATED,
+    )
@@ -1,25 +1,34 @@
-from datetime import date
-from io import BytesIO
+import asyncio
+from datetime import date, datetime
 from fastapi import Request
-from typing import List, Optional, Any, Dict
+from typing import List, Optional, Any, Dict, Tuple
 from urllib.parse import quote
 
-from fastapi import Depends, File, HTTPException, UploadFile, Query
+from fastapi import BackgroundTasks, Depends, File, Header, HTTPException, UploadFile, Query
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import StreamingResponse, ORJSONResponse
-from minio.error import S3Error
+from fastapi.responses import Response, StreamingResponse, ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
+from conf.config import settings
 from webapp.api.file.router import file_router
-from webapp.crud.file import create_file
+from webapp.cache.kafka.events import publish_files_uploaded
+from webapp.cache.redis.cache import invalidate_user
+from webapp.cache.redis.presigned import get_presigned_urls
+from webapp.crud.file import UploadedObject, create_file, create_files
 from webapp.crud.file import download_file_by_user_id_and_file_id, get_filtered_files
-from webapp.crud.file import upload_file_to_minio
-from webapp.db.minio import minio_client
+from webapp.crud.file import discard_upload, store_blobs, upload_file_to_minio
+from webapp.crud.derivative import get_derivative
+from webapp.db.storage import get_storage
+from webapp.api.dependencies import get_read_session
 from webapp.db.postgres import get_session
 from webapp.logger import logger
-from webapp.schema.file.file import File as FileSchema, FileCreate, FileSchemaWithURL
+from webapp.schema.file.file import FileCreate, FilePage
+from webapp.storage.base import ObjectNotFoundError, StorageError
+from webapp.storage.layout import ObjectLocation, locate
 from webapp.utils.auth.jwt import JwtTokenT, jwt_auth
+from webapp.utils.http_range import RangeNotSatisfiableError, http_date, if_range_matches, parse_range
+from webapp.worker.thumbnails import generate_derivatives_safe, is_thumbnail_source
 
 
 @file_router.post(
@@ -28,57 +37,159 @@ from webapp.utils.auth.jwt import JwtTokenT, jwt_auth
     tags=['file']
 )
 async def upload_file(
+        background_tasks: BackgroundTasks,
         file: UploadFile = File(...),
         session: AsyncSession = Depends(get_session),
         access_token: JwtTokenT = Depends(jwt_auth.get_current_user),
 ):
     try:
-        logger.info(f"Received a file upload request{file, session, access_token}")
+        logger.info('Запрос на загрузку файла %s', file.filename)
         if not access_token:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Не авторизованы")
 
-        file_content = await file.read()
-        file_path = await upload_file_to_minio(file=file, user_id=access_token['user_id'])
+        uploaded = await upload_file_to_minio(file=file, user_id=access_token['user_id'])
 
         file_data = {
             'user_id': access_token['user_id'],
             'file_name': file.filename,
-            'file_path': file_path,
+            'file_path': uploaded.file_path,
+            'bucket': uploaded.bucket,
             'file_type': file.content_type,
-            'file_size': len(file_content),
+            'file_size': uploaded.file_size,
             'upload_date': date.today(),
+            'blob_sha256': uploaded.blob_sha256,
         }
+        try:
+            file_create = FileCreate(**file_data)
+        except ValueError:
+            await discard_upload(uploaded)
+            raise
+
+        (error,) = await store_blobs(session, [file_create], [(file, uploaded)])
+        if error is not None:
+            raise error
         # file.file.seek(0)
         # new_file = await create_file(session, FileCreate(**file_data), file, access_token['user_id'])
-        new_file = await create_file(session, FileCreate(
-            user_id=file_data['user_id'],
-            file_name=file_data['file_name'],
-            file_path=file_data['file_path'],
-            file_type=file_data['file_type'],
-            file_size=file_data['file_size'],
-            upload_date=file_data['upload_date']
-        ))
-
-        logger.info(f'Создан объект в памяти {new_file}')
-
-        return ORJSONResponse(content=jsonable_encoder(file_data), status_code=status.HTTP_201_CREATED)
-    except S3Error as e:
-        logger.error(f"S3Error occurred: {e.message}")
+        new_file = await create_file(session, file_create)
+
+        logger.info('Создан файл %s', new_file.id)
+        await invalidate_user(access_token['user_id'])
+        await publish_files_uploaded(access_token['user_id'], [new_file])
+        if is_thumbnail_source(file_data['file_type'], file_data['file_size']):
+            background_tasks.add_task(generate_derivatives_safe, [new_file.id])
+
+        return ORJSONResponse(
+            content=jsonable_encoder(
+                {**file_data, 'checksum': uploaded.checksum, 'deduplicated': uploaded.deduplicated}
+            ),
+            status_code=status.HTTP_201_CREATED,
+        )
+    except HTTPException:
+        raise
+    except StorageError as e:
+        logger.error('StorageError occurred: %s', e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                             detail="Ошибка сервера при работе с хранилищем")
     except Exception as e:
-        logger.error(f"An error occurred: {e}")
+        logger.error('An error occurred: %s', e)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный запрос.")
 
 
+@file_router.post(
+    '/upload_batch',
+    status_code=status.HTTP_201_CREATED,
+    tags=['file']
+)
+async def upload_files_batch(
+        background_tasks: BackgroundTasks,
+        files: List[UploadFile] = File(...),
+        session: AsyncSession = Depends(get_session),
+        access_token: JwtTokenT = Depends(jwt_auth.get_current_user),
+):
+    user_id = access_token['user_id']
+    logger.info('Пакетная загрузка %s файлов для пользователя %s', len(files), user_id)
+    semaphore = asyncio.Semaphore(settings.UPLOAD_BATCH_CONCURRENCY)
+
+    async def store(file: UploadFile) -> UploadedObject:
+        async with semaphore:
+            return await upload_file_to_minio(file=file, user_id=user_id)
+
+    uploads = await asyncio.gather(*(store(file) for file in files), return_exceptions=True)
+
+    results: List[Dict[str, Any]] = []
+    to_create: List[FileCreate] = []
+    to_store: List[Tuple[UploadFile, UploadedObject]] = []
+    for file, uploaded in zip(files, uploads):
+        if isinstance(uploaded, BaseException):
+            detail = uploaded.detail if isinstance(uploaded, HTTPException) else str(uploaded)
+            results.append({'file_name': file.filename, 'status': 'failed', 'detail': detail})
+            continue
+
+        try:
+            file_data = FileCreate(
+                user_id=user_id,
+                file_name=file.filename,
+                file_path=uploaded.file_path,
+                bucket=uploaded.bucket,
+                file_type=file.content_type,
+                file_size=uploaded.file_size,
+                upload_date=date.today(),
+                blob_sha256=uploaded.blob_sha256,
+            )
+        except ValueError as e:
+            await discard_upload(uploaded)
+            results.append({'file_name': file.filename, 'status': 'failed', 'detail': str(e)})
+            continue
+
+        to_create.append(file_data)
+        to_store.append((file, uploaded))
+        results.append({'file_name': file.filename, 'status': 'created', 'checksum': uploaded.checksum})
+
+    # байты нового содержимого передаются под блокировкой строк blob; не переданные файлы в базу не пишем
+    errors = await store_blobs(session, to_create, to_store) if to_create else []
+    created_results = [result for result in results if result['status'] == 'created']
+    to_create = [file_data for file_data, error in zip(to_create, errors) if error is None]
+    for result, (_, uploaded), error in zip(created_results, to_store, errors):
+        if error is None:
+            result['deduplicated'] = uploaded.deduplicated
+        else:
+            result.pop('checksum')
+            result.update(status='failed', detail=error.detail if isinstance(error, HTTPException) else str(error))
+
+    if to_create:
+        try:
+            created = iter(await create_files(session, to_create))
+        except Exception as e:
+            logger.error('Ошибка записи пакета файлов в базу: %s', e)
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Ошибка записи в базу")
+
+        for result in results:
+            if result['status'] == 'created':
+                result['file'] = next(created)
+
+        await invalidate_user(user_id)
+
+        created_files = [result['file'] for result in results if result['status'] == 'created']
+        await publish_files_uploaded(user_id, created_files)
+        file_ids = [file.id for file in created_files if is_thumbnail_source(file.file_type, file.file_size)]
+        if file_ids:
+            background_tasks.add_task(generate_derivatives_safe, file_ids)
+
+    return ORJSONResponse(
+        content=jsonable_encoder({'files': results}),
+        status_code=status.HTTP_201_CREATED if to_create else status.HTTP_400_BAD_REQUEST,
+    )
+
+
 @file_router.get('/download/{file_id}', name='download_file_endpoint', tags=['file'])
 async def download_file_endpoint(
         file_id: int,
-        session: AsyncSession = Depends(get_session),
+        w: Optional[int] = Query(None, ge=1, description="Нужная ширина: отдается наименьшее превью не уже w"),
+        range_header: Optional[str] = Header(None, alias='Range'),
+        if_range: Optional[str] = Header(None, alias='If-Range'),
+        session: AsyncSession = Depends(get_read_session),
         access_token: JwtTokenT = Depends(jwt_auth.get_current_user),
 ):
-    bucket_name = f'user-{access_token["user_id"]}'
-
     try:
         file_record = await download_file_by_user_id_and_file_id(
             session=session, user_id=access_token['user_id'], file_id=file_id
@@ -87,30 +198,71 @@ async def download_file_endpoint(
         if not file_record:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Файл не найден')
 
-        # logger.info(f"Попытка получить объект из MinIO: bucket={bucket_name}, path={file_record.file_path}")
-
-        response = minio_client.get_object(bucket_name, file_record.file_path)
-        # logger.info(f"Объект успешно получен: bucket={bucket_name}, path={file_record.file_path}")
-
-        data = BytesIO(response.read())
-        response.close()
-        response.release_conn()
-
-        safe_filename = quote(file_record.file_name)
-        headers = {'Content-Disposition': f'attachment; filename="{safe_filename}"'}
+        location = locate(file_record.user_id, file_record.file_path, file_record.bucket)
+        media_type, file_name = file_record.file_type, file_record.file_name
+        if w is not None:
+            derivative = await get_derivative(session=session, user_id=file_record.user_id, file_id=file_id, width=w)
+            if derivative:
+                location = ObjectLocation(bucket=derivative['bucket'], key=derivative['key'])
+                media_type = derivative['content_type']
+                file_name = f"{file_name}@{derivative['width']}w.{derivative['key'].rsplit('.', 1)[-1]}"
+
+        storage = get_storage()
+        stat = await storage.stat_object(location.bucket, location.key)
+        etag = f'"{stat.etag}"'
+
+        headers = {
+            'Content-Disposition': f'attachment; filename="{quote(file_name)}"',
+            'Accept-Ranges': 'bytes',
+            'ETag': etag,
+        }
+        if stat.last_modified:
+            headers['Last-Modified'] = http_date(stat.last_modified)
+
+        byte_range = None
+        if if_range_matches(if_range, etag, stat.last_modified):
+            try:
+                byte_range = parse_range(range_header, stat.size)
+            except RangeNotSatisfiableError:
+                return Response(
+                    status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                    headers={'Content-Range': f'bytes */{stat.size}', 'Accept-Ranges': 'bytes'},
+                )
+
+        if byte_range:
+            offset, length = byte_range.start, byte_range.length
+            headers['Content-Range'] = byte_range.content_range(stat.size)
+            status_code = status.HTTP_206_PARTIAL_CONTENT
+        else:
+            offset, length = 0, stat.size
+            status_code = status.HTTP_200_OK
+        headers['Content-Length'] = str(length)
+
+        body = await storage.get_object_stream(
+            location.bucket, location.key, offset=offset, length=length, chunk_size=settings.DOWNLOAD_CHUNK_SIZE
+        )
 
-        return StreamingResponse(data, media_type=file_record.file_type, headers=headers)
+        return StreamingResponse(
+            body,
+            status_code=status_code,
+            media_type=media_type,
+            headers=headers,
+        )
 
-    except S3Error as e:
-        logger.error(f"Ошибка при доступе к MinIO: {str(e)}")
+    except HTTPException:
+        raise
+    except ObjectNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Файл не найден в хранилище')
+    except StorageError as e:
+        logger.error('Ошибка при доступе к MinIO: %s', e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f'Ошибка хранилища: {str(e)}')
     except Exception as e:
-        logger.error(f"Общая ошибка: {str(e)}")
+        logger.error('Общая ошибка: %s', e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
 # @file_router.get('/file/', response_model=List[Dict[str, Any]], tags=['file']) 
-@file_router.get('/file/', response_model=List[FileSchemaWithURL], tags=['file'])   
+@file_router.get('/file/', response_model=FilePage, tags=['file'])
 async def get_filtered_files_endpoint(
         request: Request,
         year: Optional[int] = Query(None, description="Year"),
@@ -118,33 +270,54 @@ async def get_filtered_files_endpoint(
         day: Optional[int] = Query(None, description="Day"),
         file_id: Optional[int] = Query(None, description="File ID"),
         file_name: Optional[str] = Query(None, description="File Name"),
-        session: AsyncSession = Depends(get_session),
+        date_from: Optional[datetime] = Query(None, alias='from', description="Начало периода (включительно)"),
+        date_to: Optional[datetime] = Query(None, alias='to', description="Конец периода (не включительно)"),
+        limit: int = Query(settings.FILE_PAGE_DEFAULT_LIMIT, ge=1, le=settings.FILE_PAGE_MAX_LIMIT),
+        cursor: Optional[str] = Query(None, description="next_cursor из предыдущей страницы"),
+        session: AsyncSession = Depends(get_read_session),
         access_token: JwtTokenT = Depends(jwt_auth.get_current_user),
 ):
     try:
-        returned_files = await get_filtered_files(
-            bucket_name = f'user-{access_token["user_id"]}',
+        returned_files, next_cursor = await get_filtered_files(
             session=session,
             user_id=access_token['user_id'],
             year=year,
             month=month,
             day=day,
             file_id=file_id,
-            file_name=file_name
+            file_name=file_name,
+            date_from=date_from,
+            date_to=date_to,
+            limit=limit,
+            cursor=cursor,
         )
         if not returned_files:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Файлы не найдены")
-        
-        file_schemas = [FileSchema.from_orm(file) for file in returned_files]
-
-        files_with_urls = []
-        for file_schema in file_schemas:
-            file_id = file_schema.id
-            download_url = str(request.url_for('download_file_endpoint', file_id=file_id))
-            file_data = file_schema.dict()
-            file_data['download_url'] = download_url
-            files_with_urls.append(FileSchemaWithURL(**file_data))
-        return files_with_urls
+
+        presigned_urls = {}
+        if settings.FILE_URL_MODE == 'presigned':
+            presigned_urls = await get_presigned_urls(returned_files)
+
+        # маршрут ищется один раз на страницу, а не на каждый файл; ответ кодируется orjson
+        # сразу в байты, минуя повторную валидацию через response_model
+        download_prefix = str(request.url_for('download_file_endpoint', file_id=0)).rsplit('/', 1)[0]
+        items = [
+            {
+                'id': file['id'],
+                'file_name': file['file_name'],
+                'file_path': file['file_path'],
+                'file_type': file['file_type'],
+                'file_size': file['file_size'],
+                'upload_date': file['upload_date'],
+                'download_url': presigned_urls.get(file['id']) or f'{download_prefix}/{file["id"]}',
+                'thumbnails': [
+                    {'width': width, 'url': f'{download_prefix}/{file["id"]}?w={width}'}
+                    for width in file.get('thumbnail_widths') or ()
+                ],
+            }
+            for file in returned_files
+        ]
+        return ORJSONResponse({'items': items, 'next_cursor': next_cursor})
         #return returned_files
     except HTTPException as e:
         raise e
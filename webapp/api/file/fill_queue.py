@@ -1,38 +1,43 @@
-import msgpack
-from aio_pika import Message
-from fastapi import Depends
+from typing import List
+
+from fastapi import Body, Depends
 from fastapi.responses import ORJSONResponse
-from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from webapp.api.file.router import file_router
+from webapp.cache.rabbit.key_builder import get_user_files_queue_key
+from webapp.cache.rabbit.publisher import pack_file_ids, publish_batched
+from webapp.crud.feed import sample_user_files
 from webapp.db.postgres import get_session
 from webapp.db.rabbitmq import get_exchange_users
-from webapp.models.sirius.file import File
 from webapp.schema.file.file import FillQueue
 
 
 @file_router.post('/fill_queue')
 async def fill_queue(
-        body: FillQueue = Depends(),
-        session: AsyncSession = Depends(get_session),
-        # access_token: JwtTokenT = Depends(jwt_auth.validate_token),
+    # прежний формат - тело-массив id пользователей, принимается с per_user по умолчанию
+    body: FillQueue | List[int] = Body(...),
+    session: AsyncSession = Depends(get_session),
+    # access_token: JwtTokenT = Depends(jwt_auth.validate_token),
 ) -> ORJSONResponse:
-    exchange_users = get_exchange_users()
+    if isinstance(body, list):
+        body = FillQueue(user_ids=body)
+
+    files = await sample_user_files(session, body.user_ids, body.per_user)
 
-    files = await session.stream_scalars(select(File).order_by(func.random()))
-    async for file in files:
-        await exchange_users.publish(
-            Message(
-                msgpack.packb({'file_id': file.id}),
-                content_type='text/plain',
-                headers={'foo': 'bar'}
-            ),
-            ''
-        )
+    published, failed = await publish_batched(
+        get_exchange_users(),
+        (
+            (get_user_files_queue_key(user_id), message)
+            for user_id, file_ids in files.items()
+            for message in pack_file_ids(file_ids)
+        ),
+    )
 
     return ORJSONResponse(
         {
-            'status': 'success',
+            'status': 'success' if not failed else 'partial',
+            'published': published,
+            'failed': failed,
         }
     )
@@ -4,17 +4,19 @@ from fastapi import Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
+from webapp.api.dependencies import get_read_session
 from webapp.api.file.router import filter_router
 from webapp.crud.filter import get_filtered_data
-from webapp.db.postgres import get_session
+from webapp.schema.file.filter import CalendarBucket
 from webapp.utils.auth.jwt import JwtTokenT, jwt_auth
 
 
-@filter_router.get('/', response_model=List[int], tags=['filter'])
+@filter_router.get('/', response_model=List[CalendarBucket] | List[int], tags=['filter'])
 async def get_filtered_data_endpoint(
         year: Optional[int] = None,
         month: Optional[int] = None,
-        session: AsyncSession = Depends(get_session),
+        with_counts: bool = False,
+        session: AsyncSession = Depends(get_read_session),
         access_token: JwtTokenT = Depends(jwt_auth.get_current_user),
 ):
     try:
@@ -23,6 +25,11 @@ async def get_filtered_data_endpoint(
         if filtered is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Ничего не найдено.')
 
-        return filtered
+        # with_counts=true - вместе с числом фото в каждом году/месяце/дне
+        if with_counts:
+            return [CalendarBucket(value=value, count=count) for value, count in filtered]
+        return [value for value, _ in filtered]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
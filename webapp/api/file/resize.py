@@ -0,0 +1,142 @@
+import uuid
+import hashlib
+from datetime import timedelta
+
+import msgpack
+from fastapi import Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette import status
+
+from conf.config import settings
+from webapp.api.file.router import file_router
+from webapp.cache.kafka.publisher import send_nowait
+from webapp.cache.redis.resize import (
+    RESIZE_DONE,
+    RESIZE_FAILED,
+    claim_resize_task,
+    get_resize_status,
+    get_user_resize_status,
+    release_resize_task,
+    set_resize_status,
+)
+from webapp.db.storage import get_storage
+from webapp.logger import logger
+from webapp.schema.file.resize import ResizeTask
+from webapp.storage.base import ObjectNotFoundError
+from webapp.utils.auth.jwt import JwtTokenT, jwt_auth
+
+
+@file_router.post('/resize', response_model=ResizeTask, tags=['file'])
+async def resize(
+    image: UploadFile = File(...),
+    width: int = Query(..., ge=1, le=settings.RESIZE_MAX_DIMENSION),
+    height: int = Query(..., ge=1, le=settings.RESIZE_MAX_DIMENSION),
+    access_token: JwtTokenT = Depends(jwt_auth.get_current_user),
+) -> ORJSONResponse:
+    data = await image.read(settings.RESIZE_MAX_IMAGE_SIZE + 1)
+    if not data:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Пустой файл')
+    if len(data) > settings.RESIZE_MAX_IMAGE_SIZE:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail='Слишком большой файл')
+
+    digest = hashlib.sha256(data).hexdigest()
+    task_id = uuid.uuid4().hex
+
+    user_id = access_token['user_id']
+    existing_task_id = await claim_resize_task(user_id, digest, width, height, task_id)
+    if existing_task_id:
+        current = await get_resize_status(existing_task_id) or {}
+        return ORJSONResponse(
+            {'task_id': existing_task_id, 'status': current.get('status'), 'width': width, 'height': height}
+        )
+
+    async def on_delivery_error(error: BaseException) -> None:
+        await set_resize_status(
+            task_id,
+            RESIZE_FAILED,
+            settings.RESIZE_RESULT_TTL,
+            user_id=user_id,
+            width=width,
+            height=height,
+            detail='Очередь ресайза недоступна',
+        )
+        await release_resize_task(user_id, digest, width, height)
+
+    try:
+        # ответ не ждет подтверждения брокера: задача уйдет пачкой, а сбой доставки отметит ее failed
+        await send_nowait(
+            settings.KAFKA_TOPIC,
+            msgpack.packb(
+                {
+                    'image': data,
+                    'task_id': task_id,
+                    'user_id': user_id,
+                    'width': width,
+                    'height': height,
+                }
+            ),
+            partition_key=user_id,
+            on_error=on_delivery_error,
+        )
+    except Exception as e:
+        logger.error('Не удалось поставить задачу ресайза %s: %s', task_id, e)
+        await release_resize_task(user_id, digest, width, height)
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail='Очередь ресайза недоступна')
+
+    return ORJSONResponse({'task_id': task_id, 'status': 'pending', 'width': width, 'height': height})
+
+
+@file_router.get('/resize/{task_id}', response_model=ResizeTask, tags=['file'])
+async def resize_status(
+    request: Request,
+    task_id: str,
+    access_token: JwtTokenT = Depends(jwt_auth.get_current_user),
+) -> ORJSONResponse:
+    current = await get_user_resize_status(task_id, access_token['user_id'])
+    if current is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Задача не найдена')
+
+    url = None
+    if current['status'] == RESIZE_DONE:
+        if settings.FILE_URL_MODE == 'presigned':
+            url = await get_storage().presigned_get_url(
+                current['bucket'], current['key'], expires=timedelta(seconds=settings.PRESIGNED_URL_TTL)
+            )
+        else:
+            url = str(request.url_for('resize_result', task_id=task_id))
+
+    return ORJSONResponse(
+        {
+            'task_id': task_id,
+            'status': current['status'],
+            'width': current.get('width'),
+            'height': current.get('height'),
+            'url': url,
+            'detail': current.get('detail'),
+        }
+    )
+
+
+@file_router.get('/resize/{task_id}/result', name='resize_result', tags=['file'])
+async def resize_result(
+    task_id: str,
+    access_token: JwtTokenT = Depends(jwt_auth.get_current_user),
+) -> StreamingResponse:
+    current = await get_user_resize_status(task_id, access_token['user_id'])
+    if current is None or current['status'] != RESIZE_DONE:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Результат не готов')
+
+    storage = get_storage()
+    try:
+        stat = await storage.stat_object(current['bucket'], current['key'])
+        body = await storage.get_object_stream(
+            current['bucket'], current['key'], chunk_size=settings.DOWNLOAD_CHUNK_SIZE
+        )
+    except ObjectNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Результат не найден в хранилище')
+
+    return StreamingResponse(
+        body,
+        media_type=stat.content_type or current.get('content_type'),
+        headers={'Content-Length': str(stat.size), 'ETag': f'"{stat.etag}"'},
+    )
@@ -1 +1 @@
-from . import info, login, get_code, save_code
+from . import info, login, logout, get_code, save_code
@@ -5,6 +5,7 @@ from starlette import status
 
 from webapp.api.login.router import auth_router
 from webapp.cache.rabbit.queue import declare_queue
+from webapp.cache.redis.feed import mark_user_active
 from webapp.crud.user import get_user
 from webapp.db.postgres import get_session
 from webapp.schema.login.user import UserLogin, UserLoginResponse
@@ -26,6 +27,7 @@ async def login(
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
 
     await declare_queue(user.id)
+    await mark_user_active(user.id)
 
     return ORJSONResponse(
         {
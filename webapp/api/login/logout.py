@@ -0,0 +1,32 @@
+from fastapi import Depends
+from fastapi.responses import ORJSONResponse
+from starlette import status
+
+from webapp.api.login.router import auth_router
+from webapp.utils.auth.jwt import JwtTokenT, jwt_auth
+from webapp.utils.auth.revocation import revoke_token, revoke_user
+
+
+@auth_router.post(
+    '/logout',
+    tags=['auth'],
+)
+async def logout(
+    access_token: JwtTokenT = Depends(jwt_auth.get_current_user),
+) -> ORJSONResponse:
+    await revoke_token(access_token)
+
+    return ORJSONResponse({'status': 'success'}, status_code=status.HTTP_200_OK)
+
+
+@auth_router.post(
+    '/logout_all',
+    tags=['auth'],
+)
+async def logout_all(
+    access_token: JwtTokenT = Depends(jwt_auth.get_current_user),
+) -> ORJSONResponse:
+    # выход на всех устройствах: отзываются все токены пользователя, выданные до этого момента
+    await revoke_user(access_token['user_id'])
+
+    return ORJSONResponse({'status': 'success'}, status_code=status.HTTP_200_OK)
@@ -0,0 +1,33 @@
+from typing import Sequence
+
+import msgpack
+
+from conf.config import settings
+from webapp.cache.kafka.publisher import send_nowait
+from webapp.logger import logger
+from webapp.schema.file.file import File
+
+
+async def publish_files_uploaded(user_id: int, files: Sequence[File]) -> None:
+    # события для потребителей (ингест, аналитика); на ответ загрузки не влияют
+    topic = settings.KAFKA_FILE_EVENTS_TOPIC
+    if not topic:
+        return
+
+    for file in files:
+        try:
+            await send_nowait(
+                topic,
+                msgpack.packb(
+                    {
+                        'event': 'file_uploaded',
+                        'user_id': user_id,
+                        'file_id': file.id,
+                        'file_type': file.file_type,
+                        'file_size': file.file_size,
+                    }
+                ),
+                partition_key=user_id,
+            )
+        except Exception as e:  # noqa: PIE786 - сбой отправки события не должен ломать загрузку
+            logger.warning('Событие о файле %s не отправлено: %s', file.id, e)
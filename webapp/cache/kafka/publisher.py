@@ -0,0 +1,68 @@
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from conf.config import settings
+from webapp.db import kafka
+from webapp.logger import logger
+from webapp.metrics import KAFKA_BATCH_MESSAGES, KAFKA_DELIVERY_LATENCY, KAFKA_MESSAGE_BYTES, KAFKA_SEND_ERRORS
+
+ErrorCallback = Callable[[BaseException], Awaitable[Any]]
+
+# подтверждения, пришедшие за текущую итерацию цикла событий, по (topic, partition)
+_acked: Dict[Tuple[str, int], int] = {}
+
+
+def _observe_batch(key: Tuple[str, int]) -> None:
+    KAFKA_BATCH_MESSAGES.labels(topic=key[0]).observe(_acked.pop(key, 0))
+
+
+def _on_delivery(topic: str, started: float, on_error: ErrorCallback | None) -> Callable[[asyncio.Future], None]:
+    def callback(future: asyncio.Future) -> None:
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        if error is not None:
+            KAFKA_SEND_ERRORS.labels(topic=topic, error=type(error).__name__).inc()
+            logger.error('Сообщение в %s не доставлено: %r', topic, error)
+            if on_error is not None:
+                asyncio.ensure_future(on_error(error))
+            return
+
+        KAFKA_DELIVERY_LATENCY.labels(topic=topic).observe(time.perf_counter() - started)
+
+        # фьючерсы одной пачки разрешаются вместе, их колбэки выполняются подряд в одной итерации цикла,
+        # поэтому отложенный на следующую итерацию подсчет видит всю пачку
+        key = (topic, future.result().partition)
+        if key not in _acked:
+            _acked[key] = 0
+            asyncio.get_running_loop().call_soon(_observe_batch, key)
+        _acked[key] += 1
+
+    return callback
+
+
+async def send_nowait(
+    topic: str,
+    value: bytes,
+    partition_key: int | str | None = None,
+    on_error: ErrorCallback | None = None,
+) -> asyncio.Future:
+    # ждет только постановки в буфер продюсера, а не подтверждения брокера: сообщение уйдет пачкой
+    # через KAFKA_LINGER_MS. Ошибка доставки уходит в метрики, лог и on_error
+    KAFKA_MESSAGE_BYTES.labels(topic=topic).observe(len(value))
+    started = time.perf_counter()
+
+    # партиции основного топика известны заранее; для остальных ключ хэширует партиционер продюсера тем же murmur2
+    key = str(partition_key).encode() if partition_key is not None else None
+    partition = kafka.get_partition(partition_key) if topic == settings.KAFKA_TOPIC else None
+
+    try:
+        future = await kafka.get_producer().send(topic, value=value, key=key, partition=partition)
+    except Exception as e:
+        KAFKA_SEND_ERRORS.labels(topic=topic, error=type(e).__name__).inc()
+        raise
+
+    future.add_done_callback(_on_delivery(topic, started, on_error))
+    return future
@@ -0,0 +1,50 @@
+import asyncio
+from typing import Iterable, List, Tuple
+
+import msgpack
+from aio_pika import DeliveryMode, Message
+from aio_pika.abc import AbstractExchange
+
+from conf.config import settings
+from webapp.logger import logger
+from webapp.metrics import track_dependency
+
+
+def pack_file_ids(file_ids: List[int]) -> Iterable[bytes]:
+    # несколько id в одном сообщении: меньше сообщений и подтверждений на тот же объем
+    batch = settings.FEED_MESSAGE_BATCH
+    for start in range(0, len(file_ids), batch):
+        yield msgpack.packb({'file_ids': file_ids[start : start + batch]})
+
+
+async def publish_batched(exchange: AbstractExchange, messages: Iterable[Tuple[str, bytes]]) -> Tuple[int, int]:
+    # публикуем окнами по RABBIT_PUBLISH_WINDOW: сообщения окна уходят без ожидания друг друга,
+    # а publisher confirms проверяются разом для всего окна
+    published, failed = 0, 0
+    window: List[asyncio.Future] = []
+
+    async def flush() -> None:
+        nonlocal published, failed
+        for result in await asyncio.gather(*window, return_exceptions=True):
+            if isinstance(result, BaseException):
+                failed += 1
+                logger.error('Сообщение не подтверждено брокером: %r', result)
+            else:
+                published += 1
+        window.clear()
+
+    async def publish(message: Message, routing_key: str) -> None:
+        # с publisher confirms это время до подтверждения брокером
+        with track_dependency('rabbitmq', 'publish'):
+            await exchange.publish(message, routing_key)
+
+    for routing_key, body in messages:
+        message = Message(body, content_type='application/x-msgpack', delivery_mode=DeliveryMode.PERSISTENT)
+        window.append(asyncio.ensure_future(publish(message, routing_key)))
+        if len(window) >= settings.RABBIT_PUBLISH_WINDOW:
+            await flush()
+
+    if window:
+        await flush()
+
+    return published, failed
@@ -1,5 +1,6 @@
 from webapp.cache.rabbit.key_builder import get_user_files_queue_key
 from webapp.db.rabbitmq import get_channel, get_exchange_users
+from webapp.metrics import track_dependency
 
 
 # declare_queue - объявить очередь
@@ -10,10 +11,12 @@ async def declare_queue(user_id: int) -> None:
     queue_key = get_user_files_queue_key(user_id)
 
     exchange_users = get_exchange_users()  # получаем обменник?
-    queue = await channel.declare_queue(queue_key, auto_delete=False,
-                                        durable=True)  # объявляем очередь с использованием полученного ключа
+    with track_dependency('rabbitmq', 'declare_queue'):
+        queue = await channel.declare_queue(queue_key, auto_delete=False,
+                                            durable=True)  # объявляем очередь с использованием полученного ключа
 
-    await queue.bind(exchange_users, queue_key)  # привязываем созданную очередь к обменнику
+    with track_dependency('rabbitmq', 'bind'):
+        await queue.bind(exchange_users, queue_key)  # привязываем созданную очередь к обменнику
 
 # declare_queue объявляет очередь для пользователя
 # Сначала получаем канал (`channel`) для взаимодействия с RabbitMQ.
@@ -0,0 +1,139 @@
+import asyncio
+import contextlib
+from typing import Dict, List, Sequence
+
+from aio_pika import Channel
+from aio_pika.abc import AbstractChannel, AbstractConnection, AbstractExchange
+from aio_pika.exceptions import ChannelNotFoundEntity
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from conf.config import settings
+from webapp.cache.rabbit.key_builder import get_user_files_queue_key
+from webapp.cache.rabbit.publisher import pack_file_ids, publish_batched
+from webapp.cache.redis.feed import get_active_users
+from webapp.cache.redis.key_builder import get_feed_refill_lock_key
+from webapp.cache.redis.lock import RedisLock
+from webapp.crud.feed import sample_user_files
+from webapp.db.postgres import async_session
+from webapp.db.rabbitmq import get_connection, get_exchange_users
+from webapp.logger import logger
+from webapp.metrics import track_dependency
+
+refill_task: asyncio.Task | None = None
+
+
+async def get_queue_depth(channel: AbstractChannel, user_id: int) -> int:
+    # passive=True только читает число готовых сообщений и не создает очередь тем, у кого ее нет:
+    # очередь объявляет вход пользователя
+    with track_dependency('rabbitmq', 'declare_queue'):
+        queue = await channel.declare_queue(get_user_files_queue_key(user_id), passive=True)
+    return queue.declaration_result.message_count or 0
+
+
+async def open_channel(connection: AbstractConnection) -> AbstractChannel:
+    # обычный, а не robust-канал: закрытый брокером канал не должен восстанавливаться сам в фоне
+    return await Channel(connection, publisher_confirms=False)
+
+
+async def get_queue_depths(connection: AbstractConnection, user_ids: Sequence[int]) -> Dict[int, int]:
+    # на отсутствующую очередь брокер закрывает канал, поэтому глубина читается не в общем канале публикации,
+    # а в своих короткоживущих каналах: их не больше FEED_DEPTH_CHANNELS, в каждом проверки идут подряд.
+    # Пользователей без очереди в результате нет - доливать им некуда
+    depths: Dict[int, int] = {}
+    pending = iter(user_ids)
+
+    async def check() -> None:
+        channel = await open_channel(connection)
+        try:
+            for user_id in pending:
+                try:
+                    depths[user_id] = await get_queue_depth(channel, user_id)
+                except ChannelNotFoundEntity:
+                    channel = await open_channel(connection)
+        finally:
+            if not channel.is_closed:
+                await channel.close()
+
+    await asyncio.gather(*(check() for _ in range(min(settings.FEED_DEPTH_CHANNELS, len(user_ids)))))
+    return {user_id: depths[user_id] for user_id in user_ids if user_id in depths}
+
+
+def plan_refill(depths: Dict[int, int]) -> Dict[int, int]:
+    # гистерезис: доливаем только опустевшие очереди, и сразу до верхней отметки,
+    # чтобы одну и ту же очередь не трогать на каждом проходе
+    return {
+        user_id: settings.FEED_HIGH_WATERMARK - depth
+        for user_id, depth in depths.items()
+        if depth < settings.FEED_LOW_WATERMARK
+    }
+
+
+async def refill_users(
+    session: AsyncSession,
+    connection: AbstractConnection,
+    exchange: AbstractExchange,
+    user_ids: Sequence[int],
+) -> int:
+    deficits = plan_refill(await get_queue_depths(connection, user_ids))
+    if not deficits:
+        return 0
+
+    # одна выборка на всю пачку пользователей; лишнее у тех, кому нужно меньше, отрезаем
+    batch = settings.FEED_MESSAGE_BATCH
+    files = await sample_user_files(session, list(deficits), max(deficits.values()) * batch)
+
+    published, failed = await publish_batched(
+        exchange,
+        (
+            (get_user_files_queue_key(user_id), message)
+            for user_id, file_ids in files.items()
+            for message in pack_file_ids(file_ids[: deficits[user_id] * batch])
+        ),
+    )
+    if failed:
+        logger.warning('Пополнение лент: не подтверждено %s сообщений', failed)
+    return published
+
+
+async def refill_feeds() -> int:
+    # при нескольких воркерах проход выполняет только один. Блокировка снимается по окончании прохода
+    # и продлевается, пока длинный проход еще идет, чтобы следующий воркер не начал параллельно
+    lock = RedisLock(get_feed_refill_lock_key(), settings.FEED_REFILL_INTERVAL)
+    if not await lock.acquire():
+        return 0
+
+    keeper = asyncio.create_task(lock.keep_alive())
+    try:
+        user_ids: List[int] = await get_active_users()
+        connection, exchange = get_connection(), get_exchange_users()
+        published = 0
+
+        for start in range(0, len(user_ids), settings.FEED_REFILL_BATCH_SIZE):
+            if lock.lost:
+                logger.warning('Пополнение лент: блокировка потеряна, проход прерван')
+                break
+            async with async_session() as session:
+                published += await refill_users(
+                    session, connection, exchange, user_ids[start : start + settings.FEED_REFILL_BATCH_SIZE]
+                )
+
+        return published
+    finally:
+        keeper.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await keeper
+        if not lock.lost:
+            await lock.release()
+
+
+async def run_refill_loop() -> None:
+    while True:
+        try:
+            published = await refill_feeds()
+            if published:
+                logger.info('Пополнение лент: опубликовано %s сообщений', published)
+        except asyncio.CancelledError:
+            raise
+        except Exception:  # noqa: PIE786 - фоновый цикл не должен умирать от ошибки одного прохода
+            logger.exception('Ошибка пополнения лент')
+        await asyncio.sleep(settings.FEED_REFILL_INTERVAL)
@@ -0,0 +1,182 @@
+import time
+import random
+import asyncio
+import hashlib
+import inspect
+import functools
+import contextlib
+from typing import Any, Awaitable, Callable, ParamSpec, TypeVar
+
+import orjson
+from redis.exceptions import RedisError
+
+from conf.config import settings
+from webapp.cache.redis.key_builder import (
+    get_primary_pin_key,
+    get_read_through_key,
+    get_read_through_lock_key,
+    get_user_version_key,
+)
+from webapp.db.redis import get_redis
+from webapp.logger import logger
+from webapp.metrics import CACHE_REQUESTS
+
+P = ParamSpec('P')
+T = TypeVar('T')
+
+LOCK_POLL_INTERVAL = 0.05
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+async def invalidate_user(user_id: int) -> None:
+    # все закэшированные значения пользователя хранят версию, с которой были посчитаны;
+    # новая версия делает их промахами без поиска и удаления ключей.
+    # Вместе с этим пользователь на DB_READ_YOUR_WRITES_TTL секунд читает из основной БД:
+    # иначе отстающая реплика вернет данные до записи и они попадут в кэш уже под новой версией
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            pipe.incr(get_user_version_key(user_id))
+            if settings.DB_REPLICA_URL and settings.DB_READ_YOUR_WRITES_TTL:
+                pipe.set(get_primary_pin_key(user_id), 1, ex=settings.DB_READ_YOUR_WRITES_TTL)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning('Не удалось сбросить кэш пользователя %s: %s', user_id, e)
+
+
+async def is_pinned_to_primary(user_id: int) -> bool:
+    if not settings.DB_READ_YOUR_WRITES_TTL:
+        return False
+    try:
+        return bool(await get_redis().exists(get_primary_pin_key(user_id)))
+    except RedisError as e:
+        # без Redis не узнать, писал ли пользователь недавно - читаем из основной БД
+        logger.warning('Не удалось проверить привязку к основной БД: %s', e)
+        return True
+
+
+def cached(
+    namespace: str,
+    dumps: Callable[[Any], Any] = _identity,
+    loads: Callable[[Any], Any] = _identity,
+    ttl: int | None = None,
+) -> Callable[[Callable[P, Awaitable[T]]], Callable[P, Awaitable[T]]]:
+    # read-through кэш для crud-функций с аргументом user_id; session и другие
+    # AsyncSession-аргументы в ключ не входят. dumps/loads переводят результат в json-совместимый вид и обратно
+    def decorator(func: Callable[P, Awaitable[T]]) -> Callable[P, Awaitable[T]]:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            if not settings.REDIS_CACHE_ENABLED:
+                return await func(*args, **kwargs)
+
+            arguments = signature.bind(*args, **kwargs).arguments
+            user_id = arguments['user_id']
+            key_args = {name: value for name, value in arguments.items() if name != 'session'}
+            digest = hashlib.blake2b(orjson.dumps(key_args, option=orjson.OPT_SORT_KEYS), digest_size=8).hexdigest()
+
+            async def load() -> Any:
+                return dumps(await func(*args, **kwargs))
+
+            value = await read_through(
+                namespace,
+                get_read_through_key(namespace, user_id, digest),
+                get_user_version_key(user_id),
+                load,
+                ttl or settings.REDIS_CACHE_TTL,
+            )
+            return loads(value)
+
+        return wrapper
+
+    return decorator
+
+
+async def read_through(
+    namespace: str,
+    key: str,
+    version_key: str,
+    load: Callable[[], Awaitable[Any]],
+    ttl: int,
+) -> Any:
+    redis = get_redis()
+    lock_key = get_read_through_lock_key(key)
+
+    try:
+        # версия пользователя и значение читаются за один round trip
+        raw_version, raw = await redis.mget(version_key, key)
+    except RedisError as e:
+        logger.warning('Кэш недоступен, читаем из базы: %s', e)
+        return await load()
+
+    version = int(raw_version or 0)
+    entry = orjson.loads(raw) if raw else None
+
+    if entry and entry['version'] == version:
+        if time.time() < entry['fresh_until']:
+            CACHE_REQUESTS.labels(namespace=namespace, result='hit').inc()
+            return entry['value']
+
+        # значение устарело: обновляет один запрос, остальные пока получают старое
+        if not await _acquire(lock_key):
+            CACHE_REQUESTS.labels(namespace=namespace, result='stale').inc()
+            return entry['value']
+    else:
+        CACHE_REQUESTS.labels(namespace=namespace, result='miss').inc()
+        if not await _acquire(lock_key):
+            waited = await _wait_for(key, lock_key, version)
+            if waited is not None:
+                return waited['value']
+            return await load()
+
+    try:
+        value = await load()
+        await _store(key, version, value, ttl)
+        return value
+    finally:
+        await _release(lock_key)
+
+
+async def _acquire(lock_key: str) -> bool:
+    try:
+        return bool(await get_redis().set(lock_key, 1, nx=True, px=int(settings.REDIS_CACHE_LOCK_TIMEOUT * 1000)))
+    except RedisError:
+        return True
+
+
+async def _release(lock_key: str) -> None:
+    with contextlib.suppress(RedisError):
+        await get_redis().delete(lock_key)
+
+
+async def _wait_for(key: str, lock_key: str, version: int) -> dict | None:
+    # single-flight: ждем, пока сосед, взявший блокировку, положит значение. Если блокировка
+    # снята, а значения нет - загрузка у соседа упала (например, 404), ждать дальше нечего
+    deadline = time.monotonic() + settings.REDIS_CACHE_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        try:
+            raw, locked = await get_redis().mget(key, lock_key)
+        except RedisError:
+            return None
+        if raw:
+            entry = orjson.loads(raw)
+            if entry['version'] == version:
+                return entry
+        if not locked:
+            return None
+    return None
+
+
+async def _store(key: str, version: int, value: Any, ttl: int) -> None:
+    jitter = settings.REDIS_CACHE_TTL_JITTER
+    fresh_for = ttl * random.uniform(1 - jitter, 1 + jitter)  # noqa: S311
+    entry = {'version': version, 'fresh_until': time.time() + fresh_for, 'value': value}
+
+    try:
+        await get_redis().set(key, orjson.dumps(entry), ex=int(fresh_for + settings.REDIS_CACHE_STALE_TTL))
+    except RedisError as e:
+        logger.warning('Не удалось записать %s в кэш: %s', key, e)
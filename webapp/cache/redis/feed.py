@@ -0,0 +1,19 @@
+import time
+from typing import List
+
+from conf.config import settings
+from webapp.cache.redis.key_builder import get_feed_active_users_key
+from webapp.db.redis import get_redis
+
+
+async def mark_user_active(user_id: int) -> None:
+    # score - время последнего входа, по нему отсекаются пользователи, которым лента уже не нужна
+    await get_redis().zadd(get_feed_active_users_key(), {str(user_id): time.time()})
+
+
+async def get_active_users() -> List[int]:
+    redis = get_redis()
+    key = get_feed_active_users_key()
+
+    await redis.zremrangebyscore(key, '-inf', time.time() - settings.FEED_ACTIVE_TTL)
+    return [int(user_id) for user_id in await redis.zrange(key, 0, -1)]
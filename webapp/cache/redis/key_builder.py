@@ -5,3 +5,51 @@ from conf.config import settings
 
 def get_file_resize_cache(task_id: str) -> str:
     return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:file_resize:{task_id}'
+
+
+def get_presigned_url_cache(file_id: int, ttl_window: int) -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:presigned_url:{file_id}:{ttl_window}'
+
+
+def get_user_version_key(user_id: int) -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:user_version:{user_id}'
+
+
+def get_read_through_key(namespace: str, user_id: int, args_digest: str) -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:{namespace}:{user_id}:{args_digest}'
+
+
+def get_read_through_lock_key(key: str) -> str:
+    return f'{key}:lock'
+
+
+def get_feed_active_users_key() -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:feed:active_users'
+
+
+def get_feed_refill_lock_key() -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:feed:refill_lock'
+
+
+def get_file_resize_dedup_key(user_id: int, digest: str, width: int, height: int) -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:file_resize_dedup:{user_id}:{digest}:{width}x{height}'
+
+
+def get_revoked_tokens_key() -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:jwt:revoked_tokens'
+
+
+def get_revoked_users_key() -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:jwt:revoked_users'
+
+
+def get_revocations_channel() -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:jwt:revocations'
+
+
+def get_rate_limit_key(route: str, scope: str, identity: str) -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:rate_limit:{route}:{scope}:{identity}'
+
+
+def get_primary_pin_key(user_id: int) -> str:
+    return f'{settings.REDIS_SIRIUS_CACHE_PREFIX}:db_primary_pin:{user_id}'
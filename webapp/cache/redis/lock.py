@@ -0,0 +1,50 @@
+import uuid
+import asyncio
+
+from webapp.db.redis import get_redis
+
+# снимаем и продлеваем только свою блокировку: если она истекла и ее взял другой воркер, значение уже другое
+RELEASE_LUA = '''
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+'''
+
+EXTEND_LUA = '''
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+'''
+
+
+async def delete_if_equals(key: str, value: str | bytes) -> bool:
+    return bool(await get_redis().register_script(RELEASE_LUA)(keys=[key], args=[value]))
+
+
+class RedisLock:
+    def __init__(self, key: str, ttl: float) -> None:
+        self.key = key
+        self.ttl_ms = int(ttl * 1000)
+        self.token = uuid.uuid4().hex
+        self.lost = False
+
+    async def acquire(self) -> bool:
+        return bool(await get_redis().set(self.key, self.token, px=self.ttl_ms, nx=True))
+
+    async def extend(self) -> bool:
+        script = get_redis().register_script(EXTEND_LUA)
+        return bool(await script(keys=[self.key], args=[self.token, self.ttl_ms]))
+
+    async def release(self) -> None:
+        await delete_if_equals(self.key, self.token)
+
+    async def keep_alive(self) -> None:
+        # продлеваем на треть TTL раньше срока; если блокировку уже потеряли, выставляем lost
+        # и выходим - держатель сам решает, прерывать ли работу
+        while True:
+            await asyncio.sleep(self.ttl_ms / 3000)
+            if not await self.extend():
+                self.lost = True
+                return
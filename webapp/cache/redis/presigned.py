@@ -0,0 +1,64 @@
+import time
+import asyncio
+from datetime import timedelta
+from typing import Any, Dict, Mapping, Sequence
+from urllib.parse import quote
+
+from redis.exceptions import RedisError
+
+from conf.config import settings
+from webapp.cache.redis.key_builder import get_presigned_url_cache
+from webapp.db.redis import get_redis
+from webapp.db.storage import get_storage
+from webapp.logger import logger
+from webapp.storage.layout import locate
+
+
+async def get_presigned_urls(files: Sequence[Mapping[str, Any]]) -> Dict[int, str]:
+    # время делится на окна длиной TTL; ссылка подписывается на 2 * TTL и кэшируется в пределах окна,
+    # поэтому выданная из кэша ссылка действительна еще минимум TTL секунд
+    ttl = settings.PRESIGNED_URL_TTL
+    window = int(time.time()) // ttl
+    keys = [get_presigned_url_cache(file['id'], window) for file in files]
+
+    redis = get_redis()
+    try:
+        cached = await redis.mget(*keys) if keys else []
+    except RedisError as e:
+        # без кэша ссылки подписываются заново: подпись локальная, список не должен падать из-за Redis
+        logger.warning('Кэш ссылок недоступен, подписываем заново: %s', e)
+        cached = [None] * len(keys)
+
+    urls = {file['id']: value.decode() for file, value in zip(files, cached) if value}
+    missing = [(file, key) for file, key, value in zip(files, keys, cached) if not value]
+    if not missing:
+        return urls
+
+    storage = get_storage()
+    locations = [locate(file['user_id'], file['file_path'], file['bucket']) for file, _ in missing]
+    signed = await asyncio.gather(
+        *(
+            storage.presigned_get_url(
+                location.bucket,
+                location.key,
+                expires=timedelta(seconds=2 * ttl),
+                response_headers={
+                    'response-content-disposition': f"attachment; filename*=utf-8''{quote(file['file_name'])}"
+                },
+            )
+            for (file, _), location in zip(missing, locations)
+        )
+    )
+
+    for (file, _), url in zip(missing, signed):
+        urls[file['id']] = url
+
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            for (_, key), url in zip(missing, signed):
+                pipe.set(key, url, ex=ttl)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning('Не удалось сохранить ссылки в кэш: %s', e)
+
+    return urls
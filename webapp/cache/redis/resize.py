@@ -0,0 +1,69 @@
+from typing import Any, Dict
+
+import orjson
+
+from conf.config import settings
+from webapp.cache.redis.key_builder import get_file_resize_cache, get_file_resize_dedup_key
+from webapp.cache.redis.lock import delete_if_equals
+from webapp.db.redis import get_redis
+
+RESIZE_PENDING = 'pending'
+RESIZE_PROCESSING = 'processing'
+RESIZE_DONE = 'done'
+RESIZE_FAILED = 'failed'
+
+
+async def get_resize_status(task_id: str) -> Dict[str, Any] | None:
+    value = await get_redis().get(get_file_resize_cache(task_id))
+    return orjson.loads(value) if value else None
+
+
+async def get_user_resize_status(task_id: str, user_id: int) -> Dict[str, Any] | None:
+    # чужая задача неотличима от несуществующей
+    current = await get_resize_status(task_id)
+    return current if current and current.get('user_id') == user_id else None
+
+
+async def set_resize_status(task_id: str, status: str, ttl: int, **fields: Any) -> None:
+    await get_redis().set(get_file_resize_cache(task_id), orjson.dumps({'status': status, **fields}), ex=ttl)
+
+
+async def claim_resize_task(user_id: int, digest: str, width: int, height: int, task_id: str) -> str | None:
+    # одинаковые (пользователь, картинка, ширина, высота) получают одну задачу: первый запрос занимает ключ,
+    # остальные получают его task_id. Возвращает task_id уже существующей задачи или None.
+    # Результат адресуется содержимым, поэтому у разных пользователей ресайз все равно считается один раз
+    redis = get_redis()
+    dedup_key = get_file_resize_dedup_key(user_id, digest, width, height)
+
+    # статус пишется до захвата ключа: у занятого task_id статус есть всегда, и конкурент
+    # не примет только что поставленную задачу за истекшую
+    await set_resize_status(
+        task_id, RESIZE_PENDING, settings.RESIZE_PENDING_TTL, user_id=user_id, width=width, height=height
+    )
+    while not await redis.set(dedup_key, task_id, ex=settings.RESIZE_PENDING_TTL, nx=True):
+        existing = await redis.get(dedup_key)
+        if existing:
+            current = await get_resize_status(existing.decode())
+            if current and current['status'] != RESIZE_FAILED:
+                await redis.delete(get_file_resize_cache(task_id))
+                return existing.decode()
+            # предыдущая задача упала или ее статус истек: снимаем ключ, только если он все еще ее,
+            # и снова пробуем SET NX - из одновременных запросов задачу поставит один
+            await delete_if_equals(dedup_key, existing)
+
+    return None
+
+
+async def release_resize_task(user_id: int, digest: str, width: int, height: int) -> None:
+    await get_redis().delete(get_file_resize_dedup_key(user_id, digest, width, height))
+
+
+async def finish_resize_task(user_id: int, digest: str, width: int, height: int, task_id: str, **result: Any) -> None:
+    async with get_redis().pipeline(transaction=False) as pipe:
+        pipe.set(
+            get_file_resize_cache(task_id),
+            orjson.dumps({'status': RESIZE_DONE, 'user_id': user_id, 'width': width, 'height': height, **result}),
+            ex=settings.RESIZE_RESULT_TTL,
+        )
+        pipe.expire(get_file_resize_dedup_key(user_id, digest, width, height), settings.RESIZE_RESULT_TTL)
+        await pipe.execute()
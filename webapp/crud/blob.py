@@ -0,0 +1,64 @@
+from typing import Any, Dict, Sequence, Set
+
+from sqlalchemy import exists, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from webapp.models.sirius.blob import Blob
+from webapp.models.sirius.file import File
+from webapp.schema.file.file import FileCreate
+
+
+async def get_user_blob(session: AsyncSession, user_id: int, sha256: str, lock: bool = False) -> Dict[str, Any] | None:
+    # содержимое отдаем только тому, у кого уже есть файл с ним: иначе по хешу можно было бы
+    # проверить наличие чужого файла или присвоить его, не передав ни байта
+    query = select(Blob.sha256, Blob.bucket, Blob.key, Blob.size, Blob.content_type).where(
+        Blob.sha256 == sha256,
+        exists().where(File.user_id == user_id, File.blob_sha256 == Blob.sha256),
+    )
+    if lock:
+        # до коммита вставки нового файла GC эту строку пропустит (SKIP LOCKED)
+        query = query.with_for_update()
+    row = (await session.execute(query)).mappings().first()
+    return dict(row) if row else None
+
+
+async def get_live_blobs(session: AsyncSession, hashes: Sequence[str]) -> Set[str]:
+    # без блокировки: только чтобы не передавать байты, которые уже лежат в хранилище и на которые
+    # есть ссылки; окончательно решает ensure_blobs под блокировкой
+    if not hashes:
+        return set()
+    result = await session.scalars(select(Blob.sha256).where(Blob.sha256.in_(hashes), Blob.ref_count > 0))
+    return set(result.all())
+
+
+async def ensure_blobs(session: AsyncSession, files_data: Sequence[FileCreate]) -> Set[str]:
+    # строка blob должна существовать до вставки файла; ref_count увеличит триггер на sirius.file.
+    # INSERT ... ON CONFLICT DO UPDATE блокирует строку до коммита вместе со вставкой файлов у вызывающего,
+    # поэтому GC не удалит содержимое между этой проверкой и появлением ссылки.
+    # Возвращает sha256, байты которых нужно передать в хранилище: строки не было или на нее нет ссылок
+    # (объект мог быть уже частично удален GC)
+    blobs = {
+        file_data.blob_sha256: {
+            'sha256': file_data.blob_sha256,
+            'bucket': file_data.bucket,
+            'key': file_data.file_path,
+            'size': file_data.file_size,
+            'content_type': file_data.file_type,
+            # без ссылок с самого начала: если файл так и не вставят, строку заберет GC
+            'released_at': func.now(),
+        }
+        for file_data in files_data
+        if file_data.blob_sha256
+    }
+    if not blobs:
+        return set()
+
+    # сортировка по ключу - одинаковый порядок блокировок у параллельных пакетов
+    statement = insert(Blob).values(sorted(blobs.values(), key=lambda blob: blob['sha256']))
+    result = await session.execute(
+        statement.on_conflict_do_update(index_elements=[Blob.sha256], set_={'ref_count': Blob.ref_count}).returning(
+            Blob.sha256, Blob.ref_count
+        )
+    )
+    return {sha256 for sha256, ref_count in result.all() if ref_count <= 0}
@@ -0,0 +1,37 @@
+from typing import Any, Dict, List
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from webapp.cache.redis.cache import cached
+from webapp.models.sirius.file import File
+from webapp.models.sirius.file_derivative import FileDerivative
+
+
+async def save_derivatives(session: AsyncSession, derivatives: List[Dict[str, Any]]) -> None:
+    # повторная генерация (например, backfill) не дублирует строки
+    await session.execute(
+        insert(FileDerivative).on_conflict_do_nothing(index_elements=['file_id', 'width']),
+        derivatives,
+    )
+    await session.commit()
+
+
+@cached('derivative')
+async def get_derivative(session: AsyncSession, user_id: int, file_id: int, width: int) -> Dict[str, Any] | None:
+    # наименьшее превью не уже запрошенной ширины; None - отдавать оригинал
+    result = await session.execute(
+        select(
+            FileDerivative.width,
+            FileDerivative.bucket,
+            FileDerivative.key,
+            FileDerivative.content_type,
+        )
+        .join(File, File.id == FileDerivative.file_id)
+        .where(File.user_id == user_id, FileDerivative.file_id == file_id, FileDerivative.width >= width)
+        .order_by(FileDerivative.width)
+        .limit(1)
+    )
+    row = result.mappings().first()
+    return dict(row) if row else None
@@ -0,0 +1,28 @@
+from collections import defaultdict
+from typing import Dict, List, Sequence
+
+from sqlalchemy import Integer, bindparam, func, select, true
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from webapp.models.sirius.file import File
+
+
+async def sample_user_files(session: AsyncSession, user_ids: Sequence[int], per_user: int) -> Dict[int, List[int]]:
+    # случайная выборка файлов для каждого пользователя: LATERAL-подзапрос идет по индексу user_id
+    # и сортирует только файлы одного пользователя (top-N), а не всю таблицу
+    users = (
+        func.unnest(bindparam('user_ids', list(user_ids), type_=ARRAY(Integer)))
+        .table_valued('user_id')
+        .render_derived(name='users')
+    )
+    sample = (
+        select(File.id).where(File.user_id == users.c.user_id).order_by(func.random()).limit(per_user).lateral('sample')
+    )
+
+    result = await session.execute(select(users.c.user_id, sample.c.id).select_from(users).join(sample, true()))
+
+    files: Dict[int, List[int]] = defaultdict(list)
+    for user_id, file_id in result.all():
+        files[user_id].append(file_id)
+    return files
@@ -1,77 +1,209 @@
 import asyncio
-from datetime import date
-from typing import List, Optional
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
 from fastapi import UploadFile, HTTPException
-from sqlalchemy import extract, select
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, insert, select, tuple_
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
-from webapp.db.minio import minio_client
+from conf.config import settings
+from webapp.cache.redis.cache import cached
+from webapp.crud.blob import ensure_blobs, get_live_blobs
+from webapp.crud.filter import get_date_range, where_upload_date
+from webapp.db.storage import get_storage
 from webapp.logger import logger
 from webapp.models.sirius.file import File as SQLAFile
+from webapp.models.sirius.file_derivative import FileDerivative
 from webapp.schema.file.file import File, FileCreate, FileDownload
-from webapp.schema.file.file import File as FileSchema
-from starlette.responses import Response
+from webapp.storage.base import ObjectNotFoundError, StorageError
+from webapp.storage.layout import LAYOUT_CONTENT, blob_location, content_extension, ensure_bucket, new_location
+from webapp.utils.cursor import decode_cursor, encode_cursor
+from webapp.utils.stream import HashingReader
 
 
-async def upload_file_to_minio(file: UploadFile, user_id: int) -> str:
-    logger.info(f"Загрузка файла в Минио для пользователя {user_id}")
-    bucket_name = f'user-{user_id}'
+@dataclass
+class UploadedObject:
+    bucket: str
+    file_path: str
+    file_size: int
+    checksum: str
+    blob_sha256: str | None = None
+    deduplicated: bool = False  # такое содержимое уже было в хранилище, передача пропущена
 
-    if not minio_client.bucket_exists(bucket_name):
-        minio_client.make_bucket(bucket_name)
 
-    current_date = date.today().strftime('%Y-%m-%d')
-    file_path = f'{current_date}/{file.filename}'
+def _hash_file(reader: HashingReader) -> bytes:
+    head = reader.read(settings.MINIO_PART_SIZE)
+    while reader.read(settings.MINIO_PART_SIZE):
+        pass
+    return head[:16]
+
+
+async def hash_blob(file: UploadFile) -> UploadedObject:
+    # UploadFile уже лежит локально (SpooledTemporaryFile): считаем sha256 в потоке, а байты передаем
+    # позже в store_blobs и только если такого содержимого еще нет
     file.file.seek(0)
+    reader = HashingReader(file.file)
+    head = await run_in_threadpool(_hash_file, reader)
+    if not reader.size:
+        logger.error("Загружен пустой файл!")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Ошибка загрузки файла")
+
+    location = blob_location(reader.checksum, content_extension(head))
+    return UploadedObject(
+        bucket=location.bucket,
+        file_path=location.key,
+        file_size=reader.size,
+        checksum=reader.checksum,
+        blob_sha256=reader.checksum,
+    )
 
+
+async def put_blob(file: UploadFile, uploaded: UploadedObject) -> None:
+    storage = get_storage()
+    await ensure_bucket(storage, uploaded.bucket)
+    file.file.seek(0)
     try:
-        # проверка file_content
-        file_content = await file.read()
-        if not file_content:
-            logger.error("file_content пустой!")
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Ошибка загрузки файла")
-
-        logger.info(f"Размер file_content: {len(file_content)}")
-        logger.info(f"Размер файла: {file.file.tell()}")
-
-        file.file.seek(0)  
-
-        await asyncio.get_event_loop().run_in_executor(
-            None,
-            minio_client.put_object,
-            bucket_name,
-            file_path,
+        await storage.put_object(
+            uploaded.bucket,
+            uploaded.file_path,
             file.file,
-            #file.file.tell(),
-            len(file_content),  
-            file.content_type,
+            content_type=file.content_type,
+            part_size=settings.MINIO_PART_SIZE,
         )
-        logger.info(f"Файл загружен в Минио: {file_path}")
-        return file_path
     except Exception as e:
-        logger.error(f"Ошибка загрузки файла в Минио: {e}")
+        logger.error('Ошибка загрузки файла в Минио: %s', e)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    logger.info('Файл загружен в Минио: %s/%s, размер: %s', uploaded.bucket, uploaded.file_path, uploaded.file_size)
+
+
+async def _blob_stored(uploaded: UploadedObject) -> bool:
+    try:
+        await get_storage().stat_object(uploaded.bucket, uploaded.file_path)
+    except ObjectNotFoundError:
+        return False
+    return True
+
+
+async def store_blobs(
+    session: AsyncSession,
+    files_data: Sequence[FileCreate],
+    uploads: Sequence[Tuple[UploadFile, UploadedObject]],
+) -> List[BaseException | None]:
+    # байты передаются до блокировки строк blob, чтобы транзакция с блокировками не ждала хранилище.
+    # Под блокировкой (ensure_blobs, ее коммитит вставка файлов) остается досмотреть содержимое без ссылок:
+    # GC удаляет объекты до своего коммита, поэтому после блокировки хватает проверки stat_object.
+    # Результат - ошибка передачи для каждого файла (None - успешно)
+    first: Dict[str, Tuple[UploadFile, UploadedObject]] = {}
+    for file, uploaded in uploads:
+        if uploaded.blob_sha256:
+            # одинаковое содержимое в одном пакете передаем один раз
+            first.setdefault(uploaded.blob_sha256, (file, uploaded))
+
+    live = await get_live_blobs(session, list(first))
+    semaphore = asyncio.Semaphore(settings.UPLOAD_BATCH_CONCURRENCY)
+    sent: Set[str] = set()
+    failed: Dict[str, BaseException] = {}
+
+    async def store(sha256: str, verify: bool) -> None:
+        file, uploaded = first[sha256]
+        async with semaphore:
+            try:
+                if verify and await _blob_stored(uploaded):
+                    return
+                await put_blob(file, uploaded)
+            except Exception as e:  # noqa: PIE786 - ошибка возвращается каждому файлу с этим содержимым
+                failed[sha256] = e
+                return
+        sent.add(sha256)
+
+    await asyncio.gather(*(store(sha256, verify=False) for sha256 in first if sha256 not in live))
+
+    missing = await ensure_blobs(
+        session, [file_data for file_data in files_data if file_data.blob_sha256 not in failed]
+    )
+    # строка появилась только сейчас или ссылки на нее пропали после проверки: объекта могло уже не стать
+    await asyncio.gather(*(store(sha256, verify=True) for sha256 in missing if sha256 not in failed))
+
+    errors: List[BaseException | None] = []
+    for _, uploaded in uploads:
+        sha256 = uploaded.blob_sha256
+        errors.append(failed.get(sha256) if sha256 else None)
+        if sha256 and sha256 not in failed and (sha256 not in sent or first[sha256][1] is not uploaded):
+            logger.info('Содержимое %s уже в хранилище, загрузка пропущена', sha256)
+            uploaded.deduplicated = True
+    return errors
+
+
+async def discard_upload(uploaded: UploadedObject) -> None:
+    # файл не прошел проверку после загрузки. Содержимое blob к этому моменту еще не передано,
+    # а объект по старой схеме уже лежит в хранилище и больше никому не нужен
+    if uploaded.blob_sha256:
+        return
+    try:
+        await get_storage().remove_object(uploaded.bucket, uploaded.file_path)
+    except StorageError as e:
+        logger.warning('Не удалось удалить объект %s/%s: %s', uploaded.bucket, uploaded.file_path, e)
+
+
+async def upload_file_to_minio(file: UploadFile, user_id: int) -> UploadedObject:
+    logger.info('Загрузка файла в Минио для пользователя %s', user_id)
+    if settings.STORAGE_LAYOUT == LAYOUT_CONTENT:
+        return await hash_blob(file)
+
+    storage = get_storage()
+    location = new_location(user_id, file.filename)
+    await ensure_bucket(storage, location.bucket)
+    file.file.seek(0)
+
+    # проверяем, что файл не пустой, не вычитывая его целиком
+    if not file.file.read(1):
+        logger.error("Загружен пустой файл!")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Ошибка загрузки файла")
+    file.file.seek(0)
+
+    # длина неизвестна: хранилище делает multipart-загрузку частями по part_size,
+    # поэтому в памяти одновременно находится не больше MINIO_PARALLEL_UPLOADS частей (по умолчанию одна)
+    reader = HashingReader(file.file)
+    try:
+        await storage.put_object(
+            location.bucket,
+            location.key,
+            reader,
+            content_type=file.content_type,
+            part_size=settings.MINIO_PART_SIZE,
+        )
+        logger.info('Файл загружен в Минио: %s/%s, размер: %s', location.bucket, location.key, reader.size)
+        return UploadedObject(
+            bucket=location.bucket, file_path=location.key, file_size=reader.size, checksum=reader.checksum
+        )
+    except Exception as e:
+        logger.error('Ошибка загрузки файла в Минио: %s', e)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 async def create_file(
         session: AsyncSession,
         file_data: FileCreate,
-        # file: UploadFile,
-        # user_id: int,
 ) -> File:
     logger.debug("Создание нового файла в базе")
 
     new_file = SQLAFile(
         user_id=file_data.user_id,
         file_path=file_data.file_path,
+        bucket=file_data.bucket,
         file_name=file_data.file_name,
         file_type=file_data.file_type,
         file_size=file_data.file_size,
-        upload_date=file_data.upload_date
+        upload_date=file_data.upload_date,
+        blob_sha256=file_data.blob_sha256,
     )
 
+    # строку blob уже заблокировали store_blobs (загрузка) или get_user_blob(lock=True) (upload_by_hash)
     session.add(new_file)
     await session.commit()
     await session.refresh(new_file)
@@ -79,57 +211,86 @@ async def create_file(
     return File.model_validate(new_file)
 
 
+async def create_files(session: AsyncSession, files_data: List[FileCreate]) -> List[File]:
+    # одна вставка INSERT ... VALUES (...), (...) RETURNING вместо commit + refresh на каждый файл;
+    # sort_by_parameter_order гарантирует, что строки вернутся в порядке переданных файлов
+    logger.debug('Создание %s файлов в базе', len(files_data))
+
+    result = await session.scalars(
+        insert(SQLAFile).returning(SQLAFile, sort_by_parameter_order=True),
+        [file_data.model_dump() for file_data in files_data],
+    )
+    files = [File.model_validate(file) for file in result.all()]
+    await session.commit()
+
+    logger.info('Создано файлов: %s', len(files))
+    return files
+
+
 async def get_file_bytes(bucket_name: str, file_path: str) -> bytes:
-    file_object = minio_client.get_object(bucket_name, file_path)
-    file_bytes = file_object.read()
-    return file_bytes
+    return await get_storage().get_object(bucket_name, file_path)
+
+
+# колонки листинга: Core-строки без ORM-сущностей, identity map и pydantic
+LISTING_COLUMNS = (
+    SQLAFile.id,
+    SQLAFile.user_id,
+    SQLAFile.bucket,
+    SQLAFile.file_name,
+    SQLAFile.file_path,
+    SQLAFile.file_type,
+    SQLAFile.file_size,
+    SQLAFile.upload_date,
+    # ширины готовых превью одним коррелированным подзапросом по уникальному индексу (file_id, width)
+    select(func.array_agg(aggregate_order_by(FileDerivative.width, FileDerivative.width)))
+    .where(FileDerivative.file_id == SQLAFile.id)
+    .scalar_subquery()
+    .label('thumbnail_widths'),
+)
+
 
-    # file_bytes = minio_client.get_object(bucket_name, filename)
-    # return file_bytes.read()
-    #return Response(content=file_bytes)
+def _dump_files(page: Tuple[List[Dict[str, Any]], Optional[str]]) -> List[Any]:
+    # upload_date хранится строкой ISO 8601, а _load_files возвращает datetime:
+    # и промах, и попадание отдают те же типы, что и запрос к базе
+    files, next_cursor = page
+    return [[{**file, 'upload_date': file['upload_date'].isoformat()} for file in files], next_cursor]
 
 
+def _load_files(value: List[Any]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    files, next_cursor = value
+    return [{**file, 'upload_date': datetime.fromisoformat(file['upload_date'])} for file in files], next_cursor
+
+
+@cached('files', dumps=_dump_files, loads=_load_files)
 async def get_filtered_files(
         session: AsyncSession,
         user_id: int,
-        bucket_name: str,
         year: Optional[int] = None,
         month: Optional[int] = None,
         day: Optional[int] = None,
         file_id: Optional[int] = None,
-        file_name: Optional[str] = None
-) -> List[SQLAFile] | None:
-    query = select(SQLAFile).where(SQLAFile.user_id == user_id)
-
-    if year is not None:
-        query = query.where(extract('year', SQLAFile.upload_date) == year)
+        file_name: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    # keyset-пагинация по (upload_date, id) от новых к старым, идет по индексу (user_id, upload_date, id)
+    query = (
+        select(*LISTING_COLUMNS)
+        .where(SQLAFile.user_id == user_id)
+        .order_by(SQLAFile.upload_date.desc(), SQLAFile.id.desc())
+        .limit(limit + 1)
+    )
 
-    if month is not None:
+    if cursor is not None:
         try:
-            month = int(month)
-            query = query.where(extract('month', SQLAFile.upload_date) == month)
+            cursor_date, cursor_id = decode_cursor(cursor)
         except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Некорректный формат месяца. Он должен быть целым числом."
-            )
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный курсор.")
+        query = query.where(tuple_(SQLAFile.upload_date, SQLAFile.id) < (cursor_date, cursor_id))
 
-    if day is not None:
-        try:
-            day = int(day)
-            query = query.where(extract('day', SQLAFile.upload_date) == day)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Некорректный формат дня. Он должен быть целым числом."
-            )
-
-    if year is not None and month is not None and day is not None:
-        query = query.where(
-            extract('year', SQLAFile.upload_date) == year,
-            extract('month', SQLAFile.upload_date) == month,
-            extract('day', SQLAFile.upload_date) == day
-        )
+    query = where_upload_date(query, get_date_range(year, month, day, date_from, date_to))
 
     if file_id is not None:
         query = query.where(SQLAFile.id == file_id)
@@ -138,7 +299,7 @@ async def get_filtered_files(
 
     try:
         result = await session.execute(query)
-        files = result.scalars().all()
+        files = [dict(row) for row in result.mappings().all()]
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -150,19 +311,20 @@ async def get_filtered_files(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Файлы из базы не найдены для указанных параметров."
         )
-    
-    return files
 
-    #return files
-    # file_schemas = [FileSchema.from_orm(file) for file in files]
-    # return [
-    #     {
-    #         'file_info': file_schema.dict(),
-    #         'file_bytes': (await get_file_bytes(bucket_name, file_schema.file_path))
-    #     } for file_schema in file_schemas
-    # ]
+    next_cursor = None
+    if len(files) > limit:
+        files = files[:limit]
+        next_cursor = encode_cursor(files[-1]['upload_date'], files[-1]['id'])
 
+    return files, next_cursor
 
+
+@cached(
+    'file',
+    dumps=lambda file: file.model_dump() if file else None,
+    loads=lambda value: FileDownload.model_validate(value) if value else None,
+)
 async def download_file_by_user_id_and_file_id(
         session: AsyncSession, user_id: int, file_id: int
 ) -> FileDownload | None:
@@ -189,4 +351,3 @@ async def download_file_by_user_id_and_file_id(
 #     except Exception as e:
 #         logger.error(f"Error getting file details from MinIO: {e}")
 #         return None
-
@@ -1,42 +1,79 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Tuple
 
-from sqlalchemy import extract, func, select
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from sqlalchemy import Select, delete, func, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from starlette import status
 
+from webapp.cache.redis.cache import cached
 from webapp.models.sirius.file import File as SQLAFile
+from webapp.models.sirius.file_calendar import CALENDAR_TRIGGER_DDL, REBUILD_CALENDAR_SQL, FileCalendar
+from webapp.utils.date_range import DateRange, upload_date_range
 
 
+def get_date_range(
+        year: Optional[int] = None,
+        month: Optional[int] = None,
+        day: Optional[int] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+) -> DateRange:
+    try:
+        return upload_date_range(year, month, day, date_from, date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f'Некорректный период: {e}')
+
+
+def where_upload_date(query: Select, date_range: DateRange) -> Select:
+    # полуинтервал upload_date >= start AND upload_date < end - индексный range scan
+    # по (user_id, upload_date, id) вместо полного перебора с extract()
+    start, end = date_range
+    if start is not None:
+        query = query.where(SQLAFile.upload_date >= start)
+    if end is not None:
+        query = query.where(SQLAFile.upload_date < end)
+    return query
+
+
+@cached('calendar')
 async def get_filtered_data(
         session: AsyncSession,
         user_id: int,
         year: Optional[int] = None,
         month: Optional[int] = None,
-) -> List[int] | None:
-    query = (  # создаем запрос, который извлекает год (year) из столбца upload_date модели SQLA (File)
-        select(func.extract('year', SQLAFile.upload_date).label('year'))
-        .where(SQLAFile.user_id == user_id)  # фильруем записи по user_id
-        .group_by('year')  # группируем результаты по году
+) -> List[Tuple[int, int]] | None:
+    # без параметров - годы, с годом - месяцы, с годом и месяцем - дни; вместе с числом фото.
+    # читаем предрассчитанную гистограмму по первичному ключу вместо GROUP BY по всем файлам
+    if month is not None and year is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Месяц указывается вместе с годом')
+
+    part = FileCalendar.day if month is not None else FileCalendar.month if year is not None else FileCalendar.year
+
+    query = (
+        select(part, func.sum(FileCalendar.count))
+        .where(FileCalendar.user_id == user_id, FileCalendar.count > 0)
+        .group_by(part)
+        .order_by(part)
     )
-    if year is not None:  # если указан год (year), переопределяем запрос для извлечения месяца (month) и фильтрации по году
-        query = (
-            select(func.extract('month', SQLAFile.upload_date).label('month'))
-            .where(SQLAFile.user_id == user_id, extract('year', SQLAFile.upload_date) == year)
-            .group_by('month')
-        )
-    if month is not None:  # если указан месяц (month), переопределяем запрос для извлечения дня (day) и фильтрации по году и месяцу
-        query = (
-            select(func.extract('day', SQLAFile.upload_date).label('day'))
-            .where(
-                SQLAFile.user_id == user_id,
-                extract('year', SQLAFile.upload_date) == year,
-                extract('month', SQLAFile.upload_date) == month,
-            )
-            .group_by('day')
-        )
-
-    result = await session.execute(query)  # выполняем запрос с помощью объекта сессии
-    data = result.scalars().all()  # возвращает список значений из запроса
+    if year is not None:
+        query = query.where(FileCalendar.year == year)
+    if month is not None:
+        query = query.where(FileCalendar.month == month)
+
+    result = await session.execute(query)
+    data = [(value, int(count)) for value, count in result.all()]
 
     return data if data else None
 
-    # возвращаем полученные данные (data), если они есть, в противном случае возвращаем None
+
+async def rebuild_calendar(conn: AsyncConnection) -> int:
+    # блокируем запись в sirius.file до конца транзакции: вставки, прошедшие между пересчетом
+    # и установкой триггеров, не попали бы в гистограмму
+    await conn.execute(text('LOCK TABLE sirius.file IN SHARE MODE'))
+    for statement in CALENDAR_TRIGGER_DDL:
+        await conn.execute(text(statement))
+
+    await conn.execute(delete(FileCalendar))
+    result = await conn.execute(text(REBUILD_CALENDAR_SQL))
+    return result.rowcount
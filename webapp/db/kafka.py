@@ -2,6 +2,7 @@ import random
 from typing import List
 
 from aiokafka.producer import AIOKafkaProducer
+from kafka.partitioner.default import murmur2
 
 producer: AIOKafkaProducer
 partitions: List[int]
@@ -13,7 +14,12 @@ def get_producer() -> AIOKafkaProducer:
     return producer
 
 
-def get_partition() -> int:
+def get_partition(key: int | str | None = None) -> int:
     global partitions
 
-    return random.choice(partitions)
+    if key is None:
+        return random.choice(partitions)
+
+    # murmur2, как у DefaultPartitioner Kafka: сообщения одного пользователя попадают в одну партицию
+    # и читаются в порядке отправки
+    return partitions[(murmur2(str(key).encode()) & 0x7FFFFFFF) % len(partitions)]
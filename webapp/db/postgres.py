@@ -1,22 +1,138 @@
-from typing import AsyncGenerator
+import time
+import asyncio
+from typing import Any, AsyncGenerator, Dict
+from uuid import uuid4
 
-from sqlalchemy import QueuePool
+from sqlalchemy import event, exc, text
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
 
 from conf.config import settings
+from webapp.logger import logger
+from webapp.metrics import (
+    DB_CONNECTION_AGE,
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_CHECKOUT_WAIT,
+    DB_POOL_OVERFLOW,
+    DB_POOL_TIMEOUTS,
+    DB_REPLICA_HEALTHY,
+    DB_REPLICA_LAG,
+    observe_dependency,
+)
 
+CONNECTION_DIRECT = 'direct'
+CONNECTION_PGBOUNCER = 'pgbouncer'
 
-def create_engine() -> AsyncEngine:
-    return create_async_engine(
-        settings.DB_URL,
-        poolclass=QueuePool,
-        connect_args={
+# первое слово запроса как метка операции; все прочее сводится к other
+QUERY_OPERATIONS = frozenset(('select', 'insert', 'update', 'delete', 'with', 'begin', 'commit', 'rollback'))
+
+
+def _query_operation(statement: str) -> str:
+    words = statement.split(None, 1)
+    operation = words[0].lower() if words else ''
+    return operation if operation in QUERY_OPERATIONS else 'other'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    start = conn.info['query_start'].pop()
+    observe_dependency('postgres', _query_operation(statement), time.perf_counter() - start)
+
+
+def _handle_error(exception_context) -> None:
+    # упавший запрос тоже учитываем, иначе таймауты не видны на графике
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_start'):
+        start = connection.info['query_start'].pop()
+        observe_dependency('postgres', _query_operation(exception_context.statement or ''), time.perf_counter() - start)
+
+
+def instrument_engine(engine: AsyncEngine) -> AsyncEngine:
+    # события вешаются на синхронный движок: asyncpg вызывается внутри них через greenlet,
+    # поэтому замер охватывает реальное ожидание ответа сервера
+    event.listen(engine.sync_engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine.sync_engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine.sync_engine, 'handle_error', _handle_error)
+    return engine
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    # _do_get ждет освобождения соединения или открывает новое сверх pool_size;
+    # gauges обновляются после выдачи и возврата, когда счетчики пула уже актуальны
+    metrics_name = 'primary'
+
+    def update_gauges(self) -> None:
+        DB_POOL_CHECKED_OUT.labels(pool=self.metrics_name).set(self.checkedout())
+        DB_POOL_OVERFLOW.labels(pool=self.metrics_name).set(self.overflow())
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            DB_POOL_TIMEOUTS.labels(pool=self.metrics_name).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(pool=self.metrics_name).observe(time.perf_counter() - start)
+            self.update_gauges()
+
+    def _do_return_conn(self, record: ConnectionPoolEntry) -> None:
+        try:
+            super()._do_return_conn(record)
+        finally:
+            self.update_gauges()
+
+
+def instrument_pool(pool: InstrumentedQueuePool, name: str) -> None:
+    pool.metrics_name = name
+
+    def on_connect(dbapi_connection, connection_record) -> None:
+        connection_record.info['connected_at'] = time.monotonic()
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+        connected_at = connection_record.info.get('connected_at')
+        if connected_at is not None:
+            DB_CONNECTION_AGE.labels(pool=name).observe(time.monotonic() - connected_at)
+
+    event.listen(pool, 'connect', on_connect)
+    event.listen(pool, 'checkout', on_checkout)
+
+
+def get_connect_args(mode: str | None = None) -> Dict[str, Any]:
+    mode = mode or settings.DB_CONNECTION_MODE
+    if mode == CONNECTION_DIRECT:
+        # кэш asyncpg и кэш адаптера SQLAlchemy: повторный запрос не разбирается и не планируется заново
+        return {
+            'statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE,
+            'prepared_statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE,
+        }
+    if mode == CONNECTION_PGBOUNCER:
+        # в режиме transaction соседние транзакции попадают на разные серверные соединения:
+        # prepared statement, созданный в одном, в другом не существует, а одинаковые имена конфликтуют
+        return {
             'statement_cache_size': 0,
-        },
-        pool_size=5,
-        max_overflow=20,
-        pool_recycle=3600,
+            'prepared_statement_cache_size': 0,
+            'prepared_statement_name_func': lambda: f'__asyncpg_{uuid4()}__',
+        }
+    raise ValueError(f'Неизвестный режим подключения к БД: {mode!r}')
+
+
+def create_engine(url: str | None = None, name: str = 'primary') -> AsyncEngine:
+    engine = create_async_engine(
+        url or settings.DB_URL,
+        poolclass=InstrumentedQueuePool,
+        connect_args=get_connect_args(),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
     )
+    instrument_pool(engine.sync_engine.pool, name)
+    return instrument_engine(engine)
 
 
 def create_session(engine: AsyncEngine | None = None) -> async_sessionmaker[AsyncSession]:
@@ -28,10 +144,62 @@ def create_session(engine: AsyncEngine | None = None) -> async_sessionmaker[Asyn
     )
 
 
+# отставание реплики в секундах; на основной БД (обе ссылки на один сервер) функции восстановления
+# возвращают NULL, и отставание считается нулевым. Совпадение LSN - реплика догнала, даже если записей давно не было
+REPLICA_LAG_QUERY = text(
+    '''
+SELECT COALESCE(
+    CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END,
+    0
+)
+'''
+)
+
 engine = create_engine()
 async_session = create_session(engine)
 
+replica_engine: AsyncEngine | None = None
+replica_session: async_sessionmaker[AsyncSession] | None = None
+if settings.DB_REPLICA_URL:
+    replica_engine = create_engine(settings.DB_REPLICA_URL, name='replica')
+    replica_session = create_session(replica_engine)
+replica_healthy = replica_engine is not None
+replica_health_task: asyncio.Task | None = None
+
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session() as session:
         yield session
+
+
+async def check_replica() -> bool:
+    global replica_healthy
+
+    try:
+        async with replica_engine.connect() as connection:
+            lag = float(
+                await asyncio.wait_for(
+                    connection.scalar(REPLICA_LAG_QUERY), timeout=settings.DB_REPLICA_HEALTH_INTERVAL
+                )
+            )
+    except Exception as e:  # noqa: PIE786 - любая ошибка проверки означает, что реплике нельзя доверять
+        if replica_healthy:
+            logger.warning('Реплика недоступна, чтения идут в основную БД: %s', e)
+        replica_healthy = False
+        DB_REPLICA_HEALTHY.set(0)
+        return False
+
+    healthy = lag <= settings.DB_REPLICA_MAX_LAG
+    if healthy != replica_healthy:
+        logger.warning('Реплика %s, отставание %.1f с', 'снова используется' if healthy else 'отстает', lag)
+    replica_healthy = healthy
+    DB_REPLICA_LAG.set(lag)
+    DB_REPLICA_HEALTHY.set(int(healthy))
+    return healthy
+
+
+async def run_replica_health_loop() -> None:
+    while True:
+        await check_replica()
+        await asyncio.sleep(settings.DB_REPLICA_HEALTH_INTERVAL)
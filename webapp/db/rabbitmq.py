@@ -1,5 +1,6 @@
-from aio_pika import RobustChannel, RobustExchange
+from aio_pika import RobustChannel, RobustConnection, RobustExchange
 
+connection: RobustConnection
 channel: RobustChannel
 exchange_users: RobustExchange
 
@@ -14,3 +15,7 @@ def get_channel() -> RobustChannel:
     global channel
 
     return channel
+
+
+def get_connection() -> RobustConnection:
+    return connection
@@ -1,7 +1,35 @@
+import time
+from typing import Any
+
 from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+
+from webapp.metrics import observe_dependency
 
 redis: Redis
 
 
+class InstrumentedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True) -> Any:
+        start = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            observe_dependency('redis', 'pipeline', time.perf_counter() - start)
+
+
+class InstrumentedRedis(Redis):
+    # метка - имя команды (get, evalsha), а не ключ: число рядов ограничено набором команд
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            observe_dependency('redis', str(args[0]).split(' ', 1)[0].lower(), time.perf_counter() - start)
+
+    def pipeline(self, transaction: bool = True, shard_hint: str | None = None) -> Pipeline:
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
 def get_redis() -> Redis:
     return redis
@@ -0,0 +1,7 @@
+from webapp.storage.base import Storage
+
+storage: Storage
+
+
+def get_storage() -> Storage:
+    return storage
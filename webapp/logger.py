@@ -1,24 +1,94 @@
 import logging
+import queue
+import random
 from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict
 
+import orjson
 import yaml
 
+from webapp.metrics import LOG_RECORDS_DROPPED
+
 with open('conf/logging.conf.yml', 'r') as f:  # открываетя файл конфигурации в режиме чтения
     LOGGING_CONFIG = yaml.full_load(f)
 
 
+def _correlation_id(record: logging.LogRecord) -> str | None:
+    # в потоке вывода contextvar запроса не виден, поэтому id сохраняется в запись при логировании
+    if hasattr(record, 'correlation_id'):
+        return record.correlation_id
+    return correlation_id_ctx.get(None)
+
+
 class ConsoleFormatter(logging.Formatter):  # кастомный форматтер
 
     def format(self,
                record: logging.LogRecord) -> str:  # переопределяем метод `format`, чтобы добавить корреляционный идентификатор к сообщениям логирования, если он доступен
-        try:  # отслеживание запросов в многопоточной среде
-            correlation_id = correlation_id_ctx.get()  # пытаемся получить значение корреляционого идентификатора из контекстной пременной
-            return '[%s] %s' % (correlation_id, super().format(record))
-        except LookupError:
+        correlation_id = _correlation_id(record)
+        if correlation_id is None:
             return super().format(record)
+        return '[%s] %s' % (correlation_id, super().format(record))
+
+
+class JsonFormatter(logging.Formatter):
+    # одна запись - одна строка JSON; аргументы подставляются здесь, в потоке QueueListener
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'correlation_id': _correlation_id(record),
+            'location': f'{record.module}:{record.funcName}:{record.lineno}',
+        }
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            payload['stack_info'] = self.formatStack(record.stack_info)
+        return orjson.dumps(payload, default=str).decode()
+
+
+class CorrelationIdFilter(logging.Filter):
+    # выполняется в потоке, который логирует, пока contextvar запроса еще доступен
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = correlation_id_ctx.get(None)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    # пропускает долю rate записей уровня, например {'DEBUG': 0.01}; остальные уровни - все
+
+    def __init__(self, rates: Dict[str, float]) -> None:
+        super().__init__()
+        self.rates = {logging.getLevelName(level.upper()): rate for level, rate in rates.items()}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.levelno)
+        return rate is None or random.random() < rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    # в цикле событий запись только кладется в очередь; форматирование и запись в поток делает QueueListener
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # базовый prepare форматирует сообщение сразу (ради pickle между процессами);
+        # внутри процесса запись передается как есть, %-аргументы подставляются уже в потоке вывода
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
 
 
 correlation_id_ctx = ContextVar(
     'correlation_id_ctx')  # создаем объект `correlation_id_ctx` типа `ContextVar`, который используется для хранения корреляционного идентификатора
 logger = logging.getLogger(
     'photo_tinder_bot')  # создается объект логгера с именем `'photo_tinder_bot'` с помощью `logging.getLogger
+
+log_listener: QueueListener | None = None
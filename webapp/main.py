@@ -8,10 +8,28 @@ from pydantic import BaseModel
 from webapp.api.file.router import file_router, filter_router
 from webapp.api.login.router import auth_router
 from webapp.metrics import metrics
-from webapp.on_shutdown import stop_producer
+from webapp.middleware.logger import LogServerMiddleware
+from webapp.middleware.metrics import RequestMetricsMiddleware
+from webapp.middleware.rate_limit import ConcurrencyLimitMiddleware, RateLimitMiddleware
+from webapp.on_shutdown import (
+    stop_feed_refill,
+    stop_logger,
+    stop_producer,
+    stop_replica_health,
+    stop_revocations,
+    stop_storage,
+    stop_thumbnails,
+)
+from webapp.on_startup.auth import start_revocations
+from webapp.on_startup.feed import start_feed_refill
 from webapp.on_startup.kafka import create_producer
+from webapp.on_startup.logger import setup_logger
+from webapp.on_startup.postgres import start_replica_health
 from webapp.on_startup.rabbit import start_rabbit
 from webapp.on_startup.redis import start_redis
+from webapp.on_startup.storage import start_storage
+from webapp.on_startup.thumbnails import start_thumbnails
+from webapp.on_startup.warmup import warm_up
 
 
 class Message(BaseModel):
@@ -25,6 +43,13 @@ async def start_command(message: Message):
 
 # устанавливающаем CORS-middleware для приложения
 def setup_middleware(app: FastAPI) -> None:
+    # порядок вызова: CORS -> LogServer -> RequestMetrics -> ConcurrencyLimit -> RateLimit -> приложение;
+    # перегруженный процесс отказывает раньше, чем тратит round trip в Redis,
+    # отказы 429/503 видны в метриках запросов, а correlation id есть во всех записях лога
+    app.add_middleware(RateLimitMiddleware)
+    app.add_middleware(ConcurrencyLimitMiddleware)
+    app.add_middleware(RequestMetricsMiddleware, router=app.router)
+    app.add_middleware(LogServerMiddleware)
     # CORS Middleware should be the last.
     # See https://github.com/tiangolo/fastapi/issues/1663 .
     app.add_middleware(
@@ -49,17 +74,30 @@ def setup_routers(app: FastAPI) -> None:
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     await start_redis()
+    await start_replica_health()
+    await start_revocations()
+    await start_storage()
     await start_rabbit()
     await create_producer()
+    await start_feed_refill()
+    await start_thumbnails()
+    await warm_up()
     print('START APP')
     yield
+    await stop_feed_refill()
+    await stop_replica_health()
+    await stop_thumbnails()
+    await stop_revocations()
+    await stop_storage()
     await stop_producer()
     print('END APP')
+    await stop_logger()
 
 
 # объект приложения FastAPI с документацией по Swagger и заданным контекстным менеджером
 # устанавливает CORS-middleware
 def create_app() -> FastAPI:
+    setup_logger()
     app = FastAPI(docs_url='/swagger', lifespan=lifespan)
 
     setup_middleware(app)
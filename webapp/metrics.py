@@ -1,4 +1,7 @@
 import os
+import time
+from contextlib import contextmanager
+from typing import Iterator
 
 import prometheus_client
 from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
@@ -6,8 +9,6 @@ from prometheus_client.multiprocess import MultiProcessCollector
 from starlette.requests import Request
 from starlette.responses import Response
 
-#
-
 DEFAULT_BUCKETS = (
     0.005,
     0.01,
@@ -30,14 +31,7 @@ DEFAULT_BUCKETS = (
     float('+inf'),
 )
 
-# TODO in middleware
-# prometheus_client.Counter(
-#     'sirius_deps_latency_seconds',
-#     '',
-#     ['endpoint'],
-# )
-
-# задержка при взаимодействии с внешними зависимостями
+# задержка при взаимодействии с внешними зависимостями: endpoint - postgres / redis / minio / rabbitmq
 # histogram_quantile(0.99, sum(rate(sirius_deps_latency_seconds_bucket[1m])) by (le, endpoint))
 # среднее время обработки за 1 мин
 DEPS_LATENCY = prometheus_client.Histogram(
@@ -47,7 +41,7 @@ DEPS_LATENCY = prometheus_client.Histogram(
     buckets=DEFAULT_BUCKETS,
 )
 
-# задержка операций взаимодействия с базами данных и Redis
+# задержка операций взаимодействия с базами данных и Redis: operation - db_select, redis_get, ...
 INTEGRATION_LATENCY_DB_REDIS = prometheus_client.Histogram(
     'integration_latency_db_redis_seconds',
     'Time taken for integration operations with DB, Redis, etc.',
@@ -55,7 +49,7 @@ INTEGRATION_LATENCY_DB_REDIS = prometheus_client.Histogram(
     buckets=DEFAULT_BUCKETS,
 )
 
-# задержка операций взаимодействия с бекендом и Telegram
+# задержка операций взаимодействия с бекендом и Telegram: operation - minio_put_object, rabbitmq_publish, ...
 INTEGRATION_LATENCY_BACKEND_TELEGRAM = prometheus_client.Histogram(
     'integration_latency_backend_telegram_seconds',
     'Time taken for integration operations with backend and Telegram',
@@ -63,49 +57,168 @@ INTEGRATION_LATENCY_BACKEND_TELEGRAM = prometheus_client.Histogram(
     buckets=DEFAULT_BUCKETS,
 )
 
-import time
+# обращения к read-through кэшу Redis: hit / miss / stale
+# sum(rate(sirius_cache_requests_total{result="hit"}[1m])) by (namespace)
+#   / sum(rate(sirius_cache_requests_total[1m])) by (namespace)
+CACHE_REQUESTS = prometheus_client.Counter(
+    'sirius_cache_requests_total',
+    'Read-through cache lookups by result',
+    ['namespace', 'result'],
+)
 
+# продюсер Kafka: время от send до подтверждения брокера, размер сообщений и пачек, ошибки доставки
+KAFKA_DELIVERY_LATENCY = prometheus_client.Histogram(
+    'sirius_kafka_delivery_seconds',
+    'Time from producer send to broker acknowledgement',
+    ['topic'],
+    buckets=DEFAULT_BUCKETS,
+)
 
-# ...
+KAFKA_MESSAGE_BYTES = prometheus_client.Histogram(
+    'sirius_kafka_message_bytes',
+    'Size of produced message values',
+    ['topic'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, float('+inf')),
+)
 
-def metrics(request: Request) -> Response:
-    if 'prometheus_multiproc_dir' in os.environ:
-        registry = CollectorRegistry()
-        MultiProcessCollector(registry)
-    else:
-        registry = REGISTRY
+# сообщения одной пачки подтверждаются брокером разом
+KAFKA_BATCH_MESSAGES = prometheus_client.Histogram(
+    'sirius_kafka_batch_messages',
+    'Messages acknowledged together per partition',
+    ['topic'],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, float('+inf')),
+)
 
-    return Response(generate_latest(registry), headers={'Content-Type': CONTENT_TYPE_LATEST})
+KAFKA_SEND_ERRORS = prometheus_client.Counter(
+    'sirius_kafka_send_errors_total',
+    'Producer sends that failed to enqueue or were not acknowledged',
+    ['topic', 'error'],
+)
+
+# запросы, отклоненные до обработки: reason - rate_limit_user / rate_limit_ip / overload
+ADMISSION_REJECTED = prometheus_client.Counter(
+    'sirius_admission_rejected_total',
+    'Requests rejected by rate limiting or the in-flight cap',
+    ['route', 'reason'],
+)
+
+IN_FLIGHT = prometheus_client.Gauge(
+    'sirius_in_flight_requests',
+    'Requests currently being processed',
+    multiprocess_mode='livesum',
+)
+
+# пул соединений Postgres: pool - primary / replica
+# занятые соединения и соединения сверх pool_size; в multiprocess складываются по живым процессам
+DB_POOL_CHECKED_OUT = prometheus_client.Gauge(
+    'sirius_db_pool_checked_out',
+    'Connections currently checked out of the pool',
+    ['pool'],
+    multiprocess_mode='livesum',
+)
 
+DB_POOL_OVERFLOW = prometheus_client.Gauge(
+    'sirius_db_pool_overflow',
+    'Connections open beyond pool_size (negative while the pool is not full)',
+    ['pool'],
+    multiprocess_mode='livesum',
+)
 
-def some_db_operation():
-    start_time = time.time()
+# сколько запрос ждал соединение, включая открытие нового сверх pool_size
+# histogram_quantile(0.99, sum(rate(sirius_db_pool_checkout_wait_seconds_bucket[1m])) by (le, pool))
+DB_POOL_CHECKOUT_WAIT = prometheus_client.Histogram(
+    'sirius_db_pool_checkout_wait_seconds',
+    'Time spent waiting for a pooled connection',
+    ['pool'],
+    buckets=(0.0005, 0.001, 0.0025) + DEFAULT_BUCKETS,
+)
 
-    # операция запроса в БД или других хранилищ данных
+DB_POOL_TIMEOUTS = prometheus_client.Counter(
+    'sirius_db_pool_timeouts_total',
+    'Checkouts that failed after waiting pool_timeout',
+    ['pool'],
+)
 
-    end_time = time.time()
-    execution_time = end_time - start_time
+# возраст соединения в момент выдачи: помогает подобрать pool_recycle
+DB_CONNECTION_AGE = prometheus_client.Histogram(
+    'sirius_db_connection_age_seconds',
+    'Age of pooled connections at checkout',
+    ['pool'],
+    buckets=(1, 10, 60, 300, 600, 1800, 3600, 7200, float('+inf')),
+)
 
-    INTEGRATION_LATENCY_DB_REDIS.labels(operation='db_query').observe(execution_time)
+# состояние реплики по последней проверке: при 0 чтения идут в основную БД
+DB_REPLICA_HEALTHY = prometheus_client.Gauge(
+    'sirius_db_replica_healthy',
+    'Whether reads are currently routed to the replica',
+    multiprocess_mode='min',
+)
 
+DB_REPLICA_LAG = prometheus_client.Gauge(
+    'sirius_db_replica_lag_seconds',
+    'Replica replay lag observed by the health check',
+    multiprocess_mode='max',
+)
 
-def some_backend_operation():
-    start_time = time.time()
+# записи лога, отброшенные из-за переполнения очереди QueueHandler
+LOG_RECORDS_DROPPED = prometheus_client.Counter(
+    'sirius_log_records_dropped_total',
+    'Log records dropped because the logging queue was full',
+)
 
-    # операция взаимодействия с бекендом
+# задержка обработки запроса по шаблону маршрута ('/file/{file_id}'), а не по сырому пути,
+# чтобы число рядов не росло вместе с числом id; неизвестные пути сводятся к одному UNMATCHED_ROUTE
+# histogram_quantile(0.99, sum(rate(sirius_request_duration_seconds_bucket[1m])) by (le, route))
+REQUEST_LATENCY = prometheus_client.Histogram(
+    'sirius_request_duration_seconds',
+    'Request handling time by route template',
+    ['method', 'route', 'status'],
+    buckets=DEFAULT_BUCKETS,
+)
 
-    end_time = time.time()
-    execution_time = end_time - start_time
+REQUESTS_IN_PROGRESS = prometheus_client.Gauge(
+    'sirius_requests_in_progress',
+    'Requests currently being processed by route template',
+    ['method', 'route'],
+    multiprocess_mode='livesum',
+)
 
-    INTEGRATION_LATENCY_BACKEND_TELEGRAM.labels(operation='backend_call').observe(execution_time)
+# детальная гистограмма для каждой зависимости; остальные пишут только в DEPS_LATENCY
+OPERATION_LATENCY = {
+    'postgres': (INTEGRATION_LATENCY_DB_REDIS, 'db'),
+    'redis': (INTEGRATION_LATENCY_DB_REDIS, 'redis'),
+    'minio': (INTEGRATION_LATENCY_BACKEND_TELEGRAM, 'minio'),
+    'rabbitmq': (INTEGRATION_LATENCY_BACKEND_TELEGRAM, 'rabbitmq'),
+}
 
 
-def some_external_service_operation(endpoint: str):
-    start_time = time.time()
+def observe_dependency(dependency: str, operation: str, elapsed: float) -> None:
+    # operation - имя команды или метода (select, get, put_object), а не текст запроса или ключ
+    DEPS_LATENCY.labels(endpoint=dependency).observe(elapsed)
+    if dependency in OPERATION_LATENCY:
+        histogram, prefix = OPERATION_LATENCY[dependency]
+        histogram.labels(operation=f'{prefix}_{operation}').observe(elapsed)
 
-    # операция взаимодействия с внешним сервисом
 
-    end_time = time.time()
-    execution_time = end_time - start_time
+@contextmanager
+def track_dependency(dependency: str, operation: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_dependency(dependency, operation, time.perf_counter() - start)
 
-    DEPS_LATENCY.labels(endpoint=endpoint).observe(execution_time)
+
+def is_multiprocess() -> bool:
+    # prometheus_client читает PROMETHEUS_MULTIPROC_DIR, старые версии - prometheus_multiproc_dir
+    return 'PROMETHEUS_MULTIPROC_DIR' in os.environ or 'prometheus_multiproc_dir' in os.environ
+
+
+def metrics(request: Request) -> Response:
+    if is_multiprocess():
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return Response(generate_latest(registry), headers={'Content-Type': CONTENT_TYPE_LATEST})
@@ -0,0 +1,50 @@
+import time
+
+from starlette.routing import Match, Router
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from webapp.metrics import REQUEST_LATENCY, REQUESTS_IN_PROGRESS
+
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+class RequestMetricsMiddleware:
+    # маршрут определяется до вызова приложения, чтобы gauge in-progress тоже был по шаблону;
+    # метка - route.path ('/file/{file_id}'), сырой путь в метки не попадает
+    def __init__(self, app: ASGIApp, router: Router):
+        self.app = app
+        self.router = router
+
+    def get_route(self, scope: Scope) -> str:
+        partial = None
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, 'path', UNMATCHED_ROUTE)
+            if match == Match.PARTIAL and partial is None:
+                # путь совпал, метод нет - 405 тоже считаем по шаблону
+                partial = getattr(route, 'path', UNMATCHED_ROUTE)
+        return partial or UNMATCHED_ROUTE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        method, route = scope['method'], self.get_route(scope)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method=method, route=route)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_LATENCY.labels(method=method, route=route, status=status_code).observe(time.perf_counter() - start)
+            in_progress.dec()
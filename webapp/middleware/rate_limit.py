@@ -0,0 +1,257 @@
+import math
+import ipaddress
+from dataclasses import dataclass
+from typing import Dict, List, Protocol, Sequence, Tuple
+
+from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
+from redis.asyncio import Redis
+from redis.commands.core import AsyncScript
+from redis.exceptions import RedisError
+from starlette import status
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from conf.config import settings
+from webapp.cache.redis.key_builder import get_rate_limit_key
+from webapp.db.redis import get_redis
+from webapp.logger import logger
+from webapp.metrics import ADMISSION_REJECTED, IN_FLIGHT
+from webapp.utils.auth.jwt import jwt_auth
+
+SCOPE_USER = 'user'
+SCOPE_IP = 'ip'
+
+# все корзины запроса проверяются и списываются одним атомарным вызовом: либо запрос проходит
+# по всем правилам сразу, либо ни одна корзина не тратится. Время берется у Redis, чтобы
+# расхождение часов между воркерами не влияло на пополнение.
+# KEYS - корзины, ARGV - capacity_1, rate_1 (токенов в мс), capacity_2, rate_2, ...
+# Возвращает {1, 0, 0} или {0, сколько мс ждать, номер корзины с самым долгим ожиданием (с 1)}
+TOKEN_BUCKET_LUA = '''
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local tokens = {}
+local wait = 0
+local failed = 0
+
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local rate = tonumber(ARGV[i * 2])
+    local bucket = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local available = tonumber(bucket[1]) or capacity
+    local updated = tonumber(bucket[2]) or now
+    available = math.min(capacity, available + math.max(0, now - updated) * rate)
+    tokens[i] = available
+    if available < 1 then
+        local bucket_wait = math.ceil((1 - available) / rate)
+        if bucket_wait > wait then
+            wait = bucket_wait
+            failed = i
+        end
+    end
+end
+
+if wait > 0 then
+    return {0, wait, failed}
+end
+
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local rate = tonumber(ARGV[i * 2])
+    redis.call('HSET', KEYS[i], 'tokens', tostring(tokens[i] - 1), 'ts', now)
+    redis.call('PEXPIRE', KEYS[i], math.ceil(capacity / rate))
+end
+return {1, 0, 0}
+'''
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    scope: str
+    capacity: int
+    period: float
+
+    @property
+    def rate_per_ms(self) -> float:
+        return self.capacity / (self.period * 1000)
+
+
+def parse_rate_limit(rule: str) -> RateLimit:
+    # 'user:60/60' - 60 запросов, корзина полностью пополняется за 60 секунд
+    scope, _, limit = rule.partition(':')
+    capacity, _, period = limit.partition('/')
+    if scope not in (SCOPE_USER, SCOPE_IP) or not capacity or not period:
+        raise ValueError(f'Некорректное правило ограничения: {rule!r}')
+    return RateLimit(scope=scope, capacity=int(capacity), period=float(period))
+
+
+def parse_rate_limits(rules: Dict[str, List[str]]) -> Dict[str, Tuple[RateLimit, ...]]:
+    return {route: tuple(parse_rate_limit(rule) for rule in route_rules) for route, route_rules in rules.items()}
+
+
+class Limiter(Protocol):
+    async def acquire(self, buckets: Sequence[Tuple[str, RateLimit]]) -> Tuple[float, int]:
+        ...
+
+
+class RedisTokenBucket:
+    # возвращает (0, 0), если запрос пропущен, иначе сколько секунд подождать и индекс корзины,
+    # из-за которой запрос отклонен
+    def __init__(self) -> None:
+        self._script: AsyncScript | None = None
+        self._redis: Redis | None = None
+
+    async def acquire(self, buckets: Sequence[Tuple[str, RateLimit]]) -> Tuple[float, int]:
+        redis = get_redis()
+        if self._script is None or self._redis is not redis:
+            # EVALSHA с автоматическим SCRIPT LOAD при первом промахе: один round trip на запрос
+            self._script, self._redis = redis.register_script(TOKEN_BUCKET_LUA), redis
+
+        args = []
+        for _, limit in buckets:
+            args.extend((limit.capacity, repr(limit.rate_per_ms)))
+
+        allowed, wait_ms, failed = await self._script(keys=[key for key, _ in buckets], args=args)
+        return (0, 0) if allowed else (wait_ms / 1000, failed - 1)
+
+
+ProxyNetworks = Tuple[ipaddress.IPv4Network | ipaddress.IPv6Network, ...]
+
+
+def parse_trusted_proxies(proxies: Sequence[str]) -> ProxyNetworks:
+    return tuple(ipaddress.ip_network(proxy, strict=False) for proxy in proxies)
+
+
+def _is_trusted(address: str, trusted_proxies: ProxyNetworks) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies)
+
+
+def _client_ip(scope: Scope, trusted_proxies: ProxyNetworks = ()) -> str:
+    client = scope.get('client')
+    peer = client[0] if client else 'unknown'
+    if not _is_trusted(peer, trusted_proxies):
+        return peer
+
+    # каждый прокси дописывает справа адрес, от которого получил запрос: идем справа налево мимо своих
+    # прокси, первый чужой адрес - клиент. Левее него значения задает сам клиент, им верить нельзя
+    forwarded = [
+        address.strip()
+        for header, value in scope['headers']
+        if header == b'x-forwarded-for'
+        for address in value.decode('latin-1').split(',')
+        if address.strip()
+    ]
+    for address in reversed(forwarded):
+        if not _is_trusted(address, trusted_proxies):
+            return address
+    return forwarded[0] if forwarded else peer
+
+
+def _user_id(scope: Scope) -> int | None:
+    # подпись проверяется только при первом появлении токена, повторные запросы берут claims из LRU;
+    # невалидный токен отклонит сам эндпоинт, а здесь запрос считается только по ip
+    for header, value in scope['headers']:
+        if header == b'authorization':
+            try:
+                return jwt_auth.decode_token(value.decode().removeprefix('Bearer '))['user_id']
+            except (HTTPException, KeyError, UnicodeDecodeError):
+                return None
+    return None
+
+
+async def _reject(
+    scope: Scope, receive: Receive, send: Send, status_code: int, retry_after: float, detail: str
+) -> None:
+    response = ORJSONResponse(
+        {'detail': detail},
+        status_code=status_code,
+        headers={'Retry-After': str(max(1, math.ceil(retry_after)))},
+    )
+    await response(scope, receive, send)
+
+
+class RateLimitMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: Limiter | None = None,
+        rules: Dict[str, List[str]] | None = None,
+        trusted_proxies: List[str] | None = None,
+    ):
+        self.app = app
+        self.limiter = limiter or RedisTokenBucket()
+        self.rules = parse_rate_limits(settings.RATE_LIMITS if rules is None else rules)
+        self.trusted_proxies = parse_trusted_proxies(
+            settings.TRUSTED_PROXIES if trusted_proxies is None else trusted_proxies
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limits = self.rules.get(scope['path']) if scope['type'] == 'http' else None
+        if not limits or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        route = scope['path']
+        identities = {SCOPE_IP: _client_ip(scope, self.trusted_proxies)}
+        if any(limit.scope == SCOPE_USER for limit in limits):
+            user_id = _user_id(scope)
+            if user_id is not None:
+                identities[SCOPE_USER] = str(user_id)
+
+        buckets = [
+            (get_rate_limit_key(route, limit.scope, identities[limit.scope]), limit)
+            for limit in limits
+            if limit.scope in identities
+        ]
+
+        if not buckets:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            retry_after, failed = await self.limiter.acquire(buckets)
+        except RedisError as e:
+            # Redis недоступен - пропускаем: ограничение частоты не должно ронять сервис
+            logger.warning('Ограничение частоты пропущено: %s', e)
+            retry_after, failed = 0, 0
+
+        if retry_after:
+            _, limit = buckets[failed]
+            ADMISSION_REJECTED.labels(route=route, reason=f'rate_limit_{limit.scope}').inc()
+            await _reject(
+                scope, receive, send, status.HTTP_429_TOO_MANY_REQUESTS, retry_after, 'Слишком много запросов'
+            )
+            return
+
+        await self.app(scope, receive, send)
+
+
+class ConcurrencyLimitMiddleware:
+    # глобальный предел одновременных запросов процесса: лишние сразу получают 503,
+    # а не встают в очередь к пулу соединений БД и потокам хранилища
+    def __init__(self, app: ASGIApp, max_in_flight: int | None = None):
+        self.app = app
+        self.max_in_flight = max_in_flight or settings.MAX_IN_FLIGHT
+        self.exempt = frozenset(settings.IN_FLIGHT_EXEMPT_PATHS)
+        self.in_flight = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or scope['path'] in self.exempt:
+            await self.app(scope, receive, send)
+            return
+
+        if self.in_flight >= self.max_in_flight:
+            ADMISSION_REJECTED.labels(route='*', reason='overload').inc()
+            await _reject(scope, receive, send, status.HTTP_503_SERVICE_UNAVAILABLE, 1, 'Сервис перегружен')
+            return
+
+        self.in_flight += 1
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            IN_FLIGHT.dec()
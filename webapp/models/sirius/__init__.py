@@ -1 +1 @@
-from . import file, user
+from . import blob, file, file_calendar, file_derivative, user
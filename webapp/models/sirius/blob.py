@@ -0,0 +1,60 @@
+from sqlalchemy import DDL, BigInteger, DateTime, Integer, String, event, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from webapp.models.meta import DEFAULT_SCHEMA, Base
+from webapp.models.sirius.file import File
+
+
+# содержимое файла, хранится один раз под ключом из sha256; ref_count - число строк sirius.file,
+# которые на него ссылаются, поддерживается триггерами на sirius.file
+class Blob(Base):
+    __tablename__ = 'blob'
+    __table_args__ = {'schema': DEFAULT_SCHEMA}
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    bucket: Mapped[str] = mapped_column(String, nullable=False)
+    key: Mapped[str] = mapped_column(String, nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    content_type: Mapped[str] = mapped_column(String, nullable=False)
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    created_at: Mapped[DateTime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+    # когда ref_count стал нулевым (или строка создана загрузкой, еще не вставившей файл); NULL - на blob есть ссылки
+    released_at: Mapped[DateTime | None] = mapped_column(DateTime, nullable=True)
+
+
+BLOB_TRIGGER_DDL = [
+    '''
+    CREATE OR REPLACE FUNCTION sirius.blob_refs_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE sirius.blob AS b
+            SET ref_count = b.ref_count + d.count, released_at = NULL
+            FROM (SELECT blob_sha256, count(*) AS count FROM new_rows WHERE blob_sha256 IS NOT NULL GROUP BY 1) AS d
+            WHERE b.sha256 = d.blob_sha256;
+        ELSE
+            UPDATE sirius.blob AS b
+            SET ref_count = b.ref_count - d.count,
+                released_at = CASE WHEN b.ref_count - d.count <= 0 THEN now() END
+            FROM (SELECT blob_sha256, count(*) AS count FROM old_rows WHERE blob_sha256 IS NOT NULL GROUP BY 1) AS d
+            WHERE b.sha256 = d.blob_sha256;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    ''',
+    'DROP TRIGGER IF EXISTS blob_refs_insert ON sirius.file',
+    '''
+    CREATE TRIGGER blob_refs_insert AFTER INSERT ON sirius.file
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sirius.blob_refs_apply()
+    ''',
+    'DROP TRIGGER IF EXISTS blob_refs_delete ON sirius.file',
+    '''
+    CREATE TRIGGER blob_refs_delete AFTER DELETE ON sirius.file
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sirius.blob_refs_apply()
+    ''',
+]
+
+for statement in BLOB_TRIGGER_DDL:
+    event.listen(File.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
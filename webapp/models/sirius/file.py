@@ -1,4 +1,4 @@
-from sqlalchemy import BigInteger, DateTime, ForeignKey, Integer, String, func
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from webapp.models.meta import DEFAULT_SCHEMA, Base
@@ -6,12 +6,19 @@ from webapp.models.meta import DEFAULT_SCHEMA, Base
 
 class File(Base):
     __tablename__ = 'file'
-    __table_args__ = ({'schema': DEFAULT_SCHEMA},)
+    __table_args__ = (
+        # листинг пользователя с keyset-пагинацией: WHERE user_id = ? AND (upload_date, id) < (?, ?)
+        Index('ix_file_user_id_upload_date_id', 'user_id', 'upload_date', 'id'),
+        {'schema': DEFAULT_SCHEMA},
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey('user.id'), nullable=False)
     file_name: Mapped[str] = mapped_column(String, nullable=False)
     file_path: Mapped[str] = mapped_column(String, nullable=False)
+    bucket: Mapped[str | None] = mapped_column(String, nullable=True)  # NULL - старый персональный бакет user-{id}
     file_type: Mapped[str] = mapped_column(String, nullable=False)
     file_size: Mapped[int] = mapped_column(BigInteger, nullable=False)
     upload_date: Mapped[DateTime] = mapped_column(DateTime, nullable=False, default=func.now())
+    # NULL - файл загружен до content-раскладки и лежит по file_path в своем бакете
+    blob_sha256: Mapped[str | None] = mapped_column(String(64), ForeignKey('blob.sha256'), nullable=True)
@@ -0,0 +1,89 @@
+from sqlalchemy import DDL, ForeignKey, Integer, SmallInteger, event
+from sqlalchemy.orm import Mapped, mapped_column
+
+from webapp.models.meta import DEFAULT_SCHEMA, Base
+from webapp.models.sirius.file import File
+
+
+# гистограмма загрузок пользователя по дням для пикера год -> месяц -> день;
+# поддерживается триггерами на sirius.file, пересобирается scripts/rebuild_calendar.py
+class FileCalendar(Base):
+    __tablename__ = 'file_calendar'
+    __table_args__ = {'schema': DEFAULT_SCHEMA}
+
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey('user.id'), primary_key=True)
+    year: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    month: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    day: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+# триггеры уровня оператора: пакетная вставка альбома дает один upsert на день, а не на файл.
+# user_id и upload_date у файла не меняются, поэтому UPDATE не отслеживается
+CALENDAR_TRIGGER_DDL = [
+    '''
+    CREATE OR REPLACE FUNCTION sirius.file_calendar_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO sirius.file_calendar AS c (user_id, year, month, day, count)
+            SELECT user_id,
+                   extract(year FROM upload_date)::smallint,
+                   extract(month FROM upload_date)::smallint,
+                   extract(day FROM upload_date)::smallint,
+                   count(*)
+            FROM new_rows
+            GROUP BY 1, 2, 3, 4
+            ORDER BY 1, 2, 3, 4
+            ON CONFLICT (user_id, year, month, day) DO UPDATE SET count = c.count + excluded.count;
+        ELSE
+            UPDATE sirius.file_calendar AS c
+            SET count = c.count - d.count
+            FROM (
+                SELECT user_id,
+                       extract(year FROM upload_date)::smallint AS year,
+                       extract(month FROM upload_date)::smallint AS month,
+                       extract(day FROM upload_date)::smallint AS day,
+                       count(*) AS count
+                FROM old_rows
+                GROUP BY 1, 2, 3, 4
+            ) AS d
+            WHERE c.user_id = d.user_id AND c.year = d.year AND c.month = d.month AND c.day = d.day;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    ''',
+    'DROP TRIGGER IF EXISTS file_calendar_insert ON sirius.file',
+    '''
+    CREATE TRIGGER file_calendar_insert AFTER INSERT ON sirius.file
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sirius.file_calendar_apply()
+    ''',
+    'DROP TRIGGER IF EXISTS file_calendar_delete ON sirius.file',
+    '''
+    CREATE TRIGGER file_calendar_delete AFTER DELETE ON sirius.file
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sirius.file_calendar_apply()
+    ''',
+]
+
+for statement in CALENDAR_TRIGGER_DDL:
+    event.listen(File.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+
+# триггеры уже стоят - гистограмма ведется; иначе ее нужно пересобрать вместе с установкой триггеров
+CALENDAR_INSTALLED_SQL = '''
+    SELECT EXISTS (
+        SELECT 1 FROM pg_trigger WHERE tgrelid = 'sirius.file'::regclass AND tgname = 'file_calendar_insert'
+    )
+'''
+
+REBUILD_CALENDAR_SQL = '''
+    INSERT INTO sirius.file_calendar (user_id, year, month, day, count)
+    SELECT user_id,
+           extract(year FROM upload_date)::smallint,
+           extract(month FROM upload_date)::smallint,
+           extract(day FROM upload_date)::smallint,
+           count(*)
+    FROM sirius.file
+    GROUP BY 1, 2, 3, 4
+'''
@@ -0,0 +1,23 @@
+from sqlalchemy import BigInteger, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from webapp.models.meta import DEFAULT_SCHEMA, Base
+
+
+class FileDerivative(Base):
+    # уменьшенные копии изображения, лежат в том же бакете рядом с оригиналом
+    __tablename__ = 'file_derivative'
+    __table_args__ = (
+        # выбор ближайшего размера: WHERE file_id = ? AND width >= ? ORDER BY width LIMIT 1
+        UniqueConstraint('file_id', 'width', name='uq_file_derivative_file_id_width'),
+        {'schema': DEFAULT_SCHEMA},
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    file_id: Mapped[int] = mapped_column(Integer, ForeignKey('file.id', ondelete='CASCADE'), nullable=False)
+    width: Mapped[int] = mapped_column(Integer, nullable=False)
+    height: Mapped[int] = mapped_column(Integer, nullable=False)
+    bucket: Mapped[str] = mapped_column(String, nullable=False)
+    key: Mapped[str] = mapped_column(String, nullable=False)
+    content_type: Mapped[str] = mapped_column(String, nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
@@ -1,8 +1,59 @@
-from webapp.db import kafka
+import asyncio
+import contextlib
+
+from webapp import logger
+from webapp.cache.rabbit import refill
+from webapp.db import kafka, postgres, storage
+from webapp.utils.auth import revocation
+from webapp.worker import thumbnails
 
 
 async def stop_producer() -> None:
     await kafka.producer.stop()
 
+
+async def stop_storage() -> None:
+    await storage.storage.close()
+
+
+async def stop_thumbnails() -> None:
+    thumbnails.stop_pool()
+
+
+async def stop_feed_refill() -> None:
+    if refill.refill_task is None:
+        return
+    refill.refill_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await refill.refill_task
+    refill.refill_task = None
+
+
+async def stop_revocations() -> None:
+    if revocation.listener_task is None:
+        return
+    revocation.listener_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await revocation.listener_task
+    revocation.listener_task = None
+
+
+async def stop_replica_health() -> None:
+    if postgres.replica_health_task is None:
+        return
+    postgres.replica_health_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await postgres.replica_health_task
+    postgres.replica_health_task = None
+    await postgres.replica_engine.dispose()
+
+
+async def stop_logger() -> None:
+    # дописываем все, что осталось в очереди
+    if logger.log_listener is None:
+        return
+    logger.log_listener.stop()
+    logger.log_listener = None
+
 # async def stop_rabbit() -> None:
 #     await rabbitmq.channel.close()
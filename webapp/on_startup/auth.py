@@ -0,0 +1,9 @@
+import asyncio
+
+from webapp.utils.auth import revocation
+
+
+async def start_revocations() -> None:
+    # первая загрузка до приема запросов, дальше изменения приходят через pub/sub
+    await revocation.load_revocations()
+    revocation.listener_task = asyncio.create_task(revocation.listen_revocations())
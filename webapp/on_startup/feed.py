@@ -0,0 +1,9 @@
+import asyncio
+
+from conf.config import settings
+from webapp.cache.rabbit import refill
+
+
+async def start_feed_refill() -> None:
+    if settings.FEED_REFILL_ENABLED:
+        refill.refill_task = asyncio.create_task(refill.run_refill_loop())
@@ -1,7 +1,19 @@
+from aiokafka import AIOKafkaProducer
+
+from conf.config import settings
+from webapp.db import kafka
+
+
 async def create_producer() -> None:
-    pass
-    # kafka.producer = AIOKafkaProducer(bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS)
-    #
-    # await kafka.producer.start()
-    #
-    # kafka.partitions = list(await kafka.producer.partitions_for(settings.KAFKA_TOPIC))
+    kafka.producer = AIOKafkaProducer(
+        bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
+        linger_ms=settings.KAFKA_LINGER_MS,
+        max_batch_size=settings.KAFKA_MAX_BATCH_SIZE,
+        compression_type=settings.KAFKA_COMPRESSION,
+        max_request_size=settings.KAFKA_MAX_REQUEST_SIZE,
+    )
+
+    await kafka.producer.start()
+
+    # партиции упорядочены, чтобы хэш ключа давал одну и ту же партицию во всех процессах
+    kafka.partitions = sorted(await kafka.producer.partitions_for(settings.KAFKA_TOPIC))
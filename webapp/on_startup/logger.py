@@ -1,11 +1,31 @@
+import copy
+import queue
 import logging.config
+from logging.handlers import QueueListener
 
 from conf.config import settings
-from webapp.logger import LOGGING_CONFIG, logger
+from webapp import logger as log
+from webapp.logger import LOGGING_CONFIG, CorrelationIdFilter, NonBlockingQueueHandler, SamplingFilter, logger
 
 
 def setup_logger() -> None:
-    logging.config.dictConfig(LOGGING_CONFIG)
+    if log.log_listener is not None:
+        log.log_listener.stop()
 
-    if settings.LOG_LEVEL == 'INFO':
-        logger.setLevel(logging.DEBUG)
+    config = copy.deepcopy(LOGGING_CONFIG)
+    config['handlers']['console']['formatter'] = settings.LOG_FORMAT
+    logging.config.dictConfig(config)
+    logger.setLevel(settings.LOG_LEVEL)
+
+    # обработчики из конфига переезжают в QueueListener, у корневого логгера остается только очередь
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    log_queue: queue.Queue = queue.Queue(settings.LOG_QUEUE_SIZE)
+
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+    handler.addFilter(CorrelationIdFilter())
+    root.handlers = [handler]
+
+    log.log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    log.log_listener.start()
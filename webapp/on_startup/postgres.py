@@ -0,0 +1,8 @@
+import asyncio
+
+from webapp.db import postgres
+
+
+async def start_replica_health() -> None:
+    if postgres.replica_engine is not None:
+        postgres.replica_health_task = asyncio.create_task(postgres.run_replica_health_loop())
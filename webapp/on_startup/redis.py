@@ -1,4 +1,4 @@
-from redis.asyncio import ConnectionPool, Redis
+from redis.asyncio import ConnectionPool
 
 from conf.config import settings
 from webapp.db import redis
@@ -10,7 +10,7 @@ async def start_redis() -> None:
         port=settings.REDIS_PORT,
         password=settings.REDIS_PASSWORD,
     )
-    redis.redis = Redis(
+    redis.redis = redis.InstrumentedRedis(
         connection_pool=pool,
     )
 
@@ -0,0 +1,30 @@
+from conf.config import settings
+from webapp.db import storage
+from webapp.storage.base import Storage
+from webapp.storage.instrumented import InstrumentedStorage
+from webapp.storage.memory import InMemoryStorage
+
+
+def create_storage() -> Storage:
+    if settings.STORAGE_BACKEND == 'memory':
+        return InMemoryStorage()
+
+    from webapp.storage.minio import MinioStorage
+
+    return MinioStorage(
+        f'{settings.MINIO_HOST}:{settings.MINIO_PORT}',
+        access_key=settings.MINIO_ACCESS_KEY,
+        secret_key=settings.MINIO_SECRET_KEY,
+        secure=settings.MINIO_SECURE,
+        region=settings.MINIO_REGION,
+        public_url=settings.MINIO_PUBLIC_URL,
+        pool_size=settings.MINIO_POOL_SIZE,
+        timeout=settings.MINIO_TIMEOUT,
+        retries=settings.MINIO_RETRIES,
+        retry_backoff=settings.MINIO_RETRY_BACKOFF,
+        parallel_uploads=settings.MINIO_PARALLEL_UPLOADS,
+    )
+
+
+async def start_storage() -> None:
+    storage.storage = InstrumentedStorage(create_storage(), dependency=settings.STORAGE_BACKEND)
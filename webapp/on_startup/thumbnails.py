@@ -0,0 +1,7 @@
+from conf.config import settings
+from webapp.worker import thumbnails
+
+
+async def start_thumbnails() -> None:
+    if settings.THUMBNAIL_ENABLED:
+        thumbnails.start_pool()
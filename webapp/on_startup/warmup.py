@@ -0,0 +1,49 @@
+import os
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from conf.config import settings
+from webapp.db import postgres
+from webapp.db.redis import get_redis
+from webapp.db.storage import get_storage
+from webapp.logger import logger
+
+
+async def fill_pool(engine: AsyncEngine, size: int) -> None:
+    # соединения держатся одновременно, иначе пул выдавал бы одно и то же;
+    # после возврата пул оставляет у себя до pool_size штук
+    async def ping() -> None:
+        async with engine.connect() as connection:
+            await connection.execute(text('SELECT 1'))
+
+    await asyncio.gather(*(ping() for _ in range(size)))
+
+
+async def warm_up() -> None:
+    # lifespan завершается раньше, чем воркер начинает принимать соединения:
+    # первые запросы не платят за TCP/TLS и авторизацию в каждой зависимости
+    if not settings.WARMUP_ENABLED:
+        return
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+
+    engines = [postgres.engine]
+    if postgres.replica_engine is not None and postgres.replica_healthy:
+        engines.append(postgres.replica_engine)
+
+    # недоступная зависимость не должна валить воркер: супервизор остановился бы целиком,
+    # а запросы к остальным зависимостям могут работать
+    results = await asyncio.gather(
+        *(fill_pool(engine, settings.DB_POOL_SIZE) for engine in engines),
+        get_redis().ping(),
+        get_storage().bucket_exists(settings.BLOB_BUCKET),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning('Прогрев: зависимость недоступна: %r', result)
+
+    logger.info('Прогрев воркера %s завершен за %.3f с', os.getpid(), loop.time() - start)
@@ -1,7 +1,7 @@
 from datetime import date, datetime
-from typing import List
+from typing import List, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from pydantic import validator
 
 
@@ -16,15 +16,35 @@ class File(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class Thumbnail(BaseModel):
+    width: int
+    url: str
+
+
 class FileSchemaWithURL(File):
     download_url: str
+    thumbnails: List[Thumbnail] = []
+
+
+class FilePage(BaseModel):
+    items: List[FileSchemaWithURL]
+    next_cursor: Optional[str] = None
 
 
 class FillQueue(BaseModel):
     user_ids: List[int]
+    per_user: int = Field(100, ge=1, le=10_000)  # сколько случайных файлов отправить каждому пользователю
+
+
+class FileFromBlob(BaseModel):
+    sha256: str = Field(..., pattern=r'^[0-9a-f]{64}$')
+    file_name: str = Field(..., min_length=1)
+    file_type: Optional[str] = None  # по умолчанию - тип, с которым blob был загружен впервые
 
 
 class FileDownload(File):
+    user_id: int
+    bucket: Optional[str] = None
     file_path: str
     file_type: str
 
@@ -38,6 +58,8 @@ class FileCreate(BaseModel):
     file_type: str
     file_size: int
     upload_date: date
+    bucket: Optional[str] = None
+    blob_sha256: Optional[str] = None
 
     @validator('user_id')
     def validate_user_id(cls, value):
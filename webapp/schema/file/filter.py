@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+
+class CalendarBucket(BaseModel):
+    value: int
+    count: int
@@ -0,0 +1,12 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ResizeTask(BaseModel):
+    task_id: str
+    status: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+    url: Optional[str] = None
+    detail: Optional[str] = None
@@ -0,0 +1,84 @@
+import os
+import shutil
+import multiprocessing
+from typing import Any, Dict
+
+from fastapi import FastAPI
+from gunicorn.app.base import BaseApplication
+from gunicorn.arbiter import Arbiter
+from gunicorn.workers.base import Worker
+from uvicorn.workers import UvicornWorker
+
+from conf.config import settings
+
+# прод-запуск: python -m webapp.server
+# Супервизор gunicorn держит SERVER_WORKERS процессов uvicorn на общем сокете, перезапускает упавшие
+# и после SERVER_MAX_REQUESTS (+ jitter) запросов заменяет воркер новым, чтобы утечки не копились.
+# Приложение создается в каждом воркере после fork: пулы БД, Redis и хранилища у каждого процесса свои.
+
+
+class SiriusWorker(UvicornWorker):
+    # явно, а не auto: без uvloop и httptools воркер не стартует вместо тихого перехода на asyncio и h11;
+    # lifespan on - ошибка старта (и прогрева) останавливает воркер до приема запросов
+    CONFIG_KWARGS: Dict[str, Any] = {'loop': 'uvloop', 'http': 'httptools', 'lifespan': 'on'}
+
+
+def prepare_metrics_dir(path: str) -> None:
+    # файлы прошлого запуска дали бы метрикам мертвых pid вечную жизнь
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def on_starting(server: Arbiter) -> None:
+    prepare_metrics_dir(os.environ['PROMETHEUS_MULTIPROC_DIR'])
+
+
+def child_exit(server: Arbiter, worker: Worker) -> None:
+    # live-gauges умершего воркера больше не суммируются
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def get_options() -> Dict[str, Any]:
+    return {
+        'bind': f'{settings.BIND_IP}:{settings.BIND_PORT}',
+        'workers': settings.SERVER_WORKERS or multiprocessing.cpu_count(),
+        'worker_class': 'webapp.server.SiriusWorker',
+        'max_requests': settings.SERVER_MAX_REQUESTS,
+        'max_requests_jitter': settings.SERVER_MAX_REQUESTS_JITTER,
+        'timeout': settings.SERVER_TIMEOUT,
+        'graceful_timeout': settings.SERVER_GRACEFUL_TIMEOUT,
+        'keepalive': settings.SERVER_KEEPALIVE,
+        'backlog': settings.SERVER_BACKLOG,
+        'preload_app': False,
+        'on_starting': on_starting,
+        'child_exit': child_exit,
+    }
+
+
+class Server(BaseApplication):
+    def __init__(self, options: Dict[str, Any]) -> None:
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self) -> FastAPI:
+        # вызывается в воркере после fork
+        from webapp.main import create_app
+
+        return create_app()
+
+
+def main() -> None:
+    # prometheus_client выбирает хранилище значений при импорте, поэтому каталог задается
+    # до того, как что-либо импортирует webapp.metrics
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = settings.PROMETHEUS_MULTIPROC_DIR
+    Server(get_options()).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import AsyncIterator, BinaryIO, Dict
+
+
+class StorageError(Exception):
+    pass
+
+
+class ObjectNotFoundError(StorageError):
+    pass
+
+
+@dataclass(frozen=True)
+class ObjectInfo:
+    bucket: str
+    name: str
+    size: int
+    etag: str
+    content_type: str | None = None
+    last_modified: datetime | None = None
+
+
+class Storage(ABC):
+    # асинхронный интерфейс объектного хранилища; реализации: minio (прод) и in-memory (тесты, бенчмарки)
+
+    @abstractmethod
+    async def bucket_exists(self, bucket: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def make_bucket(self, bucket: str) -> None:
+        ...
+
+    @abstractmethod
+    async def put_object(
+        self,
+        bucket: str,
+        name: str,
+        data: BinaryIO,
+        content_type: str | None = None,
+        part_size: int = 5 * 1024 * 1024,
+    ) -> ObjectInfo:
+        # data читается кусками по part_size, длина заранее неизвестна
+        ...
+
+    @abstractmethod
+    async def stat_object(self, bucket: str, name: str) -> ObjectInfo:
+        ...
+
+    @abstractmethod
+    async def get_object_stream(
+        self,
+        bucket: str,
+        name: str,
+        offset: int = 0,
+        length: int | None = None,
+        chunk_size: int = 64 * 1024,
+    ) -> AsyncIterator[bytes]:
+        # объект открывается сразу (ошибки видны до начала ответа), байты читаются лениво
+        ...
+
+    @abstractmethod
+    async def copy_object(self, bucket: str, name: str, source_bucket: str, source_name: str) -> None:
+        ...
+
+    @abstractmethod
+    async def presigned_get_url(
+        self,
+        bucket: str,
+        name: str,
+        expires: timedelta,
+        response_headers: Dict[str, str] | None = None,
+    ) -> str:
+        ...
+
+    @abstractmethod
+    async def remove_object(self, bucket: str, name: str) -> None:
+        ...
+
+    async def get_object(self, bucket: str, name: str) -> bytes:
+        return b''.join([chunk async for chunk in await self.get_object_stream(bucket, name)])
+
+    async def close(self) -> None:
+        return None
@@ -0,0 +1,68 @@
+from datetime import timedelta
+from typing import AsyncIterator, BinaryIO, Dict
+
+from webapp.metrics import track_dependency
+from webapp.storage.base import ObjectInfo, Storage
+
+
+class InstrumentedStorage(Storage):
+    # обертка над любой реализацией: время каждого вызова пишется в метрики зависимости;
+    # для get_object_stream замеряется открытие объекта (до первого байта), чтение тела - нет
+    def __init__(self, storage: Storage, dependency: str = 'minio') -> None:
+        self.storage = storage
+        self.dependency = dependency
+
+    async def bucket_exists(self, bucket: str) -> bool:
+        with track_dependency(self.dependency, 'bucket_exists'):
+            return await self.storage.bucket_exists(bucket)
+
+    async def make_bucket(self, bucket: str) -> None:
+        with track_dependency(self.dependency, 'make_bucket'):
+            await self.storage.make_bucket(bucket)
+
+    async def put_object(
+        self,
+        bucket: str,
+        name: str,
+        data: BinaryIO,
+        content_type: str | None = None,
+        part_size: int = 5 * 1024 * 1024,
+    ) -> ObjectInfo:
+        with track_dependency(self.dependency, 'put_object'):
+            return await self.storage.put_object(bucket, name, data, content_type, part_size)
+
+    async def stat_object(self, bucket: str, name: str) -> ObjectInfo:
+        with track_dependency(self.dependency, 'stat_object'):
+            return await self.storage.stat_object(bucket, name)
+
+    async def get_object_stream(
+        self,
+        bucket: str,
+        name: str,
+        offset: int = 0,
+        length: int | None = None,
+        chunk_size: int = 64 * 1024,
+    ) -> AsyncIterator[bytes]:
+        with track_dependency(self.dependency, 'get_object'):
+            return await self.storage.get_object_stream(bucket, name, offset, length, chunk_size)
+
+    async def copy_object(self, bucket: str, name: str, source_bucket: str, source_name: str) -> None:
+        with track_dependency(self.dependency, 'copy_object'):
+            await self.storage.copy_object(bucket, name, source_bucket, source_name)
+
+    async def presigned_get_url(
+        self,
+        bucket: str,
+        name: str,
+        expires: timedelta,
+        response_headers: Dict[str, str] | None = None,
+    ) -> str:
+        with track_dependency(self.dependency, 'presigned_get_url'):
+            return await self.storage.presigned_get_url(bucket, name, expires, response_headers)
+
+    async def remove_object(self, bucket: str, name: str) -> None:
+        with track_dependency(self.dependency, 'remove_object'):
+            await self.storage.remove_object(bucket, name)
+
+    async def close(self) -> None:
+        await self.storage.close()
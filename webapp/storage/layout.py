@@ -0,0 +1,105 @@
+import uuid
+import zlib
+import hashlib
+from dataclasses import dataclass
+from datetime import date
+from pathlib import PurePosixPath
+from typing import Set
+
+from conf.config import settings
+from webapp.storage.base import Storage
+
+LAYOUT_PER_USER = 'per_user'
+LAYOUT_SHARDED = 'sharded'
+LAYOUT_CONTENT = 'content'
+
+# сигнатуры в начале файла -> расширение ключа blob; расширение зависит только от содержимого,
+# поэтому ключ однозначно определяется sha256
+MAGIC_EXTENSIONS = (
+    (b'\xff\xd8\xff', '.jpg'),
+    (b'\x89PNG\r\n\x1a\n', '.png'),
+    (b'GIF87a', '.gif'),
+    (b'GIF89a', '.gif'),
+    (b'%PDF-', '.pdf'),
+)
+
+# бакеты, существование которых уже проверено в этом процессе
+_known_buckets: Set[str] = set()
+
+
+@dataclass(frozen=True)
+class ObjectLocation:
+    bucket: str
+    key: str
+
+
+def legacy_bucket(user_id: int) -> str:
+    return f'user-{user_id}'
+
+
+def shared_bucket(user_id: int) -> str:
+    buckets = settings.STORAGE_SHARED_BUCKETS
+    return buckets[zlib.crc32(str(user_id).encode()) % len(buckets)]
+
+
+def sharded_key(user_id: int, upload_date: date, object_id: str, file_name: str) -> str:
+    # ab/cd/{user_id}/{date}/{object_id}.ext - префикс из хэша равномерно раскладывает объекты по партициям
+    digest = hashlib.md5(f'{user_id}/{object_id}'.encode()).hexdigest()
+    suffix = PurePosixPath(file_name).suffix.lower()
+    return f'{digest[:2]}/{digest[2:4]}/{user_id}/{upload_date.isoformat()}/{object_id}{suffix}'
+
+
+def new_location(
+    user_id: int,
+    file_name: str,
+    upload_date: date | None = None,
+    object_id: str | None = None,
+) -> ObjectLocation:
+    upload_date = upload_date or date.today()
+
+    if settings.STORAGE_LAYOUT == LAYOUT_SHARDED:
+        return ObjectLocation(
+            bucket=shared_bucket(user_id),
+            key=sharded_key(user_id, upload_date, object_id or uuid.uuid4().hex, file_name),
+        )
+
+    return ObjectLocation(bucket=legacy_bucket(user_id), key=f'{upload_date.isoformat()}/{file_name}')
+
+
+def locate(user_id: int, file_path: str, bucket: str | None = None) -> ObjectLocation:
+    # строки без bucket загружены до появления раскладок и лежат в персональном бакете
+    return ObjectLocation(bucket=bucket or legacy_bucket(user_id), key=file_path)
+
+
+async def ensure_bucket(storage: Storage, bucket: str) -> None:
+    if bucket in _known_buckets:
+        return
+
+    if not await storage.bucket_exists(bucket):
+        await storage.make_bucket(bucket)
+
+    _known_buckets.add(bucket)
+
+
+def resized_location(digest: str, width: int, height: int) -> ObjectLocation:
+    # адрес результата зависит только от содержимого и размеров, поэтому одинаковый ресайз
+    # всегда попадает в один объект и может быть найден без Redis
+    return ObjectLocation(bucket=settings.RESIZE_BUCKET, key=f'{digest[:2]}/{digest}/{width}x{height}')
+
+
+def derivative_location(original: ObjectLocation, width: int, extension: str) -> ObjectLocation:
+    # превью лежит рядом с оригиналом: тот же бакет и ключ с суффиксом ширины
+    return ObjectLocation(bucket=original.bucket, key=f'{original.key}@{width}w.{extension}')
+
+
+def content_extension(head: bytes) -> str:
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return '.webp'
+    for magic, extension in MAGIC_EXTENSIONS:
+        if head.startswith(magic):
+            return extension
+    return ''
+
+
+def blob_location(sha256: str, extension: str = '') -> ObjectLocation:
+    return ObjectLocation(bucket=settings.BLOB_BUCKET, key=f'{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}')
@@ -0,0 +1,93 @@
+import hashlib
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, BinaryIO, Dict, Tuple
+from urllib.parse import quote, urlencode
+
+from webapp.storage.base import ObjectInfo, ObjectNotFoundError, Storage
+
+
+class InMemoryStorage(Storage):
+    def __init__(self) -> None:
+        self.buckets: Dict[str, Dict[str, Tuple[ObjectInfo, bytes]]] = {}
+
+    async def bucket_exists(self, bucket: str) -> bool:
+        return bucket in self.buckets
+
+    async def make_bucket(self, bucket: str) -> None:
+        self.buckets.setdefault(bucket, {})
+
+    async def put_object(
+        self,
+        bucket: str,
+        name: str,
+        data: BinaryIO,
+        content_type: str | None = None,
+        part_size: int = 5 * 1024 * 1024,
+    ) -> ObjectInfo:
+        objects = self._bucket(bucket)
+
+        parts = []
+        while chunk := data.read(part_size):
+            parts.append(chunk)
+        content = b''.join(parts)
+
+        info = ObjectInfo(
+            bucket=bucket,
+            name=name,
+            size=len(content),
+            etag=hashlib.md5(content).hexdigest(),
+            content_type=content_type,
+            last_modified=datetime.now(timezone.utc).replace(microsecond=0),
+        )
+        objects[name] = (info, content)
+        return info
+
+    async def stat_object(self, bucket: str, name: str) -> ObjectInfo:
+        return self._object(bucket, name)[0]
+
+    async def get_object_stream(
+        self,
+        bucket: str,
+        name: str,
+        offset: int = 0,
+        length: int | None = None,
+        chunk_size: int = 64 * 1024,
+    ) -> AsyncIterator[bytes]:
+        _, content = self._object(bucket, name)
+        end = len(content) if length is None else min(offset + length, len(content))
+
+        async def iterate() -> AsyncIterator[bytes]:
+            for position in range(offset, end, chunk_size):
+                yield content[position : min(position + chunk_size, end)]
+
+        return iterate()
+
+    async def copy_object(self, bucket: str, name: str, source_bucket: str, source_name: str) -> None:
+        info, content = self._object(source_bucket, source_name)
+        self._bucket(bucket)[name] = (replace(info, bucket=bucket, name=name), content)
+
+    async def presigned_get_url(
+        self,
+        bucket: str,
+        name: str,
+        expires: timedelta,
+        response_headers: Dict[str, str] | None = None,
+    ) -> str:
+        query = {'expires': int(expires.total_seconds()), **(response_headers or {})}
+        return f'memory://{bucket}/{quote(name)}?{urlencode(query)}'
+
+    async def remove_object(self, bucket: str, name: str) -> None:
+        self._bucket(bucket).pop(name, None)
+
+    def _bucket(self, bucket: str) -> Dict[str, Tuple[ObjectInfo, bytes]]:
+        try:
+            return self.buckets[bucket]
+        except KeyError:
+            raise ObjectNotFoundError(f'bucket {bucket} does not exist')
+
+    def _object(self, bucket: str, name: str) -> Tuple[ObjectInfo, bytes]:
+        try:
+            return self._bucket(bucket)[name]
+        except KeyError:
+            raise ObjectNotFoundError(f'{bucket}/{name} does not exist')
@@ -0,0 +1,161 @@
+import asyncio
+from datetime import timedelta
+from typing import Any, AsyncIterator, Awaitable, BinaryIO, Callable, Dict, TypeVar
+
+import aiohttp
+from miniopy_async import Minio
+from miniopy_async.commonconfig import CopySource
+from miniopy_async.error import S3Error
+
+from webapp.logger import logger
+from webapp.storage.base import ObjectInfo, ObjectNotFoundError, Storage, StorageError
+from webapp.utils.stream import CountingReader
+
+T = TypeVar('T')
+
+NOT_FOUND_CODES = ('NoSuchKey', 'NoSuchBucket', 'NoSuchObject', 'ResourceNotFound')
+
+
+class MinioStorage(Storage):
+    def __init__(
+        self,
+        endpoint: str,
+        access_key: str,
+        secret_key: str,
+        secure: bool = False,
+        region: str | None = None,
+        public_url: str | None = None,
+        pool_size: int = 32,
+        timeout: float = 30.0,
+        retries: int = 3,
+        retry_backoff: float = 0.2,
+        parallel_uploads: int = 1,
+    ) -> None:
+        self.client = Minio(endpoint, access_key=access_key, secret_key=secret_key, secure=secure, region=region)
+        self.public_url = public_url
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.parallel_uploads = parallel_uploads
+        # ограничиваем число одновременных запросов к minio размером пула соединений,
+        # чтобы один медленный объект не съедал все сокеты воркера
+        self._semaphore = asyncio.Semaphore(pool_size)
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=pool_size),
+            timeout=aiohttp.ClientTimeout(connect=timeout, sock_read=timeout),
+        )
+
+    async def bucket_exists(self, bucket: str) -> bool:
+        return await self._call(self.client.bucket_exists, bucket)
+
+    async def make_bucket(self, bucket: str) -> None:
+        try:
+            await self._call(self.client.make_bucket, bucket)
+        except StorageError as e:
+            # бакет мог создать параллельный запрос
+            if not isinstance(e.__cause__, S3Error) or e.__cause__.code != 'BucketAlreadyOwnedByYou':
+                raise
+
+    async def put_object(
+        self,
+        bucket: str,
+        name: str,
+        data: BinaryIO,
+        content_type: str | None = None,
+        part_size: int = 5 * 1024 * 1024,
+    ) -> ObjectInfo:
+        # поток при ошибке уже частично вычитан, поэтому загрузку не повторяем и не ограничиваем общим таймаутом
+        reader = CountingReader(data)
+        result = await self._call(
+            self.client.put_object,
+            bucket,
+            name,
+            reader,
+            -1,
+            content_type=content_type or 'application/octet-stream',
+            part_size=part_size,
+            # по умолчанию библиотека шлет 3 части параллельно и держит в памяти их все
+            num_parallel_uploads=self.parallel_uploads,
+            idempotent=False,
+        )
+        return ObjectInfo(bucket=bucket, name=name, size=reader.size, etag=result.etag, content_type=content_type)
+
+    async def stat_object(self, bucket: str, name: str) -> ObjectInfo:
+        stat = await self._call(self.client.stat_object, bucket, name)
+        return ObjectInfo(
+            bucket=bucket,
+            name=name,
+            size=stat.size,
+            etag=stat.etag,
+            content_type=stat.content_type,
+            last_modified=stat.last_modified,
+        )
+
+    async def get_object_stream(
+        self,
+        bucket: str,
+        name: str,
+        offset: int = 0,
+        length: int | None = None,
+        chunk_size: int = 64 * 1024,
+    ) -> AsyncIterator[bytes]:
+        response = await self._call(
+            self.client.get_object, bucket, name, self._session, offset=offset, length=length or 0
+        )
+
+        async def iterate() -> AsyncIterator[bytes]:
+            try:
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    yield chunk
+            finally:
+                response.release()
+
+        return iterate()
+
+    async def copy_object(self, bucket: str, name: str, source_bucket: str, source_name: str) -> None:
+        await self._call(self.client.copy_object, bucket, name, CopySource(source_bucket, source_name))
+
+    async def presigned_get_url(
+        self,
+        bucket: str,
+        name: str,
+        expires: timedelta,
+        response_headers: Dict[str, str] | None = None,
+    ) -> str:
+        # подпись считается локально: регион задан в клиенте, запросов в minio нет
+        return await self.client.presigned_get_object(
+            bucket, name, expires=expires, response_headers=response_headers, change_host=self.public_url
+        )
+
+    async def remove_object(self, bucket: str, name: str) -> None:
+        await self._call(self.client.remove_object, bucket, name)
+
+    async def close(self) -> None:
+        await self._session.close()
+
+    async def _call(
+        self,
+        func: Callable[..., Awaitable[T]],
+        *args: Any,
+        idempotent: bool = True,
+        **kwargs: Any,
+    ) -> T:
+        # идемпотентные запросы ограничены таймаутом и повторяются с экспоненциальной задержкой
+        attempts = self.retries + 1 if idempotent else 1
+        deadline = self.timeout if idempotent else None
+
+        async with self._semaphore:
+            for attempt in range(attempts):
+                try:
+                    return await asyncio.wait_for(func(*args, **kwargs), deadline)
+                except S3Error as e:
+                    if e.code in NOT_FOUND_CODES:
+                        raise ObjectNotFoundError(str(e)) from e
+                    raise StorageError(str(e)) from e
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    if attempt == attempts - 1:
+                        raise StorageError(f'{func.__name__}: {e!r}') from e
+                    logger.warning('Повтор запроса к minio %s (%s/%s): %r', func.__name__, attempt + 1, attempts - 1, e)
+                    await asyncio.sleep(self.retry_backoff * 2**attempt)
+
+        raise StorageError(func.__name__)  # pragma: no cover
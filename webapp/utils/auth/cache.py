@@ -0,0 +1,43 @@
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict
+
+
+class TokenCache:
+    # LRU уже проверенных токенов: digest токена -> claims, запись живет до exp.
+    # Подпись проверяется один раз на токен, а не на каждый запрос
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._items: OrderedDict[bytes, Dict[str, Any]] = OrderedDict()
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get(self, token: str) -> Dict[str, Any] | None:
+        digest = self._digest(token)
+        claims = self._items.get(digest)
+        if claims is None:
+            return None
+
+        if claims['exp'] <= time.time():
+            del self._items[digest]
+            return None
+
+        self._items.move_to_end(digest)
+        return claims
+
+    def put(self, token: str, claims: Dict[str, Any]) -> None:
+        if 'exp' not in claims:
+            return
+
+        self._items[self._digest(token)] = claims
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
@@ -1,6 +1,7 @@
+import time
 import uuid
-from dataclasses import dataclass
-from datetime import datetime, timedelta
+from dataclasses import dataclass, field
+from datetime import datetime
 from typing import Annotated, cast
 from typing_extensions import TypedDict
 
@@ -11,6 +12,8 @@ from jose import JWTError, jwt
 from starlette import status
 
 from conf.config import settings
+from webapp.utils.auth.cache import TokenCache
+from webapp.utils.auth.revocation import revocations
 
 auth_scheme = HTTPBearer()
 
@@ -24,23 +27,40 @@ class JwtTokenT(TypedDict):
 @dataclass
 class JwtAuth:
     secret: str
+    cache: TokenCache = field(default_factory=lambda: TokenCache(settings.JWT_CACHE_SIZE))
 
     def create_token(self, user_id: int) -> str:
+        now = int(time.time())
         access_token = {
             'uid': uuid.uuid4().hex,
-            'exp': datetime.utcnow() + timedelta(days=6),
+            'iat': now,
+            'exp': now + settings.JWT_TTL,
             'user_id': user_id,
         }
         return jwt.encode(access_token, self.secret)
 
-    def validate_token(self, authorization: Annotated[str, Header()]) -> JwtTokenT:
-        try:
-            return cast(JwtTokenT, jwt.decode(authorization, self.secret))
-        except JWTError:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    def decode_token(self, token: str) -> JwtTokenT:
+        # подпись проверяется только при первом появлении токена, дальше claims берутся из LRU до exp;
+        # отзыв проверяется всегда, поэтому logout и бан действуют сразу
+        claims = self.cache.get(token)
+        if claims is None:
+            try:
+                claims = jwt.decode(token, self.secret)
+            except JWTError:
+                raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+            self.cache.put(token, claims)
 
-    def get_current_user(self, credentials: HTTPAuthorizationCredentials = Security(auth_scheme)) -> JwtTokenT:
-        return self.validate_token(credentials.credentials)
+        if revocations.is_revoked(claims):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Токен отозван')
+
+        return cast(JwtTokenT, claims)
+
+    async def validate_token(self, authorization: Annotated[str, Header()]) -> JwtTokenT:
+        # async: зависимость выполняется в event loop, без перехода в пул потоков на каждый запрос
+        return self.decode_token(authorization.removeprefix('Bearer '))
+
+    async def get_current_user(self, credentials: HTTPAuthorizationCredentials = Security(auth_scheme)) -> JwtTokenT:
+        return self.decode_token(credentials.credentials)
 
 
 jwt_auth = JwtAuth(settings.JWT_SECRET_SALT)
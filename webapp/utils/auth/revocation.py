@@ -0,0 +1,110 @@
+import time
+import asyncio
+from typing import Any, Dict, Mapping
+
+from redis.exceptions import RedisError
+
+from conf.config import settings
+from webapp.cache.redis.key_builder import get_revocations_channel, get_revoked_tokens_key, get_revoked_users_key
+from webapp.db.redis import get_redis
+from webapp.logger import logger
+
+RECONNECT_DELAY = 1.0
+
+
+class RevocationList:
+    # копия отзывов из Redis в памяти процесса: проверка на запросе - два поиска в словаре, без сети.
+    # tokens: uid токена -> exp, users: user_id -> время бана (отозваны токены, выданные не позже)
+    def __init__(self) -> None:
+        self.tokens: Dict[str, float] = {}
+        self.users: Dict[int, float] = {}
+
+    def is_revoked(self, claims: Mapping[str, Any]) -> bool:
+        if claims.get('uid') in self.tokens:
+            return True
+
+        revoked_at = self.users.get(claims.get('user_id'))
+        if revoked_at is None:
+            return False
+
+        # у токенов, выпущенных до появления iat, время выдачи восстанавливается из exp
+        issued_at = claims.get('iat', claims['exp'] - settings.JWT_TTL)
+        return issued_at <= revoked_at
+
+    def apply(self, message: str) -> None:
+        kind, subject, timestamp = message.split(':')
+        if kind == 'token':
+            self.tokens[subject] = float(timestamp)
+        elif kind == 'user':
+            self.users[int(subject)] = max(float(timestamp), self.users.get(int(subject), 0))
+
+    def prune(self, now: float) -> None:
+        self.tokens = {uid: exp for uid, exp in self.tokens.items() if exp > now}
+        self.users = {user_id: at for user_id, at in self.users.items() if at > now - settings.JWT_TTL}
+
+    def clear(self) -> None:
+        self.tokens.clear()
+        self.users.clear()
+
+
+revocations = RevocationList()
+listener_task: asyncio.Task | None = None
+
+
+async def load_revocations() -> None:
+    redis = get_redis()
+    now = time.time()
+
+    tokens = await redis.zrangebyscore(get_revoked_tokens_key(), now, '+inf', withscores=True)
+    users = await redis.zrangebyscore(get_revoked_users_key(), now - settings.JWT_TTL, '+inf', withscores=True)
+
+    revocations.tokens = {uid.decode(): exp for uid, exp in tokens}
+    revocations.users = {int(user_id): revoked_at for user_id, revoked_at in users}
+
+
+async def _publish(key: str, member: str | int, score: float, message: str) -> None:
+    redis = get_redis()
+    now = time.time()
+
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.zadd(key, {str(member): score})
+        pipe.zremrangebyscore(get_revoked_tokens_key(), '-inf', now)
+        pipe.zremrangebyscore(get_revoked_users_key(), '-inf', now - settings.JWT_TTL)
+        pipe.publish(get_revocations_channel(), message)
+        await pipe.execute()
+
+    revocations.apply(message)
+
+
+async def revoke_token(claims: Mapping[str, Any]) -> None:
+    await _publish(get_revoked_tokens_key(), claims['uid'], claims['exp'], f'token:{claims["uid"]}:{claims["exp"]}')
+
+
+async def revoke_user(user_id: int) -> None:
+    # бан: все уже выданные токены пользователя перестают приниматься
+    revoked_at = time.time()
+    await _publish(get_revoked_users_key(), user_id, revoked_at, f'user:{user_id}:{revoked_at}')
+
+
+async def listen_revocations() -> None:
+    # подписка оформляется до загрузки множеств, чтобы не потерять отзыв между ними;
+    # после обрыва соединения множества перечитываются целиком
+    while True:
+        try:
+            async with get_redis().pubsub() as pubsub:
+                await pubsub.subscribe(get_revocations_channel())
+                await load_revocations()
+                async for message in pubsub.listen():
+                    if message['type'] != 'message':
+                        continue
+                    try:
+                        revocations.apply(message['data'].decode())
+                    except Exception as e:  # noqa: PIE786 - битое сообщение не должно останавливать подписку
+                        logger.error('Некорректное сообщение об отзыве %r: %s', message['data'], e)
+                        continue
+                    revocations.prune(time.time())
+        except asyncio.CancelledError:
+            raise
+        except (RedisError, OSError) as e:
+            logger.warning('Подписка на отзыв токенов прервана: %s', e)
+        await asyncio.sleep(RECONNECT_DELAY)
@@ -0,0 +1,20 @@
+import base64
+from datetime import datetime
+from typing import Tuple
+
+import orjson
+
+
+def encode_cursor(upload_date: datetime, file_id: int) -> str:
+    # непрозрачный курсор: клиент только передает его обратно и не должен разбирать
+    raw = orjson.dumps([upload_date.isoformat(), file_id])
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        upload_date, file_id = orjson.loads(raw)
+        return datetime.fromisoformat(upload_date), int(file_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f'invalid cursor: {cursor!r}') from e
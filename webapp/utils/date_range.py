@@ -0,0 +1,55 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+DateRange = Tuple[Optional[datetime], Optional[datetime]]
+
+
+def calendar_range(year: Optional[int] = None, month: Optional[int] = None, day: Optional[int] = None) -> DateRange:
+    # год/месяц/день превращаются в полуинтервал [start, end), который postgres ищет по индексу,
+    # в отличие от extract(...) = ...
+    if year is None:
+        if month is not None or day is not None:
+            raise ValueError('month and day require year')
+        return None, None
+
+    if month is None:
+        if day is not None:
+            raise ValueError('day requires month')
+        return datetime(year, 1, 1), datetime(year + 1, 1, 1)
+
+    start = datetime(year, month, 1)
+    if day is not None:
+        start = start.replace(day=day)
+        return start, start + timedelta(days=1)
+
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    return start, end
+
+
+def upload_date_range(
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    day: Optional[int] = None,
+    date_from: Optional[datetime | date] = None,
+    date_to: Optional[datetime | date] = None,
+) -> DateRange:
+    # пересечение календарного фильтра и явного интервала [date_from, date_to)
+    start, end = calendar_range(year, month, day)
+
+    if date_from is not None:
+        date_from = _naive(date_from)
+        start = date_from if start is None else max(start, date_from)
+    if date_to is not None:
+        date_to = _naive(date_to)
+        end = date_to if end is None else min(end, date_to)
+
+    return start, end
+
+
+def _naive(value: datetime | date) -> datetime:
+    # upload_date хранится без часового пояса
+    if not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
@@ -0,0 +1,70 @@
+from dataclasses import dataclass
+from datetime import datetime
+from email.utils import format_datetime
+
+
+class RangeNotSatisfiableError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class ByteRange:
+    start: int
+    end: int  # включительно, как в заголовке Content-Range
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start + 1
+
+    def content_range(self, size: int) -> str:
+        return f'bytes {self.start}-{self.end}/{size}'
+
+
+def parse_range(header: str | None, size: int) -> ByteRange | None:
+    # поддерживается один диапазон: bytes=a-b, bytes=a- и bytes=-n;
+    # некорректный или составной заголовок игнорируется (RFC 9110 разрешает отдать весь файл)
+    if not header:
+        return None
+
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+
+    first, sep, last = spec.strip().partition('-')
+    if not sep:
+        return None
+
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0:
+                raise RangeNotSatisfiableError
+            start, end = max(size - suffix, 0), size - 1
+        else:
+            start = int(first)
+            end = int(last) if last else max(start, size - 1)
+    except ValueError:
+        return None
+
+    if start > end:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiableError
+
+    return ByteRange(start=start, end=min(end, size - 1))
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(value, usegmt=True)
+
+
+def if_range_matches(header: str | None, etag: str, last_modified: datetime | None) -> bool:
+    # If-Range: диапазон применяется, только если валидатор совпадает с текущей версией объекта
+    if not header:
+        return True
+
+    header = header.strip()
+    if header.startswith('"') or header.startswith('W/'):
+        return not header.startswith('W/') and header == etag
+
+    return last_modified is not None and header == http_date(last_modified)
@@ -0,0 +1,31 @@
+import hashlib
+from typing import BinaryIO
+
+
+class CountingReader:
+    # обертка над файловым объектом: считает прочитанные байты, не держа в памяти
+    # больше одного запрошенного куска
+    def __init__(self, raw: BinaryIO) -> None:
+        self.raw = raw
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.raw.read(size)
+        self.size += len(chunk)
+        return chunk
+
+
+class HashingReader(CountingReader):
+    # дополнительно считает контрольную сумму по мере чтения
+    def __init__(self, raw: BinaryIO, algorithm: str = 'sha256') -> None:
+        super().__init__(raw)
+        self._hash = hashlib.new(algorithm)
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = super().read(size)
+        self._hash.update(chunk)
+        return chunk
+
+    @property
+    def checksum(self) -> str:
+        return self._hash.hexdigest()
@@ -0,0 +1,14 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from conf.config import settings
+
+
+def create_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    # к моменту создания пула в процессе работают потоки: QueueListener логов, потоки aiohttp/redis,
+    # фоновые задачи. После fork дочерний процесс может навсегда повиснуть на блокировке, которую
+    # в момент fork держал один из них, поэтому процессы пула запускаются чистыми
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context(settings.PROCESS_POOL_START_METHOD),
+    )
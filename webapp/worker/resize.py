@@ -0,0 +1,134 @@
+import io
+import os
+import asyncio
+import hashlib
+import contextlib
+from concurrent.futures import Executor
+from typing import Any, Dict, Tuple
+
+import msgpack
+from aiokafka import AIOKafkaConsumer
+from PIL import Image, ImageOps
+
+from conf.config import settings
+from webapp.cache.redis.resize import (
+    RESIZE_FAILED,
+    RESIZE_PROCESSING,
+    finish_resize_task,
+    release_resize_task,
+    set_resize_status,
+)
+from webapp.db.storage import get_storage
+from webapp.logger import logger
+from webapp.on_shutdown import stop_storage
+from webapp.on_startup.redis import start_redis
+from webapp.on_startup.storage import start_storage
+from webapp.storage.base import ObjectInfo, ObjectNotFoundError
+from webapp.storage.layout import ensure_bucket, resized_location
+from webapp.worker.pool import create_process_pool
+
+# форматы, в которых результат сохраняется как есть; остальное перекодируется в PNG
+SAVE_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF'}
+
+
+def resize_image(image: bytes, width: int, height: int) -> Tuple[bytes, str]:
+    # выполняется в процессе пула: декодирование и ресайз держат GIL и не должны блокировать event loop
+    with Image.open(io.BytesIO(image)) as source:
+        image_format = source.format if source.format in SAVE_FORMATS else 'PNG'
+        resized = ImageOps.exif_transpose(source).resize((width, height), Image.Resampling.LANCZOS)
+
+    if image_format == 'JPEG' and resized.mode not in ('RGB', 'L'):
+        resized = resized.convert('RGB')
+
+    output = io.BytesIO()
+    resized.save(output, format=image_format)
+    return output.getvalue(), Image.MIME[image_format]
+
+
+async def store_resized(
+    pool: Executor, digest: str, image: bytes, width: int, height: int
+) -> Tuple[str, str, ObjectInfo]:
+    location = resized_location(digest, width, height)
+    storage = get_storage()
+
+    # результат адресуется содержимым: если объект уже есть (например, статус в Redis истек), не считаем заново
+    with contextlib.suppress(ObjectNotFoundError):
+        return location.bucket, location.key, await storage.stat_object(location.bucket, location.key)
+
+    data, content_type = await asyncio.get_running_loop().run_in_executor(pool, resize_image, image, width, height)
+
+    await ensure_bucket(storage, location.bucket)
+    info = await storage.put_object(location.bucket, location.key, io.BytesIO(data), content_type=content_type)
+    return location.bucket, location.key, info
+
+
+async def handle_task(pool: Executor, payload: Dict[str, Any]) -> None:
+    task_id, width, height, image = payload['task_id'], payload['width'], payload['height'], payload['image']
+    user_id = payload.get('user_id')
+    digest = hashlib.sha256(image).hexdigest()
+
+    await set_resize_status(
+        task_id, RESIZE_PROCESSING, settings.RESIZE_PENDING_TTL, user_id=user_id, width=width, height=height
+    )
+    try:
+        bucket, key, info = await store_resized(pool, digest, image, width, height)
+    except Exception as e:  # noqa: PIE786 - любая ошибка ресайза должна попасть в статус задачи
+        logger.exception('Ошибка ресайза %s', task_id)
+        await set_resize_status(
+            task_id,
+            RESIZE_FAILED,
+            settings.RESIZE_RESULT_TTL,
+            user_id=user_id,
+            width=width,
+            height=height,
+            detail=str(e),
+        )
+        # снимаем дедупликацию, чтобы повторный запрос поставил задачу заново
+        await release_resize_task(user_id, digest, width, height)
+        return
+
+    await finish_resize_task(
+        user_id, digest, width, height, task_id, bucket=bucket, key=key, content_type=info.content_type, size=info.size
+    )
+
+
+async def run_worker() -> None:
+    await start_redis()
+    await start_storage()
+
+    consumer = AIOKafkaConsumer(
+        settings.KAFKA_TOPIC,
+        bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
+        group_id=settings.RESIZE_CONSUMER_GROUP,
+        max_partition_fetch_bytes=settings.RESIZE_MAX_IMAGE_SIZE * 2,
+    )
+    workers = settings.RESIZE_WORKERS or os.cpu_count() or 1
+    pool = create_process_pool(workers)
+    # одновременно в работе не больше задач, чем процессов в пуле, остальные ждут в Kafka
+    semaphore = asyncio.Semaphore(workers)
+    tasks = set()
+
+    async def process(value: bytes) -> None:
+        try:
+            await handle_task(pool, msgpack.unpackb(value))
+        except Exception:  # noqa: PIE786 - битое сообщение не должно останавливать консьюмер
+            logger.exception('Не удалось обработать сообщение ресайза')
+        finally:
+            semaphore.release()
+
+    await consumer.start()
+    try:
+        async for message in consumer:
+            await semaphore.acquire()
+            task = asyncio.create_task(process(message.value))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    finally:
+        await consumer.stop()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        pool.shutdown()
+        await stop_storage()
+
+
+if __name__ == '__main__':
+    asyncio.run(run_worker())
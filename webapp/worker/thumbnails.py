@@ -0,0 +1,154 @@
+import io
+import asyncio
+from concurrent.futures import Executor
+from typing import List, Sequence, Tuple
+
+from PIL import Image, ImageOps
+from sqlalchemy import select
+
+from conf.config import settings
+from webapp.cache.redis.cache import invalidate_user
+from webapp.crud.derivative import save_derivatives
+from webapp.db.postgres import async_session
+from webapp.db.storage import get_storage
+from webapp.logger import logger
+from webapp.models.sirius.file import File
+from webapp.models.sirius.file_derivative import FileDerivative
+from webapp.storage.layout import derivative_location, locate
+from webapp.worker.pool import create_process_pool
+
+pool: Executor | None = None
+# оригинал целиком читается в память процесса API перед передачей в пул: одновременно держим не больше
+# THUMBNAIL_WORKERS оригиналов, то есть пик памяти ограничен THUMBNAIL_WORKERS * THUMBNAIL_MAX_SOURCE_SIZE
+slots = asyncio.Semaphore(settings.THUMBNAIL_WORKERS)
+
+
+def make_thumbnails(
+    image: bytes,
+    widths: Sequence[int],
+    image_format: str,
+    quality: int,
+) -> List[Tuple[int, int, bytes]]:
+    # выполняется в процессе пула. Оригинал декодируется один раз, копии строятся от большей к меньшей,
+    # и каждая следующая уменьшается из предыдущей, а не из полноразмерного изображения
+    with Image.open(io.BytesIO(image)) as source:
+        # JPEG умеет декодироваться сразу в уменьшенном в 2-8 раз масштабе
+        source.draft('RGB', (max(widths), max(widths)))
+        current = ImageOps.exif_transpose(source)
+        if current.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+            current = current.convert('RGBA' if 'transparency' in current.info else 'RGB')
+
+    thumbnails = []
+    for width in sorted(widths, reverse=True):
+        if width >= current.width:
+            # не увеличиваем: для такой ширины подойдет оригинал
+            continue
+        height = max(1, round(current.height * width / current.width))
+        current = current.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+        output = io.BytesIO()
+        current.save(output, format=image_format, quality=quality)
+        thumbnails.append((width, height, output.getvalue()))
+
+    return thumbnails
+
+
+def is_thumbnail_source(file_type: str | None, file_size: int) -> bool:
+    return (
+        settings.THUMBNAIL_ENABLED
+        and bool(file_type)
+        and file_type.startswith('image/')
+        and file_size <= settings.THUMBNAIL_MAX_SOURCE_SIZE
+    )
+
+
+async def generate_derivatives(file_id: int) -> int:
+    async with async_session() as session:
+        file = (await session.execute(select(File).where(File.id == file_id))).scalars().first()
+        if file is None or not is_thumbnail_source(file.file_type, file.file_size):
+            return 0
+
+        if file.blob_sha256:
+            # то же содержимое уже загружалось: превью лежат рядом с общим blob, достаточно строк в таблице
+            shared = await session.execute(
+                select(
+                    FileDerivative.width,
+                    FileDerivative.height,
+                    FileDerivative.bucket,
+                    FileDerivative.key,
+                    FileDerivative.content_type,
+                    FileDerivative.size,
+                )
+                .distinct(FileDerivative.width)
+                .join(File, File.id == FileDerivative.file_id)
+                .where(File.blob_sha256 == file.blob_sha256, File.id != file_id)
+                .order_by(FileDerivative.width)
+            )
+            derivatives = [{**row, 'file_id': file_id} for row in shared.mappings().all()]
+            if derivatives:
+                await save_derivatives(session, derivatives)
+                await invalidate_user(file.user_id)
+                return len(derivatives)
+
+        storage = get_storage()
+        original = locate(file.user_id, file.file_path, file.bucket)
+        image_format = settings.THUMBNAIL_FORMAT.upper()
+        content_type = Image.MIME[image_format]
+        extension = image_format.lower()
+
+        try:
+            async with slots:
+                image = await storage.get_object(original.bucket, original.key)
+                thumbnails = await asyncio.get_running_loop().run_in_executor(
+                    pool, make_thumbnails, image, settings.THUMBNAIL_WIDTHS, image_format, settings.THUMBNAIL_QUALITY
+                )
+                del image
+        except Exception as e:  # noqa: PIE786 - Pillow бросает разнородные ошибки на битых файлах
+            # не картинка или битый файл: листинг и скачивание просто отдают оригинал
+            logger.warning('Не удалось построить превью файла %s: %s', file_id, e)
+            return 0
+
+        derivatives = []
+        for width, height, data in thumbnails:
+            location = derivative_location(original, width, extension)
+            info = await storage.put_object(location.bucket, location.key, io.BytesIO(data), content_type=content_type)
+            derivatives.append(
+                {
+                    'file_id': file_id,
+                    'width': width,
+                    'height': height,
+                    'bucket': location.bucket,
+                    'key': location.key,
+                    'content_type': content_type,
+                    'size': info.size,
+                }
+            )
+
+        if derivatives:
+            await save_derivatives(session, derivatives)
+            await invalidate_user(file.user_id)
+
+    return len(derivatives)
+
+
+async def generate_derivatives_safe(file_ids: Sequence[int]) -> None:
+    # фоновая задача после ответа на загрузку: ошибки только логируются
+    for file_id in file_ids:
+        try:
+            await generate_derivatives(file_id)
+        except Exception:  # noqa: PIE786 - ошибка одного файла не должна прерывать остальные
+            logger.exception('Ошибка генерации превью файла %s', file_id)
+
+
+def start_pool() -> None:
+    global pool
+
+    pool = create_process_pool(settings.THUMBNAIL_WORKERS)
+
+
+def stop_pool() -> None:
+    global pool
+
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+        pool = None